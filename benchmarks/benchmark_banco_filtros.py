@@ -0,0 +1,71 @@
+"""
+Compara a construção das máscaras Gaussianas pelo laço por pixel original de
+aplicar_filtros_frequencia com o banco de filtros vetorizado (com e sem cache).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_banco_filtros --tamanhos 256 512 1024
+"""
+import argparse
+import time
+import numpy as np
+
+from filtros_frequencia_python.banco_filtros import criar_mascara, limpar_cache_mascaras
+
+
+def mascara_gaussiana_laco(rows, cols, D0, passa_alta=False):
+    # Reprodução do caminho original: laço Python com np.exp por pixel
+    crow, ccol = rows // 2, cols // 2
+    mask = np.zeros((rows, cols, 2), np.float32)
+    for r in range(rows):
+        for c in range(cols):
+            D = np.sqrt((r - crow)**2 + (c - ccol)**2)
+            valor = np.exp(-(D**2) / (2 * D0**2))
+            if passa_alta:
+                valor = 1 - valor
+            mask[r, c, 0] = valor
+            mask[r, c, 1] = valor
+    return mask
+
+
+def _medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def executar_benchmark(tamanhos, D0=30, repeticoes=3, max_laco=1024):
+    print(f"{'tamanho':>10} {'laço (s)':>12} {'vetorizado (s)':>16} {'cache (s)':>12} {'ganho':>10}")
+    for n in tamanhos:
+        def vetorizado():
+            limpar_cache_mascaras()
+            criar_mascara((n, n), "gaussiano", "passa_baixa", D0)
+
+        t_vetorizado = _medir(vetorizado, repeticoes)
+        criar_mascara((n, n), "gaussiano", "passa_baixa", D0)
+        t_cache = _medir(lambda: criar_mascara((n, n), "gaussiano", "passa_baixa", D0), repeticoes)
+
+        if n <= max_laco:
+            referencia = mascara_gaussiana_laco(n, n, D0)
+            t_laco = _medir(lambda: mascara_gaussiana_laco(n, n, D0), 1)
+            mascara = criar_mascara((n, n), "gaussiano", "passa_baixa", D0)
+            if not np.allclose(referencia[:, :, 0], mascara, atol=1e-6):
+                raise AssertionError(f"Máscara vetorizada difere do laço original para {n}x{n}")
+            ganho = f"{t_laco / t_vetorizado:.0f}x"
+            texto_laco = f"{t_laco:.4f}"
+        else:
+            texto_laco, ganho = "-", "-"
+        print(f"{n:>10} {texto_laco:>12} {t_vetorizado:>16.5f} {t_cache:>12.7f} {ganho:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[256, 512, 1024, 2160])
+    parser.add_argument("--D0", type=float, default=30)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--max-laco", type=int, default=1024,
+                        help="Maior tamanho para o qual o laço original é executado (ele é muito lento).")
+    args = parser.parse_args()
+    executar_benchmark(args.tamanhos, args.D0, args.repeticoes, args.max_laco)
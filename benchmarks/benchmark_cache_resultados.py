@@ -0,0 +1,102 @@
+"""
+Mede o ganho do cache de resultados (CacheResultados) e verifica que:
+  - os resultados vindos do cache são idênticos aos calculados;
+  - mudar um parâmetro só recalcula as etapas seguintes a ele;
+  - o limite de tamanho remove as entradas menos usadas recentemente.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_cache_resultados --repeticoes 5
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+
+from filtros_frequencia_python.filtros_frequencia import aplicar_filtros_frequencia
+from segmentacao_watershed_python.segmentacao_watershed import aplicar_segmentacao_watershed
+from utilitarios.cache_resultados import CacheResultados
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGEM_WATERSHED = os.path.join(RAIZ, "segmentacao_watershed_python", "imagens_exemplo", "coins_original.png")
+IMAGEM_FILTROS = os.path.join(RAIZ, "filtros_frequencia_python", "imagens_exemplo", "camera_original.png")
+
+
+def _iguais(a, b):
+    return all(np.array_equal(x, y) if isinstance(x, np.ndarray) else x == y for x, y in zip(a, b))
+
+
+def verificar_etapas(pasta):
+    cache = CacheResultados(os.path.join(pasta, "etapas"))
+    saida = os.path.join(pasta, "saida", "coins")
+    sem_cache = aplicar_segmentacao_watershed(IMAGEM_WATERSHED, saida, salvar=False, renderizar=False)
+    aplicar_segmentacao_watershed(IMAGEM_WATERSHED, saida, salvar=False, renderizar=False, cache=cache)
+    com_cache = aplicar_segmentacao_watershed(IMAGEM_WATERSHED, saida, salvar=False, renderizar=False, cache=cache)
+    if not _iguais(sem_cache, com_cache):
+        raise AssertionError("Resultado do watershed vindo do cache difere do calculado")
+    # Etapas: imagem, cinza, marcadores, rótulos -> 4 falhas e depois 4 acertos
+    if (cache.falhas, cache.acertos) != (4, 4):
+        raise AssertionError(f"Contadores inesperados no watershed: {cache.estatisticas()}")
+
+    # Trocar o método só recalcula marcadores e rótulos; imagem e cinza vêm do cache
+    aplicar_segmentacao_watershed(IMAGEM_WATERSHED, saida, usar_distancia=False, salvar=False, renderizar=False, cache=cache)
+    if (cache.falhas, cache.acertos) != (6, 6):
+        raise AssertionError(f"Troca de método recalculou etapas demais: {cache.estatisticas()}")
+
+    cache.limpar()
+    aplicar_filtros_frequencia(IMAGEM_FILTROS, saida, salvar=False, renderizar=False, cache=cache)
+    falhas = cache.falhas
+    sem_cache = aplicar_filtros_frequencia(IMAGEM_FILTROS, saida, salvar=False, renderizar=False)
+    com_cache = aplicar_filtros_frequencia(IMAGEM_FILTROS, saida, salvar=False, renderizar=False, cache=cache)
+    if cache.falhas != falhas or not _iguais(sem_cache, com_cache):
+        raise AssertionError("Filtros de frequência não foram reaproveitados do cache")
+    print("Etapas em cache verificadas:", cache.estatisticas())
+
+
+def verificar_limite(pasta):
+    # Cabem três entradas de 1 MiB
+    cache = CacheResultados(os.path.join(pasta, "limite"), tamanho_maximo=int(3.5 * 1024 * 1024), comprimir=False)
+    chaves = [cache.chave("teste", [i]) for i in range(4)]
+    for i, chave in enumerate(chaves[:3]):
+        cache.guardar(chave, {"dados": np.full(1024 * 1024, i, np.uint8)})
+        os.utime(cache._caminho(chave), (i, i))
+    # A entrada 0 é usada de novo e passa a ser a mais recente; a 1 é a próxima a sair
+    cache.obter(chaves[0])
+    cache.guardar(chaves[3], {"dados": np.zeros(1024 * 1024, np.uint8)})
+    restantes = [i for i, chave in enumerate(chaves) if os.path.exists(cache._caminho(chave))]
+    if restantes != [0, 2, 3] or cache.tamanho() > cache.tamanho_maximo:
+        raise AssertionError(f"Remoção LRU inesperada: restaram {restantes}, {cache.tamanho()} bytes")
+    print("Limite de tamanho (LRU) verificado.")
+
+
+def executar_benchmark(pasta, repeticoes):
+    for comprimir in (True, False):
+        cache = CacheResultados(os.path.join(pasta, f"bench_{comprimir}"), comprimir=comprimir)
+        saida = os.path.join(pasta, "saida", "bench")
+        print(f"\ncomprimir={comprimir}")
+        for nome, funcao in (("watershed", lambda c: aplicar_segmentacao_watershed(IMAGEM_WATERSHED, saida, salvar=False,
+                                                                                  renderizar=False, cache=c)),
+                             ("filtros_frequencia", lambda c: aplicar_filtros_frequencia(IMAGEM_FILTROS, saida, salvar=False,
+                                                                                         renderizar=False, cache=c))):
+            tempos = {}
+            for rotulo, c in (("sem cache", None), ("cache frio", cache), ("cache quente", cache)):
+                melhor = float("inf")
+                for _ in range(1 if rotulo == "cache frio" else repeticoes):
+                    if rotulo == "cache frio":
+                        cache.limpar()
+                    inicio = time.perf_counter()
+                    funcao(c)
+                    melhor = min(melhor, time.perf_counter() - inicio)
+                tempos[rotulo] = melhor
+            print(f"  {nome:<20} " + "  ".join(f"{r}: {1000 * t:7.1f} ms" for r, t in tempos.items()))
+        print("  ", cache.estatisticas())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as pasta:
+        verificar_etapas(pasta)
+        verificar_limite(pasta)
+        executar_benchmark(pasta, args.repeticoes)
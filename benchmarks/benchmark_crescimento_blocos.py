@@ -0,0 +1,45 @@
+"""
+Mede tempo e pico de memória (tracemalloc) do crescimento em blocos, com a imagem e a
+máscara mapeadas em disco. A equivalência com crescer_regiao na imagem inteira é
+verificada em tests/test_crescimento_blocos.py.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_crescimento_blocos --tamanhos 2048 8192 --orcamento-mib 16
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+from crescimento_regioes_python.crescimento_blocos import crescer_regiao_em_blocos
+from utilitarios.imagens_sinteticas import imagem_textura
+
+
+def executar_benchmark(tamanhos, limiar=20, orcamento_mib=16):
+    with tempfile.TemporaryDirectory() as pasta:
+        for n in tamanhos:
+            caminho_imagem = os.path.join(pasta, "imagem.npy")
+            np.save(caminho_imagem, imagem_textura(n))
+            semente = (n // 2, n // 2)
+            tracemalloc.start()
+            inicio = time.perf_counter()
+            mascara = crescer_regiao_em_blocos(caminho_imagem, semente, limiar, os.path.join(pasta, "mascara.npy"),
+                                               orcamento_memoria=orcamento_mib * 1024 * 1024)
+            tempo = time.perf_counter() - inicio
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            area = int(np.count_nonzero(mascara))
+            del mascara
+            print(f"{n}x{n}: {tempo:8.3f} s, pico {pico / 2 ** 20:7.1f} MiB "
+                  f"(imagem {n * n / 2 ** 20:.1f} MiB, orçamento {orcamento_mib} MiB), região com {area} pixels")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[2048, 8192])
+    parser.add_argument("--limiar", type=int, default=20)
+    parser.add_argument("--orcamento-mib", type=int, default=16)
+    args = parser.parse_args()
+    executar_benchmark(args.tamanhos, args.limiar, args.orcamento_mib)
@@ -0,0 +1,92 @@
+"""
+Mede o ganho de desempenho dos motores de crescimento de regiões sobre o laço original
+(pilha Python com vizinhança 8, em crescimento_regioes_python.referencia).
+
+A equivalência com o laço original e com as imagens *_segmentada.png já geradas é
+verificada em tests/test_motor_crescimento.py (python -m pytest tests).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_crescimento_regioes --tamanhos 512 2048
+"""
+import argparse
+import time
+
+from crescimento_regioes_python.motor_crescimento import (CRITERIOS_CRESCIMENTO, METODOS_CRESCIMENTO, ORDENS_CRESCIMENTO,
+                                                          crescer_regiao)
+from crescimento_regioes_python.indice_limiar import calcular_indice_minimax
+from crescimento_regioes_python.referencia import crescer_regiao_referencia
+from utilitarios.imagens_sinteticas import imagem_textura
+
+
+def _medir(funcao, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def executar_benchmark(tamanhos, limiar=20, repeticoes=3, max_referencia=1024):
+    for n in tamanhos:
+        img = imagem_textura(n)
+        semente = (n // 2, n // 2)
+        area = crescer_regiao(img, semente, limiar).sum()
+        print(f"\n{n}x{n}, região com {area} pixels ({100 * area / img.size:.1f}%)")
+        t_ref = None
+        if n <= max_referencia:
+            t_ref = _medir(lambda: crescer_regiao_referencia(img, semente, limiar), 1)
+            print(f"  {'laço original (Stack)':<24} {t_ref:10.4f} s")
+        for metodo in METODOS_CRESCIMENTO:
+            tempo = _medir(lambda: crescer_regiao(img, semente, limiar, metodo), repeticoes)
+            ganho = f"({t_ref / tempo:.0f}x)" if t_ref else ""
+            print(f"  {metodo:<24} {tempo:10.4f} s {ganho}")
+
+
+def executar_benchmark_criterios(tamanhos, limiar=20, k=2.0):
+    # Critérios adaptativos (estatísticas incrementais) no motor de fila, nas duas ordens
+    for n in tamanhos:
+        img = imagem_textura(n)
+        semente = (n // 2, n // 2)
+        print(f"\n{n}x{n}, critérios adaptativos")
+        for criterio in CRITERIOS_CRESCIMENTO:
+            for ordem in ORDENS_CRESCIMENTO:
+                inicio = time.perf_counter()
+                area = crescer_regiao(img, semente, limiar, criterio=criterio, k=k, ordem=ordem).sum()
+                tempo = time.perf_counter() - inicio
+                print(f"  {criterio:<14} {ordem:<12} {tempo:10.4f} s  ({area} pixels)")
+
+
+def executar_benchmark_indice(tamanhos, limiares=range(0, 256, 5)):
+    # Índice minimax: calculado uma vez, cada limiar vira uma comparação
+    for n in tamanhos:
+        img = imagem_textura(n)
+        semente = (n // 2, n // 2)
+        inicio = time.perf_counter()
+        indice = calcular_indice_minimax(img, semente)
+        t_indice = time.perf_counter() - inicio
+        t_consultas = t_crescimentos = 0.0
+        for limiar in limiares:
+            inicio = time.perf_counter()
+            indice.consultar(limiar)
+            t_consultas += time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            crescer_regiao(img, semente, limiar)
+            t_crescimentos += time.perf_counter() - inicio
+        print(f"\n{n}x{n}, varredura de {len(limiares)} limiares")
+        print(f"  {'construção do índice':<24} {t_indice:10.4f} s")
+        print(f"  {'consulta por limiar':<24} {1000 * t_consultas / len(limiares):10.3f} ms")
+        print(f"  {'crescer_regiao por limiar':<24} {1000 * t_crescimentos / len(limiares):10.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[512, 1024, 4096])
+    parser.add_argument("--limiar", type=int, default=20)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--max-referencia", type=int, default=1024,
+                        help="Maior tamanho para o qual o laço original é executado (ele é muito lento).")
+    args = parser.parse_args()
+    executar_benchmark(args.tamanhos, args.limiar, args.repeticoes, args.max_referencia)
+    executar_benchmark_criterios(args.tamanhos, args.limiar)
+    executar_benchmark_indice(args.tamanhos)
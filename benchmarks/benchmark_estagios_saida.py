@@ -0,0 +1,81 @@
+"""
+Mede o custo de cada estágio dos três algoritmos: núcleo em memória (calcular_*),
+salvamento dos PNGs e renderização da figura de comparação com matplotlib, além do
+tempo de importação dos módulos sem os estágios de saída.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_estagios_saida --repeticoes 3
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import skimage.io
+
+from crescimento_regioes_python.crescimento_regioes import (calcular_crescimento_regioes, renderizar_crescimento_regioes,
+                                                            salvar_crescimento_regioes)
+from filtros_frequencia_python.filtros_frequencia import (calcular_filtros_frequencia, renderizar_filtros_frequencia,
+                                                          salvar_filtros_frequencia)
+from segmentacao_watershed_python.segmentacao_watershed import (calcular_segmentacao_watershed,
+                                                                renderizar_segmentacao_watershed,
+                                                                salvar_segmentacao_watershed)
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULOS = ("filtros_frequencia_python.filtros_frequencia", "segmentacao_watershed_python.segmentacao_watershed",
+           "crescimento_regioes_python.crescimento_regioes")
+ESTAGIOS = {
+    "filtros_frequencia": ("filtros_frequencia_python/imagens_exemplo/camera_original.png",
+                           lambda img: calcular_filtros_frequencia(img),
+                           salvar_filtros_frequencia, renderizar_filtros_frequencia),
+    "watershed": ("segmentacao_watershed_python/imagens_exemplo/coins_original.png",
+                  lambda img: calcular_segmentacao_watershed(img),
+                  salvar_segmentacao_watershed, renderizar_segmentacao_watershed),
+    "crescimento_regioes": ("crescimento_regioes_python/imagens_exemplo/astronaut_original.png",
+                            lambda img: calcular_crescimento_regioes(img, (200, 200), 20),
+                            salvar_crescimento_regioes, renderizar_crescimento_regioes),
+}
+
+
+def medir_importacao():
+    # Processo novo para cada medição, para não aproveitar módulos já importados
+    codigo = ("import sys, time; inicio = time.perf_counter(); import {0}; "
+              "print(time.perf_counter() - inicio, 'matplotlib' in sys.modules)")
+    for modulo in MODULOS:
+        saida = subprocess.run([sys.executable, "-c", codigo.format(modulo)], cwd=RAIZ, capture_output=True,
+                               text=True, check=True).stdout.split()
+        print(f"  import {modulo:<52} {float(saida[0]):7.3f} s  (matplotlib carregado: {saida[1]})")
+
+
+def _melhor(funcao, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def executar_benchmark(repeticoes):
+    print("Importação dos módulos (processo novo):")
+    medir_importacao()
+    with tempfile.TemporaryDirectory() as pasta:
+        for nome, (caminho, calcular, salvar, renderizar) in ESTAGIOS.items():
+            img = skimage.io.imread(os.path.join(RAIZ, caminho))
+            resultado = calcular(img)
+            base = os.path.join(pasta, nome)
+            t_nucleo = _melhor(lambda: calcular(img), repeticoes)
+            t_salvar = _melhor(lambda: salvar(resultado, base), repeticoes)
+            t_renderizar = _melhor(lambda: renderizar(resultado, base), repeticoes)
+            print(f"\n{nome} ({img.shape[0]}x{img.shape[1]})")
+            print(f"  {'núcleo (calcular_*)':<24} {1000 * t_nucleo:9.1f} ms")
+            print(f"  {'salvar PNGs':<24} {1000 * t_salvar:9.1f} ms")
+            print(f"  {'figura matplotlib':<24} {1000 * t_renderizar:9.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+    executar_benchmark(args.repeticoes)
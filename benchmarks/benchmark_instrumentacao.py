@@ -0,0 +1,78 @@
+"""
+Mede o custo da instrumentação (utilitarios.instrumentacao): por chamada de etapa()
+desativada e ativada, e nos núcleos calcular_* dos três algoritmos com a instrumentação
+desativada, ativada só com tempos e ativada com pico de memória (tracemalloc). Ao final
+exporta o trace da execução instrumentada e exibe o resumo por etapa.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_instrumentacao --repeticoes 5 --trace trace.json
+"""
+import argparse
+import os
+import time
+import timeit
+import skimage.io
+
+from utilitarios import instrumentacao
+from benchmarks.benchmark_estagios_saida import ESTAGIOS, RAIZ
+
+
+def medir_chamada(numero=200000):
+    # Custo de um "with etapa(...)" vazio, em ns
+    def executar():
+        with instrumentacao.etapa("vazia", "benchmark"):
+            pass
+    return 1e9 * min(timeit.repeat(executar, number=numero, repeat=3)) / numero
+
+
+def _melhor(funcao, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def executar_benchmark(repeticoes, caminho_trace, formato):
+    instrumentacao.desativar()
+    print(f"etapa() desativada: {medir_chamada():8.0f} ns por chamada")
+    instrumentacao.ativar()
+    print(f"etapa() ativada:    {medir_chamada():8.0f} ns por chamada")
+
+    imagens = {nome: skimage.io.imread(os.path.join(RAIZ, caminho)) for nome, (caminho, *_) in ESTAGIOS.items()}
+    print(f"\n{'algoritmo':<22} {'desativada':>12} {'tempos':>12} {'memória':>12}")
+    for nome, (_, calcular, _, _) in ESTAGIOS.items():
+        img = imagens[nome]
+        calcular(img)
+        tempos = []
+        for medir_memoria in (None, False, True):
+            if medir_memoria is None:
+                instrumentacao.desativar()
+            else:
+                instrumentacao.ativar(medir_memoria)
+            tempos.append(_melhor(lambda: calcular(img), repeticoes))
+        instrumentacao.desativar()
+        print(f"{nome:<22} " + " ".join(f"{1000 * t:9.1f} ms" for t in tempos))
+
+    # Uma execução de cada algoritmo com tempos e memória, exportada para inspeção
+    coletada = instrumentacao.ativar(medir_memoria=True)
+    for nome, (_, calcular, _, _) in ESTAGIOS.items():
+        calcular(imagens[nome])
+    instrumentacao.desativar()
+    print(f"\n{'etapa':<36} {'chamadas':>8} {'média':>11} {'pico memória':>14}")
+    for nome, estatisticas in coletada.resumo()["etapas"].items():
+        print(f"{nome:<36} {estatisticas['chamadas']:>8} {estatisticas['media_ms']:8.2f} ms "
+              f"{estatisticas['pico_memoria_bytes'] / 2 ** 20:10.1f} MiB")
+    if caminho_trace:
+        coletada.exportar(caminho_trace, formato)
+        print(f"\nTrace ({formato}) exportado em {caminho_trace}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--trace", default=None, help="Arquivo do trace exportado (opcional).")
+    parser.add_argument("--formato", choices=("chrome", "json"), default="chrome")
+    args = parser.parse_args()
+    executar_benchmark(args.repeticoes, args.trace, args.formato)
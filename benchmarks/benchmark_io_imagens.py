@@ -0,0 +1,98 @@
+"""
+Mede a camada de E/S de imagens (utilitarios.io_imagens) contra o skimage.io:
+
+- decodificação: skimage.io.imread, cv2.imdecode (ler_imagem), acerto no cache de
+  decodificação e .npy por memory-map, conferindo que os pixels são os mesmos;
+- codificação: skimage.io.imsave e PNG do OpenCV nos níveis 0, 1, 3, 6 e 9 (tempo,
+  tamanho do arquivo e conferência dos pixels relidos) e np.save;
+- salvamento dos três algoritmos (salvar_*) síncrono e pelo GravadorImagens.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_io_imagens --repeticoes 5
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import skimage.io
+
+from benchmarks.benchmark_estagios_saida import ESTAGIOS, RAIZ
+from utilitarios.io_imagens import CacheDecodificacao, GravadorImagens, gravar_imagem, ler_imagem
+
+NIVEIS_COMPRESSAO = (0, 1, 3, 6, 9)
+
+
+def _melhor(funcao, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def medir_decodificacao(caminho, pasta, repeticoes):
+    referencia = skimage.io.imread(caminho)
+    caminho_npy = os.path.join(pasta, "entrada.npy")
+    np.save(caminho_npy, referencia)
+    cache = CacheDecodificacao()
+    cache.obter(caminho)
+    leituras = {
+        "skimage.io.imread": lambda: skimage.io.imread(caminho),
+        "ler_imagem (cv2.imdecode)": lambda: ler_imagem(caminho),
+        "cache (acerto)": lambda: cache.obter(caminho),
+        ".npy (memory-map)": lambda: ler_imagem(caminho_npy),
+    }
+    for nome, ler in leituras.items():
+        iguais = np.array_equal(ler(), referencia)
+        print(f"  {nome:<28} {1000 * _melhor(ler, repeticoes):9.2f} ms  pixels iguais: {iguais}")
+
+
+def medir_codificacao(caminho, pasta, repeticoes):
+    imagem = skimage.io.imread(caminho)
+    destino = os.path.join(pasta, "saida.png")
+    niveis = [("skimage.io.imsave", None)] + [(f"cv2 PNG nível {nivel}", nivel) for nivel in NIVEIS_COMPRESSAO]
+    for nome, nivel in niveis:
+        tempo = _melhor(lambda: gravar_imagem(destino, imagem, nivel), repeticoes)
+        iguais = np.array_equal(ler_imagem(destino), imagem)
+        print(f"  {nome:<28} {1000 * tempo:9.2f} ms  {os.path.getsize(destino) / 1024:9.1f} KiB  "
+              f"pixels iguais: {iguais}")
+    destino = os.path.join(pasta, "saida.npy")
+    tempo = _melhor(lambda: gravar_imagem(destino, imagem), repeticoes)
+    print(f"  {'np.save (.npy)':<28} {1000 * tempo:9.2f} ms  {os.path.getsize(destino) / 1024:9.1f} KiB")
+
+
+def medir_salvamento(repeticoes, pasta):
+    print(f"  {'algoritmo':<22} {'síncrono':>12} {'gravador':>12} {'gravador nível 1':>17}")
+    for nome, (caminho, calcular, salvar, _) in ESTAGIOS.items():
+        resultado = calcular(skimage.io.imread(os.path.join(RAIZ, caminho)))
+        base = os.path.join(pasta, nome)
+
+        def assincrono(nivel):
+            with GravadorImagens(nivel_compressao=nivel) as gravador:
+                salvar(resultado, base, gravador)
+
+        tempos = [_melhor(lambda: salvar(resultado, base), repeticoes),
+                  _melhor(lambda: assincrono(None), repeticoes), _melhor(lambda: assincrono(1), repeticoes)]
+        print(f"  {nome:<22} " + " ".join(f"{1000 * t:9.1f} ms" for t in tempos[:2]) + f" {1000 * tempos[2]:14.1f} ms")
+
+
+def executar_benchmark(repeticoes):
+    with tempfile.TemporaryDirectory() as pasta:
+        for nome, (caminho, *_) in ESTAGIOS.items():
+            caminho = os.path.join(RAIZ, caminho)
+            print(f"{os.path.basename(caminho)} ({nome})")
+            print(" decodificação:")
+            medir_decodificacao(caminho, pasta, repeticoes)
+            print(" codificação:")
+            medir_codificacao(caminho, pasta, repeticoes)
+        print("salvamento dos resultados (salvar_*):")
+        medir_salvamento(repeticoes, pasta)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+    executar_benchmark(args.repeticoes)
@@ -0,0 +1,69 @@
+"""
+Mede a escalabilidade do watershed em lote com o número de processos e verifica que
+as saídas do lote são idênticas às de aplicar_segmentacao_watershed chamada em série.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_lote_watershed --copias 16 --workers 1 2 4 8
+"""
+import argparse
+import filecmp
+import os
+import shutil
+import tempfile
+import time
+
+from segmentacao_watershed_python.lote_watershed import processar_lote_watershed
+from segmentacao_watershed_python.segmentacao_watershed import aplicar_segmentacao_watershed
+
+PASTA_IMAGENS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "segmentacao_watershed_python", "imagens_exemplo")
+
+
+def _preparar_lote(pasta, copias):
+    for nome in sorted(os.listdir(PASTA_IMAGENS)):
+        base, extensao = os.path.splitext(nome)
+        for i in range(copias):
+            shutil.copy(os.path.join(PASTA_IMAGENS, nome), os.path.join(pasta, f"{base}_{i:04d}{extensao}"))
+    return len(os.listdir(pasta))
+
+
+def verificar_equivalencia(pasta_entrada, pasta_saida):
+    pasta_serial = os.path.join(pasta_saida, "serial")
+    pasta_lote = os.path.join(pasta_saida, "lote")
+    nome = sorted(os.listdir(pasta_entrada))[0]
+    base = os.path.splitext(nome)[0]
+    aplicar_segmentacao_watershed(os.path.join(pasta_entrada, nome), os.path.join(pasta_serial, base))
+    for resultado in processar_lote_watershed([os.path.join(pasta_entrada, nome)], pasta_lote, workers=1):
+        if resultado.erro:
+            raise AssertionError(resultado.erro)
+    for sufixo in ("_segmentada_watershed.png", "_marcadores.png", "_etapa_intermediaria.png"):
+        if not filecmp.cmp(os.path.join(pasta_serial, base + sufixo), os.path.join(pasta_lote, base + sufixo), False):
+            raise AssertionError(f"Saída {sufixo} do lote difere da execução em série")
+    print("Saídas do lote idênticas às da execução em série.")
+
+
+def executar_benchmark(copias, lista_workers):
+    with tempfile.TemporaryDirectory() as pasta:
+        pasta_entrada = os.path.join(pasta, "entrada")
+        os.makedirs(pasta_entrada)
+        total = _preparar_lote(pasta_entrada, copias)
+        verificar_equivalencia(pasta_entrada, os.path.join(pasta, "verificacao"))
+        print(f"\n{total} imagens, {os.cpu_count()} núcleos")
+        vazao_1 = None
+        for workers in lista_workers:
+            inicio = time.perf_counter()
+            resultados = list(processar_lote_watershed(pasta_entrada, os.path.join(pasta, f"saida_{workers}"), workers=workers))
+            tempo = time.perf_counter() - inicio
+            if any(r.erro for r in resultados):
+                raise AssertionError(next(r.erro for r in resultados if r.erro))
+            vazao = total / tempo
+            vazao_1 = vazao_1 or vazao
+            print(f"  {workers:3d} processos: {tempo:8.2f} s  {vazao:7.2f} imagens/s  ({vazao / vazao_1:.2f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copias", type=int, default=8, help="Cópias de cada imagem de exemplo no lote.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+    executar_benchmark(args.copias, sorted(set(args.workers)))
@@ -0,0 +1,99 @@
+"""
+Mede as estratégias de marcadores do watershed (segmentacao_watershed_python.marcadores):
+
+- marcadores por percentis: duas chamadas de np.percentile (duas ordenações da imagem)
+  contra o histograma com tabela de consulta, conferindo que a máscara é a mesma;
+- custo do pré-processamento (abertura, distância, gradiente, histograma) e de cada
+  estratégia sobre ele;
+- varredura de parâmetros com um pré-processamento novo por combinação contra um único
+  pré-processamento compartilhado, conferindo que os marcadores são os mesmos.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_marcadores --lados 512 2048 --repeticoes 3
+"""
+import argparse
+import itertools
+import time
+import numpy as np
+from skimage import color, img_as_ubyte
+
+from segmentacao_watershed_python.marcadores import (ESTRATEGIAS_MARCADORES, PreprocessamentoMarcadores, gerar_marcadores,
+                                                     mascara_percentis, varrer_marcadores)
+from utilitarios.imagens_sinteticas import imagem_discos
+
+GRADES = {
+    "limiar_distancia": {"fracao": [0.3, 0.5, 0.7]},
+    "h_maximos": {"h": [1, 2, 4, 8]},
+    "picos_locais": {"distancia_minima": [5, 10, 20], "limiar_relativo": [0.0, 0.2]},
+    "percentis": {"inferior": [10, 20, 30], "superior": [70, 80, 90]},
+}
+
+
+def _melhor(funcao, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def _mascara_np_percentile(img_ubyte):
+    # Versão anterior de marcadores_gradiente
+    mascara = np.zeros_like(img_ubyte, dtype=bool)
+    mascara[img_ubyte < np.percentile(img_ubyte, 20)] = True
+    mascara[img_ubyte > np.percentile(img_ubyte, 80)] = True
+    return mascara
+
+
+def _preprocessar(img_ubyte):
+    pre = PreprocessamentoMarcadores(img_ubyte)
+    pre.distancia, pre.fundo_certo, pre.gradiente, pre.histograma
+    return pre
+
+
+def executar_benchmark(lados, repeticoes):
+    for lado in lados:
+        img_ubyte = img_as_ubyte(color.rgb2gray(imagem_discos(lado, lado)))
+        print(f"\n{lado}x{lado}")
+        iguais = np.array_equal(_mascara_np_percentile(img_ubyte), mascara_percentis(img_ubyte))
+        tempo_antes = _melhor(lambda: _mascara_np_percentile(img_ubyte), repeticoes)
+        tempo_depois = _melhor(lambda: mascara_percentis(img_ubyte), repeticoes)
+        print(f"  máscara de percentis: np.percentile {1000 * tempo_antes:8.1f} ms  histograma "
+              f"{1000 * tempo_depois:8.1f} ms  ({tempo_antes / tempo_depois:4.1f}x)  iguais: {iguais}")
+
+        print(f"  pré-processamento: {1000 * _melhor(lambda: _preprocessar(img_ubyte), repeticoes):8.1f} ms")
+        pre = _preprocessar(img_ubyte)
+        for estrategia in ESTRATEGIAS_MARCADORES:
+            tempo = _melhor(lambda: gerar_marcadores(pre, estrategia), repeticoes)
+            print(f"  {estrategia:<18} {1000 * tempo:8.1f} ms  {int(gerar_marcadores(pre, estrategia).max()):6d} rótulos")
+
+        print(f"  {'varredura':<18} {'combinações':>11} {'sem reuso':>12} {'com reuso':>12}")
+        for estrategia, grade in GRADES.items():
+            combinacoes = _combinacoes(grade)
+
+            def sem_reuso():
+                return [gerar_marcadores(PreprocessamentoMarcadores(img_ubyte), estrategia, **parametros)
+                        for parametros in combinacoes]
+
+            def com_reuso():
+                return [marcadores for _, marcadores in
+                        varrer_marcadores(PreprocessamentoMarcadores(img_ubyte), estrategia, **grade)]
+
+            iguais = all(np.array_equal(a, b) for a, b in zip(sem_reuso(), com_reuso()))
+            tempos = [_melhor(sem_reuso, repeticoes), _melhor(com_reuso, repeticoes)]
+            print(f"  {estrategia:<18} {len(combinacoes):>11} " + " ".join(f"{1000 * t:9.1f} ms" for t in tempos)
+                  + f"  iguais: {iguais}")
+
+
+def _combinacoes(grade):
+    nomes = list(grade)
+    return [dict(zip(nomes, valores)) for valores in itertools.product(*(grade[nome] for nome in nomes))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lados", type=int, nargs="+", default=[512, 2048])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+    executar_benchmark(args.lados, args.repeticoes)
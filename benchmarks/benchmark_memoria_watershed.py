@@ -0,0 +1,97 @@
+"""
+Mede o pico de memória (tracemalloc) do watershed no modo padrão e no modo econômico
+(economizar_memoria=True), com e sem as imagens de visualização, e verifica que o modo
+econômico fica dentro de um orçamento de MiB por megapixel e gera os mesmos rótulos e
+as mesmas imagens salvas.
+
+O orçamento vale para o custo marginal: a inclinação do pico entre uma imagem de uma
+faixa (LADO_BASE², PIXELS_POR_FAIXA pixels) e a imagem medida. O custo fixo das
+conversões por faixas (até ~25 MiB no label2rgb do gradiente) não cresce com a imagem
+e, dividido pelos megapixels, estouraria o orçamento em imagens pequenas.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_memoria_watershed --lados 1000 2000
+"""
+import argparse
+import gc
+import os
+import time
+import tracemalloc
+import cv2
+import numpy as np
+import skimage.io
+from skimage import img_as_ubyte
+
+from segmentacao_watershed_python.segmentacao_watershed import (PIXELS_POR_FAIXA, _imagens_visualizacao,
+                                                                calcular_segmentacao_watershed)
+
+IMAGEM = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      "segmentacao_watershed_python", "imagens_exemplo", "chelsea_original.png")
+
+# Orçamento do modo econômico em MiB por megapixel acima da imagem de LADO_BASE², por
+# (usar_distancia, manter_visualizacao). O gradiente inclui a cópia float64 e a fila de
+# prioridade internas do watershed do skimage
+ORCAMENTO_MIB_POR_MEGAPIXEL = {
+    (True, True): 20, (True, False): 14,
+    (False, True): 50, (False, False): 45,
+}
+LADO_BASE = int(PIXELS_POR_FAIXA ** 0.5)
+
+
+def _medir(imagem, usar_distancia, economizar_memoria, manter_visualizacao):
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = calcular_segmentacao_watershed(imagem, usar_distancia, economizar_memoria=economizar_memoria,
+                                               manter_visualizacao=manter_visualizacao)
+    visualizacao = _imagens_visualizacao(resultado) if manter_visualizacao else None
+    tempo = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return resultado, visualizacao, pico, tempo
+
+
+def executar_benchmark(lados):
+    original = skimage.io.imread(IMAGEM)
+    imagem_base = cv2.resize(original, (LADO_BASE, LADO_BASE), interpolation=cv2.INTER_CUBIC)
+    picos_base = {(usar_distancia, manter_visualizacao): _medir(imagem_base, usar_distancia, True, manter_visualizacao)[2]
+                  for usar_distancia in (True, False) for manter_visualizacao in (True, False)}
+    for lado in lados:
+        imagem = cv2.resize(original, (lado, lado), interpolation=cv2.INTER_CUBIC)
+        megapixels = lado * lado / 1e6
+        print(f"\n{lado}x{lado} ({megapixels:.1f} MP)")
+        for usar_distancia in (True, False):
+            metodo = "distância" if usar_distancia else "gradiente"
+            padrao, visualizacao_padrao, pico, tempo = _medir(imagem, usar_distancia, False, True)
+            print(f"  {metodo:<9} padrão:                  {pico / 2 ** 20 / megapixels:7.1f} MiB/MP  {tempo:7.3f} s")
+            for manter_visualizacao in (True, False):
+                resultado, visualizacao, pico, tempo = _medir(imagem, usar_distancia, True, manter_visualizacao)
+                por_megapixel = pico / 2 ** 20 / megapixels
+                orcamento = ORCAMENTO_MIB_POR_MEGAPIXEL[(usar_distancia, manter_visualizacao)]
+                # Inclinação entre a imagem base e esta; sem ela (lado <= LADO_BASE) não há verificação
+                marginal = None
+                if lado > LADO_BASE:
+                    marginal = ((pico - picos_base[(usar_distancia, manter_visualizacao)]) / 2 ** 20
+                                / (megapixels - LADO_BASE ** 2 / 1e6))
+                rotulo = "econômico" + (", com visualização" if manter_visualizacao else ", só rótulos")
+                print(f"  {metodo:<9} {rotulo:<31}{por_megapixel:7.1f} MiB/MP  {tempo:7.3f} s  marginal "
+                      + (f"{marginal:5.1f}" if marginal is not None else "    -") + f" (orçamento {orcamento})")
+                if not np.array_equal(resultado.rotulos, padrao.rotulos):
+                    raise AssertionError(f"Rótulos do modo econômico diferem ({metodo})")
+                if manter_visualizacao:
+                    salvas_padrao = [*visualizacao_padrao, padrao.imagem_segmentada]
+                    salvas = [*visualizacao, resultado.imagem_segmentada]
+                    if not all(np.array_equal(img_as_ubyte(a), img_as_ubyte(b)) for a, b in zip(salvas_padrao, salvas)):
+                        raise AssertionError(f"Imagens salvas do modo econômico diferem ({metodo})")
+                if marginal is not None and marginal > orcamento:
+                    raise AssertionError(f"{metodo}, {rotulo}: {marginal:.1f} MiB/MP marginais acima do orçamento "
+                                         f"de {orcamento}")
+            del padrao, visualizacao_padrao
+    print("\nModo econômico dentro do orçamento, com os mesmos rótulos e imagens.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lados", type=int, nargs="+", default=[1000, 2000])
+    args = parser.parse_args()
+    executar_benchmark(args.lados)
@@ -0,0 +1,75 @@
+"""
+Mede a vazão (quadros/s) da filtragem em lote de uma pilha (N, H, W) contra a
+filtragem quadro a quadro, tanto pelo caminho original (cv2.dft completo + fftshift)
+quanto pelo caminho rfft chamado uma vez por quadro.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_pilha_frequencia --quadros 64 --altura 480 --largura 640
+"""
+import argparse
+import time
+import cv2
+import numpy as np
+
+from filtros_frequencia_python.banco_filtros import criar_mascara
+from filtros_frequencia_python.espectro_rfft import filtrar_espectro_rfft, transformar_rfft
+from filtros_frequencia_python.pilha_frequencia import filtrar_pilha_frequencia
+
+
+def filtrar_quadro_completo(img, D0):
+    # Caminho original de aplicar_filtros_frequencia para um único filtro
+    dft_shift = np.fft.fftshift(cv2.dft(np.float32(img), flags=cv2.DFT_COMPLEX_OUTPUT))
+    mascara = criar_mascara(img.shape, "gaussiano", "passa_baixa", D0)[:, :, np.newaxis]
+    return cv2.idft(np.fft.ifftshift(dft_shift * mascara), flags=cv2.DFT_SCALE | cv2.DFT_REAL_OUTPUT)
+
+
+def filtrar_quadro_rfft(img, D0, backend, workers):
+    return filtrar_espectro_rfft(transformar_rfft(img, backend, workers), "gaussiano", "passa_baixa", D0)
+
+
+def _vazao(funcao, quadros, repeticoes):
+    funcao()
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return quadros / melhor
+
+
+def executar_benchmark(quadros, altura, largura, D0=30, backend="scipy", workers=-1, repeticoes=3):
+    pilha = np.random.default_rng(0).random((quadros, altura, largura), dtype=np.float32)
+
+    em_lote = filtrar_pilha_frequencia(pilha, D0=D0, backend=backend, workers=workers)
+    for i in (0, quadros - 1):
+        if not np.allclose(em_lote[i], filtrar_quadro_rfft(pilha[i], D0, backend, workers), atol=1e-4):
+            raise AssertionError(f"Resultado em lote difere do resultado por quadro no quadro {i}")
+
+    medicoes = {
+        "quadro a quadro (cv2.dft completo)": lambda: [filtrar_quadro_completo(q, D0) for q in pilha],
+        f"quadro a quadro (rfft {backend})": lambda: [filtrar_quadro_rfft(q, D0, backend, workers) for q in pilha],
+        f"pilha em lote (rfft {backend})": lambda: filtrar_pilha_frequencia(pilha, D0=D0, backend=backend, workers=workers),
+    }
+    print(f"{quadros} quadros de {altura}x{largura}")
+    referencia = None
+    for rotulo, funcao in medicoes.items():
+        vazao = _vazao(funcao, quadros, repeticoes)
+        referencia = referencia or vazao
+        print(f"  {rotulo:<38} {vazao:9.1f} quadros/s  ({vazao / referencia:.1f}x)")
+
+    cor = np.random.default_rng(1).integers(0, 256, (altura, largura, 3), dtype=np.uint8)
+    vazao_cor = _vazao(lambda: filtrar_pilha_frequencia(cor, D0=D0, formato="HWC", backend=backend, workers=workers), 1, repeticoes)
+    print(f"  {'cor por canal (HWC, 1 imagem)':<38} {vazao_cor:9.1f} imagens/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quadros", type=int, default=64)
+    parser.add_argument("--altura", type=int, default=480)
+    parser.add_argument("--largura", type=int, default=640)
+    parser.add_argument("--D0", type=float, default=30)
+    parser.add_argument("--backend", default="scipy")
+    parser.add_argument("--workers", type=int, default=-1, help="Threads para o backend scipy (-1 = todos os núcleos).")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+    executar_benchmark(args.quadros, args.altura, args.largura, args.D0, args.backend, args.workers, args.repeticoes)
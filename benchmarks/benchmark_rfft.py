@@ -0,0 +1,80 @@
+"""
+Compara o caminho original de filtragem (cv2.dft com espectro complexo completo,
+fftshift/ifftshift e uma inversa por filtro) com o caminho de meia-espectro
+(rfft2/irfft2, preenchimento até o tamanho ótimo e transformada direta compartilhada)
+para cada backend de FFT, e informa o backend escolhido automaticamente por shape.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_rfft --tamanhos 512 1000 2160 --workers 4
+"""
+import argparse
+import time
+import cv2
+import numpy as np
+
+from filtros_frequencia_python.backends_fft import BACKENDS_FFT, escolher_backend_fft, medir_backends_fft, tamanho_otimo_dft
+from filtros_frequencia_python.banco_filtros import criar_mascara
+from filtros_frequencia_python.espectro_rfft import filtrar_frequencia_rfft
+
+FILTROS = {
+    "passa_baixa": {"tipo": "gaussiano", "banda": "passa_baixa", "D0": 30},
+    "passa_alta": {"tipo": "gaussiano", "banda": "passa_alta", "D0": 30},
+}
+
+
+def filtrar_completo(img):
+    # Caminho original de aplicar_filtros_frequencia (sem os espectros de magnitude)
+    dft_shift = np.fft.fftshift(cv2.dft(np.float32(img), flags=cv2.DFT_COMPLEX_OUTPUT))
+    resultados = {}
+    for nome, params in FILTROS.items():
+        mascara = criar_mascara(img.shape, **params)[:, :, np.newaxis]
+        f_ishift = np.fft.ifftshift(dft_shift * mascara)
+        resultados[nome] = cv2.idft(f_ishift, flags=cv2.DFT_SCALE | cv2.DFT_REAL_OUTPUT)
+    return resultados
+
+
+def _medir(funcao, repeticoes):
+    funcao()
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def verificar_equivalencia(img, backend):
+    referencia = filtrar_completo(img)
+    _, resultados = filtrar_frequencia_rfft(img, FILTROS, backend=backend, preencher=False)
+    for nome in FILTROS:
+        if not np.allclose(referencia[nome], resultados[nome], atol=1e-2):
+            raise AssertionError(f"Caminho rfft ({backend}) difere do caminho completo no filtro {nome}")
+
+
+def executar_benchmark(tamanhos, workers=None, repeticoes=5):
+    rng = np.random.default_rng(0)
+    for n in tamanhos:
+        # Tamanhos "ruins" para a FFT (ex.: 1000, 2161) mostram o efeito do preenchimento
+        img = rng.random((n, n), dtype=np.float32)
+        for backend in BACKENDS_FFT:
+            verificar_equivalencia(img[:min(n, 256), :min(n, 256)], backend)
+        print(f"\n{n}x{n} (preenchido para {tamanho_otimo_dft(img.shape)})")
+        print(f"  {'completo (cv2.dft + shift)':<34} {_medir(lambda: filtrar_completo(img), repeticoes):.4f} s")
+        for backend in BACKENDS_FFT:
+            for preencher in (False, True):
+                tempo = _medir(lambda: filtrar_frequencia_rfft(img, FILTROS, backend, workers, preencher), repeticoes)
+                rotulo = f"rfft {backend}{' + preenchimento' if preencher else ''}"
+                print(f"  {rotulo:<34} {tempo:.4f} s")
+        tempos = medir_backends_fft(tamanho_otimo_dft(img.shape), workers)
+        resumo = ", ".join(f"{nome}={tempo * 1e3:.1f} ms" for nome, tempo in tempos.items())
+        print(f"  ida e volta por backend: {resumo}")
+        print(f"  backend 'auto' escolhido: {escolher_backend_fft(tamanho_otimo_dft(img.shape), workers)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[512, 1000, 2160])
+    parser.add_argument("--workers", type=int, default=None, help="Threads para o backend scipy.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+    executar_benchmark(args.tamanhos, args.workers, args.repeticoes)
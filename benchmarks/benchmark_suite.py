@@ -0,0 +1,250 @@
+"""
+Suíte de benchmarks reprodutível dos três algoritmos (filtros de frequência, watershed
+por distância e por gradiente, crescimento de regiões) em imagens sintéticas de 256² a
+8192² e nas imagens de exemplo de cada módulo.
+
+Cada caso (algoritmo e imagem) roda em um processo novo (spawn), que executa o
+aplicar_* completo (decodificação do PNG, núcleo e salvamento; a figura só com
+--renderizar) com a instrumentação de utilitarios.instrumentacao ativa. São registrados,
+em JSON: latência total e por etapa (p50, p90, p99), vazão (imagens/s e megapixels/s) e
+pico de RSS do processo. Com --baseline, os resultados são comparados com um JSON salvo
+antes e as regressões (p50 ou pico de RSS acima da tolerância, com um aumento mínimo de
+--minimo-ms nos tempos) são listadas; o código de saída é 1 se houver alguma.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_suite --tamanhos 256,512,1024,2048 --saida base.json
+    python -m benchmarks.benchmark_suite --tamanhos 256,512,1024,2048 --baseline base.json
+"""
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+
+from benchmarks.benchmark_estagios_saida import RAIZ
+from utilitarios.imagens_sinteticas import imagem_discos
+
+ALGORITMOS = ("filtros_frequencia", "watershed_distancia", "watershed_gradiente", "crescimento_regioes")
+TAMANHOS_PADRAO = (256, 512, 1024, 2048)
+TAMANHOS_MAXIMOS = (256, 512, 1024, 2048, 4096, 8192)
+AMOSTRAS = {
+    "filtros_frequencia": ("filtros_frequencia_python", ("camera", "moon", "text")),
+    "watershed_distancia": ("segmentacao_watershed_python", ("coins", "chelsea")),
+    "watershed_gradiente": ("segmentacao_watershed_python", ("coins", "chelsea")),
+    "crescimento_regioes": ("crescimento_regioes_python", ("astronaut", "horse", "text")),
+}
+
+
+def imagem_sintetica(n, semente=0):
+    # Discos escuros com ruído sobre fundo claro, em RGB: tem objetos para o watershed,
+    # conteúdo de frequência para os filtros e regiões homogêneas para o crescimento
+    return imagem_discos(n, n, semente=semente)
+
+
+def _pico_rss_mib():
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KiB no Linux e em bytes no macOS
+    return pico / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+
+def _percentis(valores_s):
+    ms = 1000 * np.asarray(valores_s)
+    return {f"p{p}_ms": float(np.percentile(ms, p)) for p in (50, 90, 99)}
+
+
+def _aplicar(algoritmo, caminho, base_saida, renderizar):
+    if algoritmo == "filtros_frequencia":
+        from filtros_frequencia_python.filtros_frequencia import aplicar_filtros_frequencia
+        aplicar_filtros_frequencia(caminho, base_saida, renderizar=renderizar)
+    elif algoritmo.startswith("watershed"):
+        from segmentacao_watershed_python.segmentacao_watershed import aplicar_segmentacao_watershed
+        aplicar_segmentacao_watershed(caminho, base_saida, algoritmo == "watershed_distancia", renderizar=renderizar)
+    else:
+        from crescimento_regioes_python.crescimento_regioes import aplicar_crescimento_regioes
+        altura, largura = cv2.imread(caminho, cv2.IMREAD_UNCHANGED).shape[:2]
+        aplicar_crescimento_regioes(caminho, base_saida, (altura // 2, largura // 2), 20, renderizar=renderizar)
+
+
+def medir_caso(algoritmo, caminho, repeticoes, renderizar):
+    """
+    Executa um caso no processo atual (chamado no processo novo de cada caso).
+
+    Returns:
+        dict: Pixels, latências total e por etapa, vazão e RSS (base e pico) em MiB.
+    """
+    import warnings
+    from utilitarios import instrumentacao, io_imagens
+    warnings.simplefilter("ignore")
+    altura, largura = cv2.imread(caminho, cv2.IMREAD_UNCHANGED).shape[:2]
+    with tempfile.TemporaryDirectory() as pasta:
+        base_saida = os.path.join(pasta, "saida")
+        # Aquecimento (importações preguiçosas, caches de máscaras) fora das medições
+        _aplicar(algoritmo, caminho, base_saida, renderizar)
+        rss_base = _pico_rss_mib()
+        totais = []
+        etapas = {}
+        for _ in range(repeticoes):
+            # A decodificação do PNG faz parte da medição, mesmo com o cache de decodificação ativo
+            io_imagens.cache_decodificacao.limpar()
+            coletada = instrumentacao.ativar()
+            inicio = time.perf_counter()
+            _aplicar(algoritmo, caminho, base_saida, renderizar)
+            totais.append(time.perf_counter() - inicio)
+            instrumentacao.desativar()
+            duracoes = {}
+            for etapa in coletada.etapas:
+                duracoes[etapa.nome] = duracoes.get(etapa.nome, 0.0) + etapa.duracao
+            for nome, duracao in duracoes.items():
+                etapas.setdefault(nome, []).append(duracao)
+    mediana = float(np.median(totais))
+    return {"pixels": altura * largura, "repeticoes": repeticoes, "latencia": _percentis(totais),
+            "etapas": {nome: _percentis(valores) for nome, valores in sorted(etapas.items())},
+            "imagens_por_s": 1 / mediana, "megapixels_por_s": altura * largura / 1e6 / mediana,
+            "rss_base_mib": rss_base, "pico_rss_mib": _pico_rss_mib()}
+
+
+def _executar_isolado(algoritmo, caminho, repeticoes, renderizar):
+    # Um processo novo por caso: o pico de RSS é só deste caso e nada fica em cache
+    contexto = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+        try:
+            return executor.submit(medir_caso, algoritmo, caminho, repeticoes, renderizar).result()
+        except concurrent.futures.process.BrokenProcessPool:
+            return {"erro": "processo encerrado (memória insuficiente?)"}
+        except Exception as excecao:
+            return {"erro": repr(excecao)}
+
+
+def _ambiente():
+    import scipy
+    import skimage
+    return {"python": platform.python_version(), "plataforma": platform.platform(), "processador": platform.processor(),
+            "nucleos": os.cpu_count(), "numpy": np.__version__, "scipy": scipy.__version__, "opencv": cv2.__version__,
+            "skimage": skimage.__version__}
+
+
+def preparar_imagens(pasta, tamanhos, usar_amostras):
+    """
+    Grava as imagens sintéticas em PNG e lista as de exemplo.
+
+    Returns:
+        dict: algoritmo -> lista de (nome da imagem, caminho).
+    """
+    sinteticas = []
+    for n in tamanhos:
+        caminho = os.path.join(pasta, f"sintetica_{n}.png")
+        cv2.imwrite(caminho, cv2.cvtColor(imagem_sintetica(n), cv2.COLOR_RGB2BGR))
+        sinteticas.append((f"sintetica_{n}", caminho))
+    imagens = {}
+    for algoritmo in ALGORITMOS:
+        imagens[algoritmo] = list(sinteticas)
+        if usar_amostras:
+            modulo, nomes = AMOSTRAS[algoritmo]
+            imagens[algoritmo] += [(nome, os.path.join(RAIZ, modulo, "imagens_exemplo", f"{nome}_original.png"))
+                                   for nome in nomes]
+    return imagens
+
+
+def executar_suite(tamanhos, algoritmos=ALGORITMOS, repeticoes=5, usar_amostras=True, renderizar=False):
+    """
+    Returns:
+        dict: Ambiente, configuração e resultados por caso ("algoritmo/imagem").
+    """
+    casos = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        imagens = preparar_imagens(pasta, tamanhos, usar_amostras)
+        for algoritmo in algoritmos:
+            for nome, caminho in imagens[algoritmo]:
+                caso = f"{algoritmo}/{nome}"
+                casos[caso] = resultado = _executar_isolado(algoritmo, caminho, repeticoes, renderizar)
+                if "erro" in resultado:
+                    print(f"{caso:<44} ERRO: {resultado['erro']}")
+                else:
+                    latencia = resultado["latencia"]
+                    print(f"{caso:<44} p50 {latencia['p50_ms']:9.1f} ms  p99 {latencia['p99_ms']:9.1f} ms  "
+                          f"{resultado['megapixels_por_s']:7.2f} MP/s  pico RSS {resultado['pico_rss_mib']:8.1f} MiB")
+    return {"ambiente": _ambiente(), "configuracao": {"tamanhos": list(tamanhos), "repeticoes": repeticoes,
+                                                      "renderizar": renderizar}, "casos": casos}
+
+
+def comparar_com_baseline(resultados, baseline, tolerancia_tempo=0.10, tolerancia_memoria=0.10, minimo_ms=1.0):
+    """
+    Compara a latência p50 (total e por etapa) e o pico de RSS com os de um baseline.
+
+    Um tempo só é regressão se aumentar mais que tolerancia_tempo e também mais que
+    minimo_ms em valor absoluto; etapas com p50 abaixo de minimo_ms no baseline não são
+    comparadas, pois nelas o ruído de medição passa facilmente da tolerância relativa.
+
+    Returns:
+        list: Descrições das regressões (vazia se nenhuma).
+    """
+    regressoes = []
+    for caso, atual in resultados["casos"].items():
+        anterior = baseline["casos"].get(caso)
+        if anterior is None or "erro" in anterior:
+            continue
+        if "erro" in atual:
+            regressoes.append(f"{caso}: falhou ({atual['erro']})")
+            continue
+        comparacoes = [("latência p50", anterior["latencia"]["p50_ms"], atual["latencia"]["p50_ms"], tolerancia_tempo,
+                        minimo_ms, "ms"),
+                       ("pico RSS", anterior["pico_rss_mib"], atual["pico_rss_mib"], tolerancia_memoria, 0, "MiB")]
+        for etapa, percentis in atual["etapas"].items():
+            if etapa in anterior["etapas"] and anterior["etapas"][etapa]["p50_ms"] >= minimo_ms:
+                comparacoes.append((f"etapa {etapa} p50", anterior["etapas"][etapa]["p50_ms"], percentis["p50_ms"],
+                                    tolerancia_tempo, minimo_ms, "ms"))
+        for metrica, valor_anterior, valor_atual, tolerancia, minimo, unidade in comparacoes:
+            if valor_atual - valor_anterior > max(valor_anterior * tolerancia, minimo):
+                regressoes.append(f"{caso}: {metrica} {valor_anterior:.2f} -> {valor_atual:.2f} {unidade} "
+                                  f"(+{100 * (valor_atual / max(valor_anterior, 1e-9) - 1):.0f}%)")
+    return regressoes
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", default=",".join(map(str, TAMANHOS_PADRAO)),
+                        help=f"Lados das imagens sintéticas (até {TAMANHOS_MAXIMOS[-1]}).")
+    parser.add_argument("--algoritmos", default=",".join(ALGORITMOS))
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--sem-amostras", action="store_true", help="Não inclui as imagens de exemplo dos módulos.")
+    parser.add_argument("--renderizar", action="store_true", help="Inclui a figura de comparação (matplotlib).")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON com os resultados (novo baseline).")
+    parser.add_argument("--baseline", default=None, help="JSON de uma execução anterior para comparar.")
+    parser.add_argument("--tolerancia-tempo", type=float, default=0.10)
+    parser.add_argument("--tolerancia-memoria", type=float, default=0.10)
+    parser.add_argument("--minimo-ms", type=float, default=1.0,
+                        help="Aumento absoluto mínimo de um tempo para contar como regressão; etapas mais "
+                             "rápidas que isso no baseline não são comparadas.")
+    args = parser.parse_args(argumentos)
+
+    tamanhos = [int(n) for n in args.tamanhos.split(",")]
+    algoritmos = args.algoritmos.split(",")
+    desconhecidos = set(algoritmos) - set(ALGORITMOS)
+    if desconhecidos:
+        parser.error(f"Algoritmos desconhecidos: {sorted(desconhecidos)}")
+    resultados = executar_suite(tamanhos, algoritmos, args.repeticoes, not args.sem_amostras, args.renderizar)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultados, arquivo, indent=2)
+        print(f"Resultados salvos em {args.saida}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as arquivo:
+            baseline = json.load(arquivo)
+        regressoes = comparar_com_baseline(resultados, baseline, args.tolerancia_tempo, args.tolerancia_memoria,
+                                           args.minimo_ms)
+        for regressao in regressoes:
+            print(f"REGRESSÃO {regressao}")
+        print(f"{len(regressoes)} regressões em relação a {args.baseline}")
+        return 1 if regressoes else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
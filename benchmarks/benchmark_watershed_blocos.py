@@ -0,0 +1,60 @@
+"""
+Mede tempo e pico de memória (tracemalloc) do watershed em blocos, com a imagem e os
+rótulos mapeados em disco, e o da imagem inteira para comparação. A equivalência dos
+rótulos com calcular_segmentacao_watershed é verificada em tests/test_watershed_blocos.py.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.benchmark_watershed_blocos --tamanhos 2048 4096 --workers 1 4
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+from segmentacao_watershed_python.segmentacao_watershed import calcular_segmentacao_watershed
+from segmentacao_watershed_python.watershed_blocos import segmentar_watershed_em_blocos
+from utilitarios.imagens_sinteticas import imagem_discos
+
+
+def executar_benchmark(tamanhos, lista_workers, tamanho_bloco, maximo_inteira=2048):
+    with tempfile.TemporaryDirectory() as pasta:
+        for n in tamanhos:
+            caminho_imagem = os.path.join(pasta, "imagem.npy")
+            np.save(caminho_imagem, imagem_discos(n, n))
+            imagem = np.load(caminho_imagem, mmap_mode="r")
+            print(f"\n{n}x{n} (imagem {imagem.nbytes / 2 ** 20:.1f} MiB)")
+            for usar_distancia in (True, False):
+                metodo = "distância" if usar_distancia else "gradiente"
+                # O gradiente na imagem inteira usa ~400 bytes por pixel
+                if n <= maximo_inteira:
+                    tracemalloc.start()
+                    inicio = time.perf_counter()
+                    calcular_segmentacao_watershed(np.asarray(imagem), usar_distancia)
+                    tempo = time.perf_counter() - inicio
+                    pico = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    print(f"  {metodo:<9} imagem inteira: {tempo:8.3f} s, pico {pico / 2 ** 20:8.1f} MiB")
+                for workers in lista_workers:
+                    tracemalloc.start()
+                    inicio = time.perf_counter()
+                    rotulos = segmentar_watershed_em_blocos(imagem, usar_distancia, tamanho_bloco, workers=workers,
+                                                            caminho_saida=os.path.join(pasta, "rotulos.npy"))
+                    tempo = time.perf_counter() - inicio
+                    pico = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    del rotulos
+                    print(f"  {metodo:<9} blocos, {workers:2d} threads: {tempo:8.3f} s, pico {pico / 2 ** 20:8.1f} MiB")
+            del imagem
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[2048, 4096])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--tamanho-bloco", type=int, default=512)
+    parser.add_argument("--maximo-inteira", type=int, default=2048,
+                        help="Maior lado em que a imagem inteira também é medida, para comparação.")
+    args = parser.parse_args()
+    executar_benchmark(args.tamanhos, sorted(set(args.workers)), args.tamanho_bloco, args.maximo_inteira)
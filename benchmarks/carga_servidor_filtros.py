@@ -0,0 +1,194 @@
+"""
+Teste de carga do serviço de filtros de frequência (filtros_frequencia_python.servidor_filtros).
+
+Sobe uma instância local em um processo separado (ou usa uma já em execução, com
+--endereco), abre várias conexões keep-alive concorrentes e envia as requisições, medindo latência (p50, p90, p99), requisições por segundo e o
+tamanho médio dos lotes de FFT. A primeira resposta é comparada com
+calcular_filtros_frequencia(modo="rfft") aplicado localmente à mesma imagem.
+
+Com --lotes 1,16 a mesma carga é repetida com um servidor por tamanho máximo de lote,
+para comparar o serviço com e sem micro-batching.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.carga_servidor_filtros --lado 512 --conexoes 16 --requisicoes 400 --lotes 1,16
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+
+from benchmarks.benchmark_estagios_saida import RAIZ
+
+IMAGEM = os.path.join(RAIZ, "filtros_frequencia_python", "imagens_exemplo", "camera_original.png")
+
+
+async def _abrir(host, porta, caminho_socket):
+    if caminho_socket:
+        return await asyncio.open_unix_connection(caminho_socket)
+    return await asyncio.open_connection(host, porta)
+
+
+async def _requisitar(leitor, escritor, alvo, corpo):
+    escritor.write(f"POST {alvo} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(corpo)}\r\n\r\n".encode("latin-1")
+                   + corpo)
+    await escritor.drain()
+    status = int((await leitor.readline()).split()[1])
+    cabecalhos = {}
+    while True:
+        linha = await leitor.readline()
+        if linha in (b"\r\n", b""):
+            break
+        nome, _, valor = linha.decode("latin-1").partition(":")
+        cabecalhos[nome.strip().lower()] = valor.strip()
+    dados = await leitor.readexactly(int(cabecalhos.get("content-length", 0)))
+    return status, cabecalhos, dados
+
+
+async def executar_carga(host, porta, caminho_socket, corpo, alvo, conexoes, requisicoes):
+    """
+    Envia requisicoes requisições divididas entre conexoes conexões keep-alive.
+
+    Returns:
+        dict: Latências (s), tamanhos de lote, erros, duração total e a primeira resposta.
+    """
+    latencias, lotes, erros, respostas = [], [], [], []
+    restantes = [requisicoes]
+
+    async def cliente():
+        leitor, escritor = await _abrir(host, porta, caminho_socket)
+        try:
+            while restantes[0] > 0:
+                restantes[0] -= 1
+                inicio = time.perf_counter()
+                status, cabecalhos, dados = await _requisitar(leitor, escritor, alvo, corpo)
+                latencias.append(time.perf_counter() - inicio)
+                if status != 200:
+                    erros.append(dados.decode("utf-8", "replace"))
+                    continue
+                lotes.append(int(cabecalhos.get("x-tamanho-lote", 1)))
+                if not respostas:
+                    respostas.append(dados)
+        finally:
+            escritor.close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente() for _ in range(conexoes)))
+    return {"latencias": latencias, "lotes": lotes, "erros": erros, "duracao": time.perf_counter() - inicio,
+            "primeira": respostas[0] if respostas else None}
+
+
+def _porta_livre():
+    with socket.socket() as provisorio:
+        provisorio.bind(("127.0.0.1", 0))
+        return provisorio.getsockname()[1]
+
+
+def _iniciar_servidor(porta, caminho_socket, lote_maximo, janela_ms, forma, workers):
+    comando = [sys.executable, "-m", "filtros_frequencia_python.servidor_filtros", "--lote-maximo", str(lote_maximo),
+               "--janela-ms", str(janela_ms), "--aquecer", "x".join(map(str, forma))]
+    comando += ["--socket", caminho_socket] if caminho_socket else ["--porta", str(porta)]
+    if workers:
+        comando += ["--workers", str(workers)]
+    processo = subprocess.Popen(comando, cwd=RAIZ, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # Espera o servidor aceitar conexões (o aquecimento vem antes)
+    limite = time.perf_counter() + 60
+    while time.perf_counter() < limite:
+        try:
+            if caminho_socket:
+                with socket.socket(socket.AF_UNIX) as teste:
+                    teste.connect(caminho_socket)
+            else:
+                socket.create_connection(("127.0.0.1", porta), timeout=1).close()
+            return processo
+        except OSError:
+            if processo.poll() is not None:
+                break
+            time.sleep(0.1)
+    processo.kill()
+    raise RuntimeError("O servidor de filtros não iniciou.")
+
+
+def _referencia(imagem, banda, D0):
+    from filtros_frequencia_python.filtros_frequencia import calcular_filtros_frequencia
+    resultado = calcular_filtros_frequencia(imagem, "rfft", "scipy", D0_passa_baixa=D0, D0_passa_alta=D0)
+    return resultado.passa_baixa if banda == "passa_baixa" else resultado.passa_alta
+
+
+def _relatar(rotulo, resultado):
+    ms = 1000 * np.asarray(resultado["latencias"])
+    print(f"{rotulo:<14} {len(ms) / resultado['duracao']:9.1f} req/s  p50 {np.percentile(ms, 50):8.2f} ms  "
+          f"p90 {np.percentile(ms, 90):8.2f} ms  p99 {np.percentile(ms, 99):8.2f} ms  "
+          f"lote médio {np.mean(resultado['lotes']) if resultado['lotes'] else 0:5.2f}  erros {len(resultado['erros'])}")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lado", type=int, default=512, help="Lado da imagem enviada (a camera redimensionada).")
+    parser.add_argument("--conexoes", type=int, default=16)
+    parser.add_argument("--requisicoes", type=int, default=400)
+    parser.add_argument("--entrada", choices=("png", "raw"), default="png",
+                        help="Corpo das requisições: arquivo PNG ou pixels crus (com forma na URL).")
+    parser.add_argument("--banda", choices=("passa_baixa", "passa_alta"), default="passa_baixa")
+    parser.add_argument("--D0", type=float, default=30.0)
+    parser.add_argument("--lotes", default="1,16", help="Tamanhos máximos de lote testados, um servidor por valor.")
+    parser.add_argument("--janela-ms", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=None, help="Threads de cálculo do servidor.")
+    parser.add_argument("--socket", action="store_true", help="Usa um socket Unix em vez de TCP.")
+    parser.add_argument("--endereco", default=None,
+                        help="host:porta (ou caminho do socket, com --socket) de um servidor já em execução.")
+    args = parser.parse_args(argumentos)
+
+    imagem = cv2.resize(cv2.imread(IMAGEM, cv2.IMREAD_GRAYSCALE), (args.lado, args.lado),
+                        interpolation=cv2.INTER_AREA)
+    forma = imagem.shape
+    if args.entrada == "png":
+        corpo, alvo_forma = cv2.imencode(".png", imagem)[1].tobytes(), ""
+    else:
+        corpo, alvo_forma = imagem.tobytes(), f"&forma={forma[0]}x{forma[1]}"
+    alvo = f"/filtrar?tipo=gaussiano&banda={args.banda}&D0={args.D0}&saida=raw{alvo_forma}"
+    referencia = _referencia(imagem, args.banda, args.D0)
+    print(f"Imagem {forma[0]}x{forma[1]} ({args.entrada}, {len(corpo) / 1024:.0f} KiB), {args.conexoes} conexões, "
+          f"{args.requisicoes} requisições")
+
+    if args.endereco:
+        if args.socket:
+            execucoes = [("servidor", None, None, args.endereco, None)]
+        else:
+            host, _, porta = args.endereco.rpartition(":")
+            execucoes = [("servidor", host, int(porta), None, None)]
+    else:
+        execucoes = [(f"lote máx. {lote}", "127.0.0.1", None, None, int(lote)) for lote in args.lotes.split(",")]
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for rotulo, host, porta, caminho_socket, lote_maximo in execucoes:
+            processo = None
+            if lote_maximo is not None:
+                caminho_socket = os.path.join(pasta, f"filtros_{lote_maximo}.sock") if args.socket else None
+                porta = None if args.socket else _porta_livre()
+                processo = _iniciar_servidor(porta, caminho_socket, lote_maximo, args.janela_ms, forma, args.workers)
+            try:
+                # Aquecimento das conexões e do servidor fora da medição
+                asyncio.run(executar_carga(host, porta, caminho_socket, corpo, alvo, args.conexoes, args.conexoes))
+                resultado = asyncio.run(executar_carga(host, porta, caminho_socket, corpo, alvo, args.conexoes,
+                                                       args.requisicoes))
+            finally:
+                if processo is not None:
+                    processo.terminate()
+                    processo.wait()
+            _relatar(rotulo, resultado)
+            if resultado["primeira"] is not None:
+                recebida = np.frombuffer(resultado["primeira"], np.uint8).reshape(forma)
+                diferenca = np.abs(recebida.astype(int) - referencia).max()
+                print(f"{'':<14} diferença máxima para calcular_filtros_frequencia: {diferenca}")
+            for erro in resultado["erros"][:3]:
+                print(f"{'':<14} erro: {erro}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import collections
+import math
+import os
+import cv2
+import numpy as np
+from skimage import img_as_ubyte, color
+
+# Bytes por pixel de um bloco em processamento: fonte e máscara lidas com halo, máscara
+# de similaridade, região, rótulos int32 de cv2.connectedComponents e temporários
+BYTES_POR_PIXEL_BLOCO = 16
+ORCAMENTO_MEMORIA_PADRAO = 64 * 1024 * 1024
+
+# Vizinhos de um bloco (deslocamento em blocos) e a borda do bloco que os alcança
+_VIZINHOS_BLOCO = {
+    (-1, 0): (0, slice(None)), (1, 0): (-1, slice(None)),
+    (0, -1): (slice(None), 0), (0, 1): (slice(None), -1),
+    (-1, -1): (0, 0), (-1, 1): (0, -1), (1, -1): (-1, 0), (1, 1): (-1, -1),
+}
+
+
+def abrir_imagem_mapeada(caminho):
+    """
+    Abre uma imagem grande sem decodificá-la inteira na memória.
+
+    Args:
+        caminho (str): Arquivo .npy (np.load com mmap_mode) ou TIFF não comprimido
+                       (tifffile.memmap).
+
+    Returns:
+        numpy.ndarray: Array mapeado em memória (somente leitura).
+    """
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == ".npy":
+        return np.load(caminho, mmap_mode="r")
+    if extensao in (".tif", ".tiff"):
+        import tifffile
+        return tifffile.memmap(caminho, mode="r")
+    raise ValueError(f"Formato não suportado para leitura mapeada: {extensao}. Use .npy ou .tif/.tiff.")
+
+
+def tamanho_bloco_para_orcamento(orcamento_memoria):
+    """Maior lado de bloco quadrado (com halo) que cabe no orçamento de memória em bytes."""
+    return max(int(math.isqrt(int(orcamento_memoria) // BYTES_POR_PIXEL_BLOCO)) - 2, 16)
+
+
+def _ler_cinza(img, l0, l1, c0, c1):
+    # Converte só a janela lida; a conversão é por pixel, então bate com a da imagem inteira
+    janela = np.asarray(img[l0:l1, c0:c1])
+    if janela.ndim == 3:
+        janela = color.rgb2gray(janela[..., :3])
+    return img_as_ubyte(janela) if janela.dtype != np.uint8 else janela
+
+
+def crescer_regiao_em_blocos(img, semente_coords, limiar_similaridade=10, caminho_saida=None, tamanho_bloco=None,
+                             orcamento_memoria=ORCAMENTO_MEMORIA_PADRAO):
+    """
+    Cresce uma região (critério da semente, conectividade 8) em imagens maiores que a
+    memória, processando-a em blocos.
+
+    Cada bloco é lido com um halo de 1 pixel da imagem e da máscara de saída; a região
+    cresce dentro do bloco a partir dos pixels já marcados (semente ou halo vindo de
+    blocos vizinhos) e os vizinhos cuja borda recebeu pixels novos voltam para a lista
+    de trabalho. O processo termina quando nenhum bloco muda, e o resultado é o mesmo
+    de crescer_regiao na imagem inteira.
+
+    Args:
+        img (numpy.ndarray | str): Imagem (linhas, colunas) ou (linhas, colunas, canais),
+                                   de preferência mapeada em memória, ou o caminho de um
+                                   .npy/.tif (ver abrir_imagem_mapeada).
+        semente_coords (tuple): Coordenadas (linha, coluna) do pixel semente.
+        limiar_similaridade (float): Diferença máxima de intensidade para a semente.
+        caminho_saida (str): Se informado, a máscara é escrita bloco a bloco em um .npy
+                             mapeado em memória (np.lib.format.open_memmap).
+        tamanho_bloco (int): Lado dos blocos; se None, é derivado de orcamento_memoria.
+        orcamento_memoria (int): Memória aproximada, em bytes, por bloco em processamento.
+
+    Returns:
+        numpy.ndarray: Máscara uint8 (0 ou 255) da região, mapeada em memória se
+                       caminho_saida foi informado.
+    """
+    if isinstance(img, str):
+        img = abrir_imagem_mapeada(img)
+    altura, largura = img.shape[:2]
+    semente = (int(semente_coords[0]), int(semente_coords[1]))
+    if not (0 <= semente[0] < altura and 0 <= semente[1] < largura):
+        raise ValueError(f"Coordenadas da semente {semente_coords} fora dos limites da imagem ({altura}x{largura}).")
+    if tamanho_bloco is None:
+        tamanho_bloco = tamanho_bloco_para_orcamento(orcamento_memoria)
+
+    if caminho_saida is not None:
+        mascara = np.lib.format.open_memmap(caminho_saida, mode="w+", dtype=np.uint8, shape=(altura, largura))
+    else:
+        mascara = np.zeros((altura, largura), np.uint8)
+    valor_semente = _ler_cinza(img, semente[0], semente[0] + 1, semente[1], semente[1] + 1)[0, 0]
+
+    blocos_linhas = -(-altura // tamanho_bloco)
+    blocos_colunas = -(-largura // tamanho_bloco)
+    bloco_inicial = (semente[0] // tamanho_bloco, semente[1] // tamanho_bloco)
+    pendentes = collections.deque([bloco_inicial])
+    na_fila = {bloco_inicial}
+    while pendentes:
+        bloco = pendentes.popleft()
+        na_fila.discard(bloco)
+        # Núcleo do bloco e janela com halo de 1 pixel, recortada nas bordas da imagem
+        n0, n1 = bloco[0] * tamanho_bloco, min((bloco[0] + 1) * tamanho_bloco, altura)
+        m0, m1 = bloco[1] * tamanho_bloco, min((bloco[1] + 1) * tamanho_bloco, largura)
+        l0, l1, c0, c1 = max(n0 - 1, 0), min(n1 + 1, altura), max(m0 - 1, 0), min(m1 + 1, largura)
+        nucleo = (slice(n0 - l0, n1 - l0), slice(m0 - c0, m1 - c0))
+
+        marcados = np.asarray(mascara[l0:l1, c0:c1]) > 0
+        anteriores = marcados[nucleo].copy()
+        if bloco == bloco_inicial:
+            # A semente entra como pixel novo, para que sua vizinhança seja propagada
+            marcados[semente[0] - l0, semente[1] - c0] = True
+        # Dentro do núcleo valem os pixels similares; no halo, só os já marcados pelos vizinhos
+        permitidos = marcados.copy()
+        janela = _ler_cinza(img, n0, n1, m0, m1)
+        similar = cv2.absdiff(janela, np.full_like(janela, valor_semente)) <= limiar_similaridade
+        permitidos[nucleo] = similar | marcados[nucleo]
+        num_rotulos, rotulos = cv2.connectedComponents(permitidos.view(np.uint8), connectivity=8, ltype=cv2.CV_32S)
+        # Tabela rótulo -> alcançado, indexada direto pelos rótulos (sem ordenar o bloco)
+        alcancados = np.zeros(num_rotulos, bool)
+        alcancados[rotulos[marcados]] = True
+        alcancados[0] = False
+        regiao = alcancados[rotulos[nucleo]]
+        novos = regiao & ~anteriores
+        if not novos.any():
+            continue
+        mascara[n0:n1, m0:m1][novos] = 255
+
+        for (dl, dc), borda in _VIZINHOS_BLOCO.items():
+            vizinho = (bloco[0] + dl, bloco[1] + dc)
+            if (0 <= vizinho[0] < blocos_linhas and 0 <= vizinho[1] < blocos_colunas
+                    and vizinho not in na_fila and novos[borda].any()):
+                pendentes.append(vizinho)
+                na_fila.add(vizinho)
+
+    if caminho_saida is not None:
+        mascara.flush()
+    return mascara
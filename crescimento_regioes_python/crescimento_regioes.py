@@ -1,111 +1,156 @@
+import collections
+import logging
 import cv2
 import numpy as np
-from matplotlib import pyplot as plt
 import os
-import skimage.io
 from skimage import img_as_ubyte, color
 
-class Stack():
-    def __init__(self):
-        self.item = []
-        self.obj = []
+from utilitarios.cache_resultados import executar_etapa, hash_arquivo, hash_array
+from utilitarios.instrumentacao import configurar_log, contar, etapa, instrumentar
+from utilitarios.io_imagens import carregar_imagem, gravar
+from .motor_crescimento import crescer_regiao, crescer_regioes_multiplas
 
-    def push(self, item, obj):
-        self.item.append(item)
-        self.obj.append(obj)
+logger = logging.getLogger(__name__)
 
-    def pop(self):
-        if not self.isEmpty():
-            return self.item.pop(), self.obj.pop()
+# Imagens de exemplo, sementes e limiar usados pelo __main__ (e pelos testes)
+IMAGENS_E_SEMENTES_EXEMPLO = {
+    "astronaut_original.png": [(200, 200), (100, 100)],  # Exemplo: semente no rosto, semente no capacete
+    "horse_original.png": [(150, 200), (50, 50)],        # Exemplo: semente no corpo do cavalo, semente no fundo
+    "text_original.png": [(80, 100), (20, 20)],          # Exemplo: semente em uma letra, semente no fundo
+}
+LIMIAR_EXEMPLO = 20  # Limiar de similaridade dos exemplos
 
-    def isEmpty(self):
-        return len(self.item) == 0
+ResultadoCrescimento = collections.namedtuple("ResultadoCrescimento", [
+    "imagem_original", "img_gray_ubyte", "semente", "limiar_similaridade", "regiao", "img_segmentada",
+])
+ResultadoCrescimentoMultiplo = collections.namedtuple("ResultadoCrescimentoMultiplo", [
+    "imagem_original", "img_gray_ubyte", "sementes", "limiares", "rotulos",
+])
 
-    def length(self):
-        return len(self.item)
 
-def aplicar_crescimento_regioes(caminho_imagem_entrada, caminho_imagem_saida_base, semente_coords, limiar_similaridade=10):
+@instrumentar("cinza", "crescimento_regioes")
+def _para_cinza_ubyte(imagem):
+    if len(imagem.shape) == 3:
+        img_gray = color.rgb2gray(imagem)
+    else:
+        img_gray = imagem
+    return img_as_ubyte(img_gray)
+
+
+def _marcar_sementes(imagem, sementes):
+    img_com_sementes = imagem.copy()
+    if len(img_com_sementes.shape) == 2: # Se for cinza, converte para color para marcar a semente
+        img_com_sementes = color.gray2rgb(img_as_ubyte(img_com_sementes))
+    for semente_linha, semente_coluna in sementes:
+        cv2.circle(img_com_sementes, (semente_coluna, semente_linha), radius=5, color=(255,0,0), thickness=-1) # Vermelho para semente
+    return img_com_sementes
+
+
+def _cinza_em_cache(imagem, cache, chave_imagem):
+    # Mesma etapa "cinza_ubyte" do watershed: as duas reaproveitam a conversão da mesma imagem
+    if cache is not None and chave_imagem is None:
+        chave_imagem = hash_array(imagem)
+    return executar_etapa(cache, "cinza_ubyte", [chave_imagem], {}, lambda: {"img_ubyte": _para_cinza_ubyte(imagem)})
+
+
+def calcular_crescimento_regioes(imagem, semente_coords, limiar_similaridade=10, metodo=None, criterio="semente", k=2.0, ordem="largura",
+                                 cache=None, chave_imagem=None):
     """
-    Aplica o algoritmo de crescimento de regiões a uma imagem a partir de uma semente.
+    Aplica o crescimento de regiões a uma imagem em memória, sem ler nem escrever arquivos
+    e sem gerar figuras.
 
     Args:
-        caminho_imagem_entrada (str): Caminho para a imagem de entrada.
-        caminho_imagem_saida_base (str): Caminho base para salvar as imagens de saída (sem extensão).
+        imagem (numpy.ndarray): Imagem (linhas, colunas) ou (linhas, colunas, canais).
         semente_coords (tuple): Coordenadas (linha, coluna) do pixel semente.
         limiar_similaridade (int): Diferença máxima de intensidade para um pixel ser incluído na região.
-    """
-    print(f"[DEBUG] Iniciando aplicar_crescimento_regioes para: {caminho_imagem_entrada} com semente {semente_coords}")
-    diretorio_saida = os.path.dirname(caminho_imagem_saida_base)
-    if not os.path.exists(diretorio_saida):
-        os.makedirs(diretorio_saida)
-        print(f"[DEBUG] Diretório de saída criado: {diretorio_saida}")
+        metodo, criterio, k, ordem: Ver motor_crescimento.crescer_regiao.
+        cache (CacheResultados): Cache das etapas (conversão para cinza e região), opcional.
+        chave_imagem (str): Chave da imagem no cache; se None, é o hash do conteúdo da imagem.
 
-    img_original_color = skimage.io.imread(caminho_imagem_entrada)
-    if img_original_color is None:
-        print(f"[ERRO] Erro ao carregar a imagem: {caminho_imagem_entrada}")
-        return
-    print(f"[DEBUG] Imagem carregada: {caminho_imagem_entrada}, shape: {img_original_color.shape}")
+    Returns:
+        ResultadoCrescimento: Imagem em cinza, máscara booleana da região e imagem segmentada
+                              (uint8, 255 na região).
+    """
+    chave_cinza, cinza = _cinza_em_cache(imagem, cache, chave_imagem)
+    img_gray_ubyte = cinza["img_ubyte"]
 
-    if len(img_original_color.shape) == 3:
-        img_gray = color.rgb2gray(img_original_color)
-    else:
-        img_gray = img_original_color
-    
-    img_gray_ubyte = img_as_ubyte(img_gray)
-    print(f"[DEBUG] Imagem convertida para escala de cinza ubyte, shape: {img_gray_ubyte.shape}")
+    def etapa_regiao():
+        # Vizinhos de 8 conexões, comparando com o valor da semente original (critério padrão),
+        # com a média da região atual ou com o pixel vizinho que o adicionou
+        with etapa("segmentacao", "crescimento_regioes", criterio=criterio):
+            return {"regiao": crescer_regiao(img_gray_ubyte, semente_coords, limiar_similaridade, metodo, criterio, k, ordem)}
 
-    altura, largura = img_gray_ubyte.shape
+    # O motor (metodo) não entra na chave: todos produzem a mesma região
+    parametros = {"semente": [int(v) for v in semente_coords], "limiar": limiar_similaridade, "criterio": criterio,
+                  "k": k, "ordem": ordem}
+    _, regiao = executar_etapa(cache, "crescimento.regiao", [chave_cinza], parametros, etapa_regiao)
+    regiao = regiao["regiao"]
     img_segmentada = np.zeros_like(img_gray_ubyte)
-    visitados = np.zeros_like(img_gray_ubyte, dtype=bool)
+    img_segmentada[regiao] = 255 # Marca a região com branco
+    return ResultadoCrescimento(imagem, img_gray_ubyte, tuple(semente_coords), limiar_similaridade, regiao, img_segmentada)
 
-    pilha = Stack()
-    
-    semente_linha, semente_coluna = semente_coords
-    if not (0 <= semente_linha < altura and 0 <= semente_coluna < largura):
-        print(f"[ERRO] Coordenadas da semente {semente_coords} fora dos limites da imagem ({altura}x{largura}).")
-        return
 
-    valor_semente = img_gray_ubyte[semente_linha, semente_coluna]
-    pilha.push((semente_linha, semente_coluna), valor_semente) # O segundo argumento 'obj' não é usado como no artigo original, mas mantido para estrutura da Stack
-    visitados[semente_linha, semente_coluna] = True
-    img_segmentada[semente_linha, semente_coluna] = 255 # Marca a região com branco
-
-    print(f"[DEBUG] Semente inicial: ({semente_linha}, {semente_coluna}), Valor: {valor_semente}")
-
-    while not pilha.isEmpty():
-        (x, y), _ = pilha.pop()
-        
-        # Vizinhos de 8 conexões
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                if dx == 0 and dy == 0:
-                    continue
-
-                nx, ny = x + dx, y + dy
-
-                if 0 <= nx < altura and 0 <= ny < largura and not visitados[nx, ny]:
-                    visitados[nx, ny] = True
-                    valor_vizinho = img_gray_ubyte[nx, ny]
-                    if abs(int(valor_vizinho) - int(valor_semente)) <= limiar_similaridade: # Compara com o valor da semente original
-                    # Ou poderia ser comparado com a média da região atual, ou com o pixel vizinho que o adicionou
-                        img_segmentada[nx, ny] = 255
-                        pilha.push((nx, ny), valor_vizinho)
-    
-    print("[DEBUG] Processo de crescimento de região concluído.")
-
-    # Salvar imagens
-    img_original_com_semente = img_original_color.copy()
-    if len(img_original_com_semente.shape) == 2: # Se for cinza, converte para color para marcar a semente
-        img_original_com_semente = color.gray2rgb(img_as_ubyte(img_original_com_semente))
-    
-    cv2.circle(img_original_com_semente, (semente_coluna, semente_linha), radius=5, color=(255,0,0), thickness=-1) # Vermelho para semente
-
-    skimage.io.imsave(f"{caminho_imagem_saida_base}_original.png", img_as_ubyte(img_original_color))
-    skimage.io.imsave(f"{caminho_imagem_saida_base}_original_com_semente.png", img_as_ubyte(img_original_com_semente))
-    skimage.io.imsave(f"{caminho_imagem_saida_base}_segmentada.png", img_segmentada)
-    print(f"[DEBUG] Imagens de crescimento de regiões salvas em {diretorio_saida}")
-
-    # Plotar e salvar figura combinada
+def calcular_crescimento_regioes_multiplas(imagem, sementes, limiares=10, cache=None, chave_imagem=None):
+    """
+    Cresce as regiões de várias sementes em uma única passada sobre uma imagem em memória.
+
+    Args:
+        imagem (numpy.ndarray): Imagem (linhas, colunas) ou (linhas, colunas, canais).
+        sementes (list): Lista de coordenadas (linha, coluna) dos pixels semente.
+        limiares (int ou list): Limiar de similaridade único ou um por semente.
+        cache (CacheResultados): Cache das etapas (conversão para cinza e rótulos), opcional.
+        chave_imagem (str): Chave da imagem no cache; se None, é o hash do conteúdo da imagem.
+
+    Returns:
+        ResultadoCrescimentoMultiplo: Imagem em cinza e rótulos int32 (0 = fundo, i + 1 = semente i).
+    """
+    chave_cinza, cinza = _cinza_em_cache(imagem, cache, chave_imagem)
+    img_gray_ubyte = cinza["img_ubyte"]
+    parametros = {"sementes": [[int(v) for v in semente] for semente in sementes],
+                  "limiares": np.asarray(limiares).tolist()}
+
+    def etapa_rotulos():
+        with etapa("segmentacao", "crescimento_regioes", sementes=len(sementes)):
+            return {"rotulos": crescer_regioes_multiplas(img_gray_ubyte, sementes, limiares)}
+
+    _, rotulos = executar_etapa(cache, "crescimento.rotulos", [chave_cinza], parametros, etapa_rotulos)
+    return ResultadoCrescimentoMultiplo(imagem, img_gray_ubyte, list(sementes), limiares, rotulos["rotulos"])
+
+
+@instrumentar("codificacao", "crescimento_regioes")
+def salvar_crescimento_regioes(resultado, caminho_imagem_saida_base, gravador=None, salvar_original=True):
+    """
+    Salva as imagens de um ResultadoCrescimento em PNG.
+
+    Args:
+        resultado (ResultadoCrescimento): Saída de calcular_crescimento_regioes.
+        caminho_imagem_saida_base (str): Caminho base das imagens de saída (sem extensão).
+        gravador (GravadorImagens): Grava em segundo plano (e com o nível de compressão ou o
+                                    formato dele); se None, grava na hora com skimage.io.
+        salvar_original (bool): Se False, não grava de novo a imagem de entrada.
+    """
+    if salvar_original:
+        gravar(f"{caminho_imagem_saida_base}_original.png", img_as_ubyte(resultado.imagem_original), gravador)
+    gravar(f"{caminho_imagem_saida_base}_original_com_semente.png",
+           img_as_ubyte(_marcar_sementes(resultado.imagem_original, [resultado.semente])), gravador)
+    gravar(f"{caminho_imagem_saida_base}_segmentada.png", resultado.img_segmentada, gravador)
+
+
+@instrumentar("renderizacao", "crescimento_regioes")
+def renderizar_crescimento_regioes(resultado, caminho_imagem_saida_base):
+    """
+    Gera a figura de comparação de um ResultadoCrescimento (matplotlib é importado só aqui).
+
+    Args:
+        resultado (ResultadoCrescimento): Saída de calcular_crescimento_regioes.
+        caminho_imagem_saida_base (str): Caminho base da figura (sem extensão).
+
+    Returns:
+        str: Caminho da figura salva.
+    """
+    from matplotlib import pyplot as plt
+    img_original_color = resultado.imagem_original
+    semente_linha, semente_coluna = resultado.semente
     fig, axes = plt.subplots(1, 3, figsize=(15, 5))
     ax = axes.ravel()
 
@@ -113,47 +158,216 @@ def aplicar_crescimento_regioes(caminho_imagem_entrada, caminho_imagem_saida_bas
     ax[0].set_title("Imagem Original")
     ax[0].axis("off")
 
-    ax[1].imshow(img_original_com_semente)
+    ax[1].imshow(_marcar_sementes(img_original_color, [resultado.semente]))
     ax[1].set_title(f"Semente em ({semente_linha},{semente_coluna})")
     ax[1].axis("off")
 
-    ax[2].imshow(img_segmentada, cmap="gray")
-    ax[2].set_title(f"Região Crescida (Limiar: {limiar_similaridade})")
+    ax[2].imshow(resultado.img_segmentada, cmap="gray")
+    ax[2].set_title(f"Região Crescida (Limiar: {resultado.limiar_similaridade})")
     ax[2].axis("off")
 
     fig.tight_layout()
     path_figura_comparacao = f"{caminho_imagem_saida_base}_comparacao_crescimento.png"
     plt.savefig(path_figura_comparacao)
     plt.close(fig)
-    print(f"[DEBUG] Figura de comparação de Crescimento de Regiões salva em {path_figura_comparacao}")
-    print(f"[DEBUG] Finalizando aplicar_crescimento_regioes para: {caminho_imagem_entrada}")
+    return path_figura_comparacao
+
+
+@instrumentar("codificacao", "crescimento_regioes")
+def salvar_crescimento_regioes_multiplas(resultado, caminho_imagem_saida_base, gravador=None):
+    """
+    Salva as imagens de um ResultadoCrescimentoMultiplo em PNG.
+
+    Args:
+        resultado (ResultadoCrescimentoMultiplo): Saída de calcular_crescimento_regioes_multiplas.
+        caminho_imagem_saida_base (str): Caminho base das imagens de saída (sem extensão).
+        gravador (GravadorImagens): Ver salvar_crescimento_regioes.
+    """
+    gravar(f"{caminho_imagem_saida_base}_original_com_sementes.png",
+           img_as_ubyte(_marcar_sementes(resultado.imagem_original, resultado.sementes)), gravador)
+    gravar(f"{caminho_imagem_saida_base}_rotulos.png", img_as_ubyte(color.label2rgb(resultado.rotulos, bg_label=0)),
+           gravador)
+
+
+@instrumentar("renderizacao", "crescimento_regioes")
+def renderizar_crescimento_regioes_multiplas(resultado, caminho_imagem_saida_base):
+    """
+    Gera a figura de comparação de um ResultadoCrescimentoMultiplo (matplotlib é importado só aqui).
+
+    Args:
+        resultado (ResultadoCrescimentoMultiplo): Saída de calcular_crescimento_regioes_multiplas.
+        caminho_imagem_saida_base (str): Caminho base da figura (sem extensão).
+
+    Returns:
+        str: Caminho da figura salva.
+    """
+    from matplotlib import pyplot as plt
+    img_original_color = resultado.imagem_original
+    fig, axes = plt.subplots(1, 3, figsize=(15, 5))
+    ax = axes.ravel()
+
+    ax[0].imshow(img_original_color, cmap='gray' if len(img_original_color.shape)==2 else None)
+    ax[0].set_title("Imagem Original")
+    ax[0].axis("off")
+
+    ax[1].imshow(_marcar_sementes(img_original_color, resultado.sementes))
+    ax[1].set_title(f"{len(resultado.sementes)} Sementes")
+    ax[1].axis("off")
+
+    ax[2].imshow(img_as_ubyte(color.label2rgb(resultado.rotulos, bg_label=0)))
+    ax[2].set_title(f"Regiões Crescidas (Limiares: {resultado.limiares})")
+    ax[2].axis("off")
+
+    fig.tight_layout()
+    path_figura_comparacao = f"{caminho_imagem_saida_base}_comparacao_multiplas_sementes.png"
+    plt.savefig(path_figura_comparacao)
+    plt.close(fig)
+    return path_figura_comparacao
+
+
+def _carregar_imagem(caminho_imagem_entrada, cache=None):
+    chave_arquivo = hash_arquivo(caminho_imagem_entrada) if cache is not None else None
+    with etapa("decodificacao", "crescimento_regioes", arquivo=caminho_imagem_entrada):
+        chave_imagem, decodificada = executar_etapa(cache, "imagem", [chave_arquivo], {},
+                                                    lambda: {"imagem": carregar_imagem(caminho_imagem_entrada)})
+    img_original_color = decodificada["imagem"]
+    if img_original_color is None:
+        logger.error("Erro ao carregar a imagem: %s", caminho_imagem_entrada)
+        return None, None
+    logger.debug("Imagem carregada: %s, shape: %s", caminho_imagem_entrada, img_original_color.shape)
+    contar("imagens")
+    contar("pixels", img_original_color.shape[0] * img_original_color.shape[1])
+    return img_original_color, chave_imagem
+
+
+def _criar_diretorio_saida(caminho_imagem_saida_base):
+    diretorio_saida = os.path.dirname(caminho_imagem_saida_base)
+    if not os.path.exists(diretorio_saida):
+        os.makedirs(diretorio_saida)
+        logger.debug("Diretório de saída criado: %s", diretorio_saida)
+    return diretorio_saida
+
+
+def aplicar_crescimento_regioes(caminho_imagem_entrada, caminho_imagem_saida_base, semente_coords, limiar_similaridade=10, metodo=None, criterio="semente", k=2.0, ordem="largura",
+                                salvar=True, renderizar=True, cache=None, gravador=None):
+    """
+    Aplica o algoritmo de crescimento de regiões a uma imagem a partir de uma semente.
+
+    Lê a imagem, chama calcular_crescimento_regioes e, opcionalmente, salva as imagens e a
+    figura de comparação.
+
+    Args:
+        caminho_imagem_entrada (str): Caminho para a imagem de entrada.
+        caminho_imagem_saida_base (str): Caminho base para salvar as imagens de saída (sem extensão).
+        semente_coords (tuple): Coordenadas (linha, coluna) do pixel semente.
+        limiar_similaridade (int): Diferença máxima de intensidade para um pixel ser incluído na região.
+        metodo (str): Motor de crescimento: "componentes", "fronteira" ou "fila" (ver motor_crescimento.crescer_regiao).
+        criterio (str): Critério de similaridade: "semente", "media", "media_desvio" ou "vizinho".
+        k (float): Número de desvios padrão aceitos no critério "media_desvio".
+        ordem (str): "largura" ou "prioridade" (pixels mais similares à região entram primeiro).
+        salvar (bool): Se True, salva as imagens original, com semente e segmentada em PNG.
+        renderizar (bool): Se True, salva a figura de comparação (matplotlib).
+        cache (CacheResultados): Se informado, a decodificação e as etapas são reaproveitadas
+                                 do cache (chave: hash dos bytes do arquivo e parâmetros).
+        gravador (GravadorImagens): Grava os PNGs em segundo plano (ver utilitarios.io_imagens).
+
+    Returns:
+        ResultadoCrescimento: Resultado do processamento.
+    """
+    logger.debug("Iniciando aplicar_crescimento_regioes para: %s com semente %s", caminho_imagem_entrada, semente_coords)
+    diretorio_saida = _criar_diretorio_saida(caminho_imagem_saida_base) if salvar or renderizar else None
+
+    img_original_color, chave_imagem = _carregar_imagem(caminho_imagem_entrada, cache)
+    if img_original_color is None:
+        return
+
+    altura, largura = img_original_color.shape[:2]
+    semente_linha, semente_coluna = semente_coords
+    if not (0 <= semente_linha < altura and 0 <= semente_coluna < largura):
+        logger.error("Coordenadas da semente %s fora dos limites da imagem (%dx%d).", semente_coords, altura, largura)
+        return
+
+    resultado = calcular_crescimento_regioes(img_original_color, semente_coords, limiar_similaridade, metodo, criterio, k, ordem,
+                                             cache, chave_imagem)
+    logger.debug("Semente inicial: (%d, %d), Valor: %d", semente_linha, semente_coluna,
+                 resultado.img_gray_ubyte[semente_linha, semente_coluna])
+    logger.debug("Processo de crescimento de região concluído.")
+
+    if salvar:
+        salvar_crescimento_regioes(resultado, caminho_imagem_saida_base, gravador=gravador)
+        logger.debug("Imagens de crescimento de regiões salvas em %s", diretorio_saida)
+
+    if renderizar:
+        path_figura_comparacao = renderizar_crescimento_regioes(resultado, caminho_imagem_saida_base)
+        logger.debug("Figura de comparação de Crescimento de Regiões salva em %s", path_figura_comparacao)
+    logger.debug("Finalizando aplicar_crescimento_regioes para: %s", caminho_imagem_entrada)
+    return resultado
+
+def aplicar_crescimento_regioes_multiplas(caminho_imagem_entrada, caminho_imagem_saida_base, sementes, limiares=10,
+                                          salvar=True, renderizar=True, cache=None, gravador=None):
+    """
+    Aplica o crescimento de regiões a partir de várias sementes de uma só vez: a imagem é
+    lida e convertida uma única vez e todas as regiões crescem na mesma passada.
+
+    Args:
+        caminho_imagem_entrada (str): Caminho para a imagem de entrada.
+        caminho_imagem_saida_base (str): Caminho base para salvar as imagens de saída (sem extensão).
+        sementes (list): Lista de coordenadas (linha, coluna) dos pixels semente.
+        limiares (int ou list): Limiar de similaridade único ou um por semente.
+        salvar (bool): Se True, salva a imagem com as sementes e os rótulos em PNG.
+        renderizar (bool): Se True, salva a figura de comparação (matplotlib).
+        cache (CacheResultados): Se informado, a decodificação e as etapas são reaproveitadas
+                                 do cache (chave: hash dos bytes do arquivo e parâmetros).
+        gravador (GravadorImagens): Grava os PNGs em segundo plano (ver utilitarios.io_imagens).
+
+    Returns:
+        ResultadoCrescimentoMultiplo: Resultado do processamento.
+    """
+    logger.debug("Iniciando aplicar_crescimento_regioes_multiplas para: %s com sementes %s", caminho_imagem_entrada, sementes)
+    diretorio_saida = _criar_diretorio_saida(caminho_imagem_saida_base) if salvar or renderizar else None
+
+    img_original_color, chave_imagem = _carregar_imagem(caminho_imagem_entrada, cache)
+    if img_original_color is None:
+        return
+
+    altura, largura = img_original_color.shape[:2]
+    for semente in sementes:
+        if not (0 <= semente[0] < altura and 0 <= semente[1] < largura):
+            logger.error("Coordenadas da semente %s fora dos limites da imagem (%dx%d).", semente, altura, largura)
+            return
+
+    resultado = calcular_crescimento_regioes_multiplas(img_original_color, sementes, limiares, cache, chave_imagem)
+    logger.debug("Crescimento de %d regiões concluído em uma única passada.", len(sementes))
+
+    if salvar:
+        salvar_crescimento_regioes_multiplas(resultado, caminho_imagem_saida_base, gravador)
+        logger.debug("Imagens de crescimento de regiões salvas em %s", diretorio_saida)
+
+    if renderizar:
+        path_figura_comparacao = renderizar_crescimento_regioes_multiplas(resultado, caminho_imagem_saida_base)
+        logger.debug("Figura de comparação de Crescimento de Regiões salva em %s", path_figura_comparacao)
+    logger.debug("Finalizando aplicar_crescimento_regioes_multiplas para: %s", caminho_imagem_entrada)
+    return resultado
 
 if __name__ == "__main__":
-    base_path_projeto = "/home/ubuntu/trabalho_faculdade_python"
-    path_modulo_crescimento = os.path.join(base_path_projeto, "crescimento_regioes_python")
+    configurar_log()
+    # Caminhos relativos ao próprio módulo: funciona de qualquer pasta
+    path_modulo_crescimento = os.path.dirname(os.path.abspath(__file__))
     path_imagens_exemplos = os.path.join(path_modulo_crescimento, "imagens_exemplo")
     path_resultados = os.path.join(path_modulo_crescimento, "resultados_imagens")
 
     if not os.path.exists(path_resultados):
         os.makedirs(path_resultados)
 
-    imagens_e_sementes = {
-        "astronaut_original.png": [(200, 200), (100,100)], # Exemplo: semente no rosto, semente no capacete
-        "horse_original.png": [(150, 200), (50,50)],       # Exemplo: semente no corpo do cavalo, semente no fundo
-        "text_original.png": [(80, 100), (20,20)]          # Exemplo: semente em uma letra, semente no fundo
-    }
-    
-    limiar_teste = 20 # Limiar de similaridade para teste
-
-    for nome_img, lista_sementes in imagens_e_sementes.items():
+    for nome_img, lista_sementes in IMAGENS_E_SEMENTES_EXEMPLO.items():
         caminho_img = os.path.join(path_imagens_exemplos, nome_img)
         if os.path.exists(caminho_img):
-            for i, semente in enumerate(lista_sementes):
-                print(f"\n[MAIN] Processando {nome_img} com semente {semente} (limiar: {limiar_teste})")
-                nome_base_saida = os.path.splitext(nome_img)[0] + f"_semente{i+1}_limiar{limiar_teste}"
-                aplicar_crescimento_regioes(caminho_img, os.path.join(path_resultados, nome_base_saida), semente, limiar_teste)
+            # Todas as sementes da imagem em uma única passada (uma decodificação e um rótulo por semente)
+            logger.info("Processando %s com %d sementes simultâneas (limiar: %s)", nome_img, len(lista_sementes), LIMIAR_EXEMPLO)
+            nome_base_saida = os.path.splitext(nome_img)[0] + f"_multiplas_sementes_limiar{LIMIAR_EXEMPLO}"
+            aplicar_crescimento_regioes_multiplas(caminho_img, os.path.join(path_resultados, nome_base_saida), lista_sementes, LIMIAR_EXEMPLO)
         else:
-            print(f"[ERRO] Imagem de exemplo {nome_img} não encontrada em: {caminho_img}")
+            logger.error("Imagem de exemplo %s não encontrada em: %s", nome_img, caminho_img)
 
-    print("\nProcessamento de crescimento de regiões concluído.")
+    logger.info("Processamento de crescimento de regiões concluído.")
 
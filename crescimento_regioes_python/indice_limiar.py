@@ -0,0 +1,147 @@
+import hashlib
+import os
+import cv2
+import numpy as np
+
+
+class IndiceMinimax():
+    """
+    Índice de conectividade de uma imagem para uma semente: a distância minimax
+    (gargalo) da semente a cada pixel.
+
+    A distância de um pixel p é o menor valor, entre todos os caminhos 8-conexos da
+    semente até p, da maior diferença |I(q) - I(semente)| ao longo do caminho. A região
+    de crescer_regiao (critério da semente) para qualquer limiar t é exatamente
+    {p : distancia(p) <= t}, então cada consulta é uma única comparação.
+    """
+
+    def __init__(self, distancias, semente):
+        self.distancias = distancias
+        self.semente = (int(semente[0]), int(semente[1]))
+
+    def consultar(self, limiar_similaridade):
+        """
+        Retorna a região crescida para um limiar, sem refazer o crescimento.
+
+        Args:
+            limiar_similaridade (float): Diferença máxima de intensidade para a semente.
+
+        Returns:
+            numpy.ndarray: Máscara booleana (linhas, colunas) da região.
+        """
+        if limiar_similaridade < 0:
+            regiao = np.zeros(self.distancias.shape, bool)
+            regiao[self.semente] = True
+            return regiao
+        return self.distancias <= limiar_similaridade
+
+    def salvar(self, caminho):
+        """Salva as distâncias em .npy (recarregáveis por memory-map com carregar)."""
+        np.save(caminho, np.asarray(self.distancias))
+
+    @classmethod
+    def carregar(cls, caminho, semente):
+        """Recarrega um índice salvo, mapeado em memória (somente leitura)."""
+        return cls(np.load(caminho, mmap_mode="r"), semente)
+
+
+def calcular_indice_minimax(img_gray_ubyte, semente_coords):
+    """
+    Calcula a distância minimax da semente a todos os pixels.
+
+    A região de limiar t só muda quando t passa por um dos valores |I - I(semente)|
+    presentes na imagem, então basta um cv2.floodFill com faixa fixa por valor distinto
+    (no máximo 256, em ordem crescente, parando quando a região cobre a imagem). Cada
+    pixel recebe o primeiro nível em que entra na região; isso é acumulado com subtrações
+    mascaradas, sem varrer a imagem em Python.
+
+    Args:
+        img_gray_ubyte (numpy.ndarray): Imagem em escala de cinza uint8 (linhas, colunas).
+        semente_coords (tuple): Coordenadas (linha, coluna) do pixel semente.
+
+    Returns:
+        IndiceMinimax: Índice com as distâncias uint8 (linhas, colunas).
+    """
+    img_gray_ubyte = np.ascontiguousarray(img_gray_ubyte, dtype=np.uint8)
+    if not img_gray_ubyte.flags.writeable:
+        # O binding do floodFill exige um array gravável mesmo com FLOODFILL_MASK_ONLY
+        img_gray_ubyte = img_gray_ubyte.copy()
+    altura, largura = img_gray_ubyte.shape
+    semente = (int(semente_coords[0]), int(semente_coords[1]))
+    if not (0 <= semente[0] < altura and 0 <= semente[1] < largura):
+        raise ValueError(f"Coordenadas da semente {semente_coords} fora dos limites da imagem ({altura}x{largura}).")
+
+    custos = cv2.absdiff(img_gray_ubyte, np.full_like(img_gray_ubyte, img_gray_ubyte[semente]))
+    niveis = np.flatnonzero(np.bincount(custos.ravel(), minlength=256))
+    distancias = np.full((altura, largura), 255, np.uint8)
+    mascara = np.zeros((altura + 2, largura + 2), np.uint8)
+    regiao = mascara[1:-1, 1:-1]
+    flags = 8 | cv2.FLOODFILL_FIXED_RANGE | cv2.FLOODFILL_MASK_ONLY | (1 << 8)
+    nivel_anterior = None
+    for nivel in niveis:
+        nivel = int(nivel)
+        if nivel_anterior is not None:
+            # Quem já estava na região do nível anterior desce o intervalo entre os níveis;
+            # somando todos os intervalos, um pixel que entrou no nível k termina em k
+            cv2.subtract(distancias, nivel - nivel_anterior, dst=distancias, mask=regiao)
+            mascara[:] = 0
+        area = cv2.floodFill(img_gray_ubyte, mascara, (semente[1], semente[0]), 0, nivel, nivel, flags)[0]
+        nivel_anterior = nivel
+        if area == altura * largura:
+            break
+    cv2.subtract(distancias, 255 - nivel_anterior, dst=distancias, mask=regiao)
+    return IndiceMinimax(distancias, semente)
+
+
+def _caminho_cache(diretorio_cache, img_gray_ubyte, semente):
+    resumo = hashlib.sha1()
+    resumo.update(str(img_gray_ubyte.shape).encode())
+    resumo.update(np.ascontiguousarray(img_gray_ubyte).data)
+    return os.path.join(diretorio_cache, f"minimax_{resumo.hexdigest()[:16]}_{semente[0]}_{semente[1]}.npy")
+
+
+def obter_indice_minimax(img_gray_ubyte, semente_coords, diretorio_cache=None):
+    """
+    Retorna o índice minimax de uma imagem e semente, reaproveitando o cache em disco.
+
+    O arquivo .npy é identificado pelo hash do conteúdo da imagem e pela semente; em um
+    acerto ele é mapeado em memória, sem recalcular nem ler o arquivo inteiro.
+
+    Args:
+        img_gray_ubyte (numpy.ndarray): Imagem em escala de cinza uint8 (linhas, colunas).
+        semente_coords (tuple): Coordenadas (linha, coluna) do pixel semente.
+        diretorio_cache (str): Pasta do cache; se None, o índice só é calculado.
+
+    Returns:
+        IndiceMinimax: Índice da imagem para a semente.
+    """
+    semente = (int(semente_coords[0]), int(semente_coords[1]))
+    if diretorio_cache is None:
+        return calcular_indice_minimax(img_gray_ubyte, semente)
+    caminho = _caminho_cache(diretorio_cache, img_gray_ubyte, semente)
+    if os.path.exists(caminho):
+        return IndiceMinimax.carregar(caminho, semente)
+    indice = calcular_indice_minimax(img_gray_ubyte, semente)
+    os.makedirs(diretorio_cache, exist_ok=True)
+    # Grava em um arquivo temporário e renomeia, para nunca deixar um .npy incompleto
+    caminho_temporario = f"{caminho}.{os.getpid()}.tmp.npy"
+    indice.salvar(caminho_temporario)
+    os.replace(caminho_temporario, caminho)
+    return IndiceMinimax.carregar(caminho, semente)
+
+
+def varrer_limiares(img_gray_ubyte, semente_coords, limiares, diretorio_cache=None):
+    """
+    Cresce a região de uma semente para vários limiares a partir de um único índice.
+
+    Args:
+        img_gray_ubyte (numpy.ndarray): Imagem em escala de cinza uint8 (linhas, colunas).
+        semente_coords (tuple): Coordenadas (linha, coluna) do pixel semente.
+        limiares (iterable): Limiares de similaridade a consultar.
+        diretorio_cache (str): Pasta do cache de índices (opcional).
+
+    Returns:
+        dict: Limiar -> máscara booleana da região.
+    """
+    indice = obter_indice_minimax(img_gray_ubyte, semente_coords, diretorio_cache)
+    return {limiar: indice.consultar(limiar) for limiar in limiares}
@@ -0,0 +1,400 @@
+import cv2
+import numpy as np
+
+METODOS_CRESCIMENTO = ("componentes", "fronteira", "fila")
+CRITERIOS_CRESCIMENTO = ("semente", "media", "media_desvio", "vizinho")
+ORDENS_CRESCIMENTO = ("largura", "prioridade")
+
+
+class FilaCircular():
+    """
+    Fila FIFO de índices int32 sobre um buffer circular pré-alocado.
+
+    Substitui a pilha baseada em listas: os itens são inseridos e retirados em lotes
+    (arrays numpy), sem tuplas nem conversões por pixel.
+    """
+
+    def __init__(self, capacidade):
+        self.buffer = np.empty(max(int(capacidade), 1), dtype=np.int32)
+        self.inicio = 0
+        self.tamanho = 0
+
+    def push(self, itens):
+        itens = np.asarray(itens, dtype=np.int32).ravel()
+        n = itens.size
+        capacidade = self.buffer.size
+        if self.tamanho + n > capacidade:
+            raise OverflowError(f"Fila circular cheia (capacidade {capacidade}).")
+        fim = (self.inicio + self.tamanho) % capacidade
+        primeira_parte = min(n, capacidade - fim)
+        self.buffer[fim:fim + primeira_parte] = itens[:primeira_parte]
+        self.buffer[:n - primeira_parte] = itens[primeira_parte:]
+        self.tamanho += n
+
+    def pop(self, n=None):
+        """Retira até n itens (todos, se n for None) na ordem de inserção."""
+        n = self.tamanho if n is None else min(n, self.tamanho)
+        capacidade = self.buffer.size
+        primeira_parte = min(n, capacidade - self.inicio)
+        itens = np.concatenate((self.buffer[self.inicio:self.inicio + primeira_parte],
+                                self.buffer[:n - primeira_parte]))
+        self.inicio = (self.inicio + n) % capacidade
+        self.tamanho -= n
+        return itens
+
+    def isEmpty(self):
+        return self.tamanho == 0
+
+    def length(self):
+        return self.tamanho
+
+
+def _deslocamentos_vizinhanca(largura_preenchida):
+    # Deslocamentos dos 8 vizinhos em índices planos de uma imagem com borda de 1 pixel
+    return np.array([dx * largura_preenchida + dy
+                     for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                     if not (dx == 0 and dy == 0)], dtype=np.int32)
+
+
+def _mascara_similaridade(img_gray_ubyte, valor_semente, limiar):
+    diferenca = cv2.absdiff(img_gray_ubyte, np.full_like(img_gray_ubyte, valor_semente))
+    return diferenca <= limiar
+
+
+def _crescer_componentes(img_gray_ubyte, semente, limiar):
+    # Como o critério só compara com o valor da semente, a região é exatamente o
+    # componente 8-conexo da máscara |I - I(semente)| <= limiar que contém a semente.
+    # cv2.floodFill com faixa fixa calcula esse componente sem rotular o resto da imagem.
+    altura, largura = img_gray_ubyte.shape
+    mascara = np.zeros((altura + 2, largura + 2), np.uint8)
+    limiar_int = int(np.floor(limiar))
+    flags = 8 | cv2.FLOODFILL_FIXED_RANGE | cv2.FLOODFILL_MASK_ONLY | (255 << 8)
+    if not img_gray_ubyte.flags.writeable:
+        # O binding do floodFill exige um array gravável mesmo com FLOODFILL_MASK_ONLY
+        # (por exemplo, imagens mapeadas em memória somente leitura)
+        img_gray_ubyte = img_gray_ubyte.copy()
+    cv2.floodFill(img_gray_ubyte, mascara, (semente[1], semente[0]), 0, limiar_int, limiar_int, flags)
+    return mascara[1:-1, 1:-1] > 0
+
+
+def _crescer_fronteira(img_gray_ubyte, semente, limiar):
+    # Expansão vetorizada da fronteira: fronteira dilatada ∩ similares ∩ não visitados,
+    # restrita à caixa envolvente da fronteira atual
+    similar = _mascara_similaridade(img_gray_ubyte, img_gray_ubyte[semente], limiar).view(np.uint8)
+    regiao = np.zeros_like(similar)
+    regiao[semente] = 1
+    fronteira = regiao.copy()
+    kernel = np.ones((3, 3), np.uint8)
+    altura, largura = similar.shape
+    while True:
+        x, y, w, h = cv2.boundingRect(fronteira)
+        l0, l1 = max(y - 1, 0), min(y + h + 1, altura)
+        c0, c1 = max(x - 1, 0), min(x + w + 1, largura)
+        janela_fronteira = fronteira[l0:l1, c0:c1]
+        nova = cv2.dilate(janela_fronteira, kernel)
+        nova &= similar[l0:l1, c0:c1]
+        nova &= 1 - regiao[l0:l1, c0:c1]
+        if not nova.any():
+            break
+        regiao[l0:l1, c0:c1] |= nova
+        # A janela contém toda a fronteira atual, então basta sobrescrevê-la
+        fronteira[l0:l1, c0:c1] = nova
+    return regiao.view(bool)
+
+
+def _crescer_fila(img_gray_ubyte, semente, limiar):
+    # Busca em largura por níveis sobre índices planos: cada nível da fila circular é
+    # expandido de uma vez para os 8 vizinhos, com o mesmo "visitado" do laço original
+    altura, largura = img_gray_ubyte.shape
+    largura_preenchida = largura + 2
+    similar = np.zeros((altura + 2, largura_preenchida), bool)
+    similar[1:-1, 1:-1] = _mascara_similaridade(img_gray_ubyte, img_gray_ubyte[semente], limiar)
+    # A borda sentinela começa visitada, então nenhum vizinho sai da imagem
+    visitados = np.ones((altura + 2, largura_preenchida), bool)
+    visitados[1:-1, 1:-1] = False
+    regiao = np.zeros((altura + 2, largura_preenchida), bool)
+    similar_plano, visitados_plano, regiao_plano = similar.ravel(), visitados.ravel(), regiao.ravel()
+    deslocamentos = _deslocamentos_vizinhanca(largura_preenchida)
+
+    fila = FilaCircular(altura * largura)
+    indice_semente = (semente[0] + 1) * largura_preenchida + semente[1] + 1
+    visitados_plano[indice_semente] = True
+    regiao_plano[indice_semente] = True
+    fila.push([indice_semente])
+    while not fila.isEmpty():
+        nivel = fila.pop()
+        vizinhos = (nivel[:, np.newaxis] + deslocamentos).ravel()
+        vizinhos = np.unique(vizinhos[~visitados_plano[vizinhos]])
+        visitados_plano[vizinhos] = True
+        aceitos = vizinhos[similar_plano[vizinhos]]
+        regiao_plano[aceitos] = True
+        fila.push(aceitos)
+    return regiao[1:-1, 1:-1]
+
+
+class EstatisticasRegiao():
+    """
+    Estatísticas incrementais de uma região (contagem, soma e soma dos quadrados).
+
+    Cada pixel aceito custa O(1): os lotes aceitos em um passo são somados uma vez,
+    sem recalcular nada sobre a região inteira.
+    """
+
+    def __init__(self, valores=()):
+        self.contagem = 0
+        self.soma = 0.0
+        self.soma_quadrados = 0.0
+        self.adicionar(valores)
+
+    def adicionar(self, valores):
+        valores = np.asarray(valores, dtype=np.float64).ravel()
+        self.contagem += valores.size
+        self.soma += valores.sum()
+        self.soma_quadrados += np.dot(valores, valores)
+
+    def media(self):
+        return self.soma / self.contagem if self.contagem else 0.0
+
+    def desvio(self):
+        if not self.contagem:
+            return 0.0
+        media = self.media()
+        return np.sqrt(max(self.soma_quadrados / self.contagem - media * media, 0.0))
+
+
+def _tolerancias(criterio, valores, valores_pais, estatisticas, limiar, k):
+    # Retorna a diferença de cada candidato para a referência do critério e a tolerância
+    if criterio == "vizinho":
+        return np.abs(valores - valores_pais), limiar
+    diferencas = np.abs(valores - estatisticas.media())
+    if criterio == "media":
+        return diferencas, limiar
+    # media_desvio: média ± k·desvio, com o limiar como tolerância mínima (uma região
+    # com um único pixel tem desvio zero)
+    return diferencas, max(limiar, k * estatisticas.desvio())
+
+
+def _crescer_adaptativo(img_gray_ubyte, semente, limiar, criterio, k, ordem):
+    altura, largura = img_gray_ubyte.shape
+    largura_preenchida = largura + 2
+    img_preenchida = np.zeros((altura + 2, largura_preenchida), np.float64)
+    img_preenchida[1:-1, 1:-1] = img_gray_ubyte
+    # Pixels bloqueados: borda sentinela e pixels já na região. Diferente do critério da
+    # semente, aqui um pixel rejeitado pode ser testado de novo quando outro vizinho entrar
+    # na região, pois a referência (média, desvio ou pai) mudou.
+    bloqueados = np.ones((altura + 2, largura_preenchida), bool)
+    bloqueados[1:-1, 1:-1] = False
+    regiao = np.zeros((altura + 2, largura_preenchida), bool)
+    img_plano, bloqueados_plano, regiao_plano = img_preenchida.ravel(), bloqueados.ravel(), regiao.ravel()
+    deslocamentos = _deslocamentos_vizinhanca(largura_preenchida)
+
+    indice_semente = (semente[0] + 1) * largura_preenchida + semente[1] + 1
+    regiao_plano[indice_semente] = True
+    bloqueados_plano[indice_semente] = True
+    estatisticas = EstatisticasRegiao([img_plano[indice_semente]])
+
+    def candidatos(aceitos):
+        # Vizinhos livres dos pixels aceitos, com o pai que os propôs
+        vizinhos = (aceitos[:, np.newaxis] + deslocamentos).ravel()
+        pais = np.repeat(aceitos, deslocamentos.size)
+        livres = ~bloqueados_plano[vizinhos]
+        vizinhos, pais = vizinhos[livres], pais[livres]
+        diferencas, tolerancia = _tolerancias(criterio, img_plano[vizinhos], img_plano[pais],
+                                              estatisticas, limiar, k)
+        return vizinhos, diferencas, diferencas <= tolerancia
+
+    def aceitar(aceitos):
+        regiao_plano[aceitos] = True
+        bloqueados_plano[aceitos] = True
+        estatisticas.adicionar(img_plano[aceitos])
+
+    if ordem == "largura" or criterio == "vizinho":
+        # No critério "vizinho" a aceitação de um pixel não depende do estado da região,
+        # então a ordem de visita não altera o resultado final e a busca em largura (bem
+        # mais rápida) também atende à ordem por prioridade.
+        # Busca em largura por níveis: todos os candidatos de um nível são avaliados com as
+        # estatísticas da região no início do nível
+        fila = FilaCircular(altura * largura)
+        fila.push([indice_semente])
+        while not fila.isEmpty():
+            vizinhos, _, passou = candidatos(fila.pop())
+            aceitos = np.unique(vizinhos[passou])
+            aceitar(aceitos)
+            fila.push(aceitos)
+        return regiao[1:-1, 1:-1]
+
+    # Ordem por prioridade (seeded region growing): os vizinhos livres da região ficam em
+    # baldes pelo nível de cinza. A diferença para a média depende só do nível, então o
+    # balde de nível mais próximo da média atual é sempre o mais similar, sem reordenar
+    # nada quando a média muda. O balde é retirado inteiro (pixels de mesmo nível entram
+    # juntos) e, quando nem ele passa na tolerância, nenhum outro passa e o crescimento
+    # termina.
+    baldes = [[] for _ in range(256)]
+    ocupados = np.zeros(256, bool)
+    niveis = np.arange(256, dtype=np.float64)
+
+    def enfileirar(aceitos):
+        vizinhos = (aceitos[:, np.newaxis] + deslocamentos).ravel()
+        vizinhos = vizinhos[~bloqueados_plano[vizinhos]]
+        valores = img_plano[vizinhos].astype(np.intp)
+        ordem_valores = np.argsort(valores, kind="stable")
+        valores, vizinhos = valores[ordem_valores], vizinhos[ordem_valores]
+        valores_baldes, inicios = np.unique(valores, return_index=True)
+        for balde, parte in zip(valores_baldes, np.split(vizinhos, inicios[1:])):
+            baldes[balde].append(parte)
+        ocupados[valores_baldes] = True
+
+    enfileirar(np.array([indice_semente], np.int32))
+    while ocupados.any():
+        distancias = np.where(ocupados, np.abs(niveis - estatisticas.media()), np.inf)
+        balde = int(np.argmin(distancias))
+        itens = np.unique(np.concatenate(baldes[balde]))
+        baldes[balde] = []
+        ocupados[balde] = False
+        itens = itens[~regiao_plano[itens]]
+        if not itens.size:
+            continue
+        diferencas, tolerancia = _tolerancias(criterio, img_plano[itens], None, estatisticas, limiar, k)
+        if diferencas[0] > tolerancia:
+            break
+        aceitar(itens)
+        enfileirar(itens)
+    return regiao[1:-1, 1:-1]
+
+
+def crescer_regiao(img_gray_ubyte, semente_coords, limiar_similaridade=10, metodo=None, criterio="semente", k=2.0,
+                   ordem="largura"):
+    """
+    Cresce uma região a partir de uma semente com conectividade 8.
+
+    Com o critério "semente" (padrão) tem a mesma semântica do laço original de
+    aplicar_crescimento_regioes, mas sem laço Python por pixel. Os critérios adaptativos
+    usam estatísticas da região atualizadas incrementalmente:
+      - "semente": |I(p) - I(semente)| <= limiar;
+      - "media": |I(p) - média da região| <= limiar;
+      - "media_desvio": |I(p) - média| <= max(limiar, k·desvio padrão da região);
+      - "vizinho": |I(p) - I(pixel vizinho que o propôs)| <= limiar.
+
+    Args:
+        img_gray_ubyte (numpy.ndarray): Imagem em escala de cinza uint8 (linhas, colunas).
+        semente_coords (tuple): Coordenadas (linha, coluna) do pixel semente.
+        limiar_similaridade (float): Diferença máxima de intensidade para um pixel ser incluído.
+        metodo (str): Motor para o critério "semente": "componentes" (limiarização +
+                      componente conexo via cv2.floodFill), "fronteira" (expansão vetorizada
+                      da fronteira por dilatação) ou "fila" (busca em largura em lotes sobre
+                      uma fila circular int32). Os critérios adaptativos só rodam no motor
+                      "fila". None escolhe automaticamente.
+        criterio (str): "semente", "media", "media_desvio" ou "vizinho".
+        k (float): Número de desvios padrão aceitos no critério "media_desvio".
+        ordem (str): "largura" (busca em largura por níveis) ou "prioridade" (crescimento
+                     semeado: entre os vizinhos da região, entram primeiro os de nível mais
+                     próximo da média atual, os de mesmo nível juntos, até que o mais
+                     próximo saia da tolerância). Só altera o resultado nos critérios
+                     "media" e "media_desvio"; nos demais a região final não depende da
+                     ordem e a busca em largura é usada.
+
+    Returns:
+        numpy.ndarray: Máscara booleana (linhas, colunas) da região crescida.
+    """
+    if criterio not in CRITERIOS_CRESCIMENTO:
+        raise ValueError(f"Critério de crescimento desconhecido: {criterio}. Use um de {CRITERIOS_CRESCIMENTO}.")
+    if ordem not in ORDENS_CRESCIMENTO:
+        raise ValueError(f"Ordem de crescimento desconhecida: {ordem}. Use uma de {ORDENS_CRESCIMENTO}.")
+    adaptativo = criterio != "semente"
+    if metodo is None:
+        metodo = "fila" if adaptativo else "componentes"
+    if metodo not in METODOS_CRESCIMENTO:
+        raise ValueError(f"Método de crescimento desconhecido: {metodo}. Use um de {METODOS_CRESCIMENTO}.")
+    if adaptativo and metodo != "fila":
+        raise ValueError(f"O critério {criterio} só está disponível no método 'fila'.")
+    img_gray_ubyte = np.ascontiguousarray(img_gray_ubyte, dtype=np.uint8)
+    altura, largura = img_gray_ubyte.shape
+    semente = (int(semente_coords[0]), int(semente_coords[1]))
+    if not (0 <= semente[0] < altura and 0 <= semente[1] < largura):
+        raise ValueError(f"Coordenadas da semente {semente_coords} fora dos limites da imagem ({altura}x{largura}).")
+    if limiar_similaridade < 0:
+        # Nenhum vizinho pode passar no critério: a região é só a semente
+        regiao = np.zeros((altura, largura), bool)
+        regiao[semente] = True
+        return regiao
+    if adaptativo:
+        return _crescer_adaptativo(img_gray_ubyte, semente, limiar_similaridade, criterio, k, ordem)
+    if metodo == "componentes":
+        return _crescer_componentes(img_gray_ubyte, semente, limiar_similaridade)
+    if metodo == "fronteira":
+        return _crescer_fronteira(img_gray_ubyte, semente, limiar_similaridade)
+    return _crescer_fila(img_gray_ubyte, semente, limiar_similaridade)
+
+
+def crescer_regioes_multiplas(img_gray_ubyte, sementes, limiares=10):
+    """
+    Cresce simultaneamente as regiões de várias sementes em uma única passada
+    (busca em largura por níveis a partir de todas as sementes ao mesmo tempo).
+
+    Cada pixel é comparado com o valor da semente da região que tenta incorporá-lo.
+    Regra de desempate para pixels disputados por mais de uma região:
+      1. vence a região que o alcança primeiro (menor distância em passos de vizinhança 8);
+      2. no mesmo passo, vence a semente de valor mais próximo ao do pixel;
+      3. persistindo o empate, vence a semente de menor índice.
+    Um pixel já rotulado não muda de região, de modo que uma região pode ser bloqueada
+    por outra. Se as regiões não se tocam, cada uma é idêntica à de crescer_regiao. Uma
+    semente repetida fica com o rótulo da primeira ocorrência, e as outras ficam vazias.
+
+    Args:
+        img_gray_ubyte (numpy.ndarray): Imagem em escala de cinza uint8 (linhas, colunas).
+        sementes (list): Lista de coordenadas (linha, coluna).
+        limiares (int ou list): Limiar único ou um limiar por semente.
+
+    Returns:
+        numpy.ndarray: Mapa de rótulos int32 (linhas, colunas): 0 para o fundo e i + 1
+                       para a região da semente sementes[i].
+    """
+    img_gray_ubyte = np.ascontiguousarray(img_gray_ubyte, dtype=np.uint8)
+    altura, largura = img_gray_ubyte.shape
+    sementes = [(int(linha), int(coluna)) for linha, coluna in sementes]
+    if not sementes:
+        raise ValueError("É necessária ao menos uma semente.")
+    for semente in sementes:
+        if not (0 <= semente[0] < altura and 0 <= semente[1] < largura):
+            raise ValueError(f"Coordenadas da semente {semente} fora dos limites da imagem ({altura}x{largura}).")
+    limiares = np.asarray(limiares, dtype=np.float64)
+    if limiares.ndim == 0:
+        limiares = np.full(len(sementes), limiares)
+    elif limiares.shape != (len(sementes),):
+        raise ValueError(f"Foram dados {limiares.size} limiares para {len(sementes)} sementes.")
+
+    largura_preenchida = largura + 2
+    img_preenchida = np.zeros((altura + 2, largura_preenchida), np.int16)
+    img_preenchida[1:-1, 1:-1] = img_gray_ubyte
+    # A borda sentinela (-1) nunca é tomada por nenhuma região
+    rotulos = np.full((altura + 2, largura_preenchida), -1, np.int32)
+    rotulos[1:-1, 1:-1] = 0
+    img_plano, rotulos_plano = img_preenchida.ravel(), rotulos.ravel()
+    deslocamentos = _deslocamentos_vizinhanca(largura_preenchida)
+    valores_sementes = np.array([img_gray_ubyte[s] for s in sementes], np.int16)
+
+    indices_sementes = np.array([(l + 1) * largura_preenchida + c + 1 for l, c in sementes], np.int32)
+    # Sementes repetidas ficam com o menor índice (a primeira ocorrência)
+    unicos, primeiras = np.unique(indices_sementes, return_index=True)
+    rotulos_plano[unicos] = primeiras.astype(np.int32) + 1
+
+    fila = FilaCircular(altura * largura)
+    fila.push(unicos)
+    while not fila.isEmpty():
+        nivel = fila.pop()
+        vizinhos = (nivel[:, np.newaxis] + deslocamentos).ravel()
+        candidatos = np.repeat(rotulos_plano[nivel], deslocamentos.size)
+        livres = rotulos_plano[vizinhos] == 0
+        vizinhos, candidatos = vizinhos[livres], candidatos[livres]
+        diferencas = np.abs(img_plano[vizinhos] - valores_sementes[candidatos - 1])
+        aceitos = diferencas <= limiares[candidatos - 1]
+        vizinhos, candidatos, diferencas = vizinhos[aceitos], candidatos[aceitos], diferencas[aceitos]
+        # Ordena por pixel, depois pela regra de desempate, e fica com o primeiro de cada pixel
+        ordem = np.lexsort((candidatos, diferencas, vizinhos))
+        vizinhos, candidatos = vizinhos[ordem], candidatos[ordem]
+        primeiros = np.ones(vizinhos.size, bool)
+        primeiros[1:] = vizinhos[1:] != vizinhos[:-1]
+        vizinhos, candidatos = vizinhos[primeiros], candidatos[primeiros]
+        rotulos_plano[vizinhos] = candidatos
+        fila.push(vizinhos)
+    return np.ascontiguousarray(rotulos[1:-1, 1:-1])
@@ -0,0 +1,52 @@
+import numpy as np
+
+
+class Stack():
+    def __init__(self):
+        self.item = []
+        self.obj = []
+
+    def push(self, item, obj):
+        self.item.append(item)
+        self.obj.append(obj)
+
+    def pop(self):
+        if not self.isEmpty():
+            return self.item.pop(), self.obj.pop()
+
+    def isEmpty(self):
+        return len(self.item) == 0
+
+
+def crescer_regiao_referencia(img_gray_ubyte, semente_coords, limiar_similaridade):
+    """
+    Laço original de aplicar_crescimento_regioes (pilha Python, vizinhança 8, um pixel por
+    vez), mantido como referência dos motores de motor_crescimento nos testes e nos
+    benchmarks. É ordens de grandeza mais lento que crescer_regiao.
+
+    Returns:
+        numpy.ndarray: Máscara booleana da região.
+    """
+    altura, largura = img_gray_ubyte.shape
+    img_segmentada = np.zeros_like(img_gray_ubyte)
+    visitados = np.zeros_like(img_gray_ubyte, dtype=bool)
+    pilha = Stack()
+    semente_linha, semente_coluna = semente_coords
+    valor_semente = img_gray_ubyte[semente_linha, semente_coluna]
+    pilha.push((semente_linha, semente_coluna), valor_semente)
+    visitados[semente_linha, semente_coluna] = True
+    img_segmentada[semente_linha, semente_coluna] = 255
+    while not pilha.isEmpty():
+        (x, y), _ = pilha.pop()
+        for dx in [-1, 0, 1]:
+            for dy in [-1, 0, 1]:
+                if dx == 0 and dy == 0:
+                    continue
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < altura and 0 <= ny < largura and not visitados[nx, ny]:
+                    visitados[nx, ny] = True
+                    valor_vizinho = img_gray_ubyte[nx, ny]
+                    if abs(int(valor_vizinho) - int(valor_semente)) <= limiar_similaridade:
+                        img_segmentada[nx, ny] = 255
+                        pilha.push((nx, ny), valor_vizinho)
+    return img_segmentada > 0
@@ -0,0 +1,138 @@
+import functools
+import time
+import cv2
+import numpy as np
+import scipy.fft
+
+# Todos os backends operam sobre os dois últimos eixos de um array (..., linhas, colunas)
+# e trocam meias-espectros complexas no layout de rfft2 (colunas // 2 + 1 colunas).
+
+
+def _rfft2_numpy(img, workers=None):
+    return np.fft.rfft2(img)
+
+
+def _irfft2_numpy(espectro, shape, workers=None):
+    return np.fft.irfft2(espectro, s=shape)
+
+
+def _rfft2_scipy(img, workers=None):
+    return scipy.fft.rfft2(img, workers=workers)
+
+
+def _irfft2_scipy(espectro, shape, workers=None):
+    return scipy.fft.irfft2(espectro, s=shape, workers=workers)
+
+
+def _rfft2_opencv(img, workers=None):
+    img = np.ascontiguousarray(img, dtype=np.float32)
+    cols = img.shape[-1]
+    meio = cols // 2 + 1
+    espectro = np.empty(img.shape[:-1] + (meio,), np.complex64)
+    # cv2.dft só trata matrizes 2-D; pilhas são percorridas quadro a quadro
+    for idx in np.ndindex(img.shape[:-2]):
+        dft = cv2.dft(img[idx], flags=cv2.DFT_COMPLEX_OUTPUT)
+        espectro[idx] = dft[:, :meio].view(np.complex64)[..., 0]
+    return espectro
+
+
+def _irfft2_opencv(espectro, shape, workers=None):
+    rows, cols = shape
+    meio = espectro.shape[-1]
+    # O cv2.idft precisa do espectro completo: a metade que falta é reconstruída pela
+    # simetria Hermitiana F(-u, -v) = conj(F(u, v)) de sinais reais
+    linhas_espelhadas = (-np.arange(rows)) % rows
+    colunas_espelhadas = cols - np.arange(meio, cols)
+    img = np.empty(espectro.shape[:-2] + (rows, cols), np.float32)
+    completo = np.empty((rows, cols), np.complex64)
+    for idx in np.ndindex(espectro.shape[:-2]):
+        completo[:, :meio] = espectro[idx]
+        completo[:, meio:] = np.conj(espectro[idx][linhas_espelhadas][:, colunas_espelhadas])
+        img[idx] = cv2.idft(completo.view(np.float32).reshape(rows, cols, 2),
+                            flags=cv2.DFT_SCALE | cv2.DFT_REAL_OUTPUT)
+    return img
+
+
+BACKENDS_FFT = {
+    "numpy": (_rfft2_numpy, _irfft2_numpy),
+    "scipy": (_rfft2_scipy, _irfft2_scipy),
+    "opencv": (_rfft2_opencv, _irfft2_opencv),
+}
+
+
+def tamanho_otimo_dft(shape):
+    """
+    Retorna as dimensões (linhas, colunas) ótimas para a DFT segundo cv2.getOptimalDFTSize.
+
+    Args:
+        shape (tuple): Dimensões originais; apenas os dois últimos eixos são usados.
+
+    Returns:
+        tuple: (linhas, colunas) preenchidas.
+    """
+    rows, cols = shape[-2:]
+    return cv2.getOptimalDFTSize(rows), cv2.getOptimalDFTSize(cols)
+
+
+def medir_backends_fft(shape, workers=None, repeticoes=3):
+    """
+    Mede o tempo de ida e volta (rfft2 + irfft2) de cada backend para um shape.
+
+    Args:
+        shape (tuple): Forma do array a transformar, (..., linhas, colunas).
+        workers (int): Número de threads repassado aos backends que o suportam (scipy).
+        repeticoes (int): Número de repetições; o menor tempo é retornado.
+
+    Returns:
+        dict: Nome do backend -> tempo em segundos.
+    """
+    img = np.random.default_rng(0).random(shape, dtype=np.float32)
+    tempos = {}
+    for nome, (rfft2, irfft2) in BACKENDS_FFT.items():
+        irfft2(rfft2(img, workers), shape[-2:], workers)  # aquecimento (planos internos)
+        melhor = float("inf")
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            irfft2(rfft2(img, workers), shape[-2:], workers)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        tempos[nome] = melhor
+    return tempos
+
+
+@functools.lru_cache(maxsize=64)
+def escolher_backend_fft(shape, workers=None, repeticoes=3):
+    """
+    Escolhe (e memoriza) o backend mais rápido para um shape.
+
+    Args:
+        shape (tuple): Forma do array a transformar, (..., linhas, colunas).
+        workers (int): Número de threads para os backends que o suportam.
+        repeticoes (int): Número de repetições por backend.
+
+    Returns:
+        str: Nome do backend mais rápido.
+    """
+    tempos = medir_backends_fft(tuple(shape), workers, repeticoes)
+    return min(tempos, key=tempos.get)
+
+
+def obter_backend_fft(nome, shape=None, workers=None):
+    """
+    Retorna o par de funções (rfft2, irfft2) de um backend.
+
+    Args:
+        nome (str): "numpy", "scipy", "opencv" ou "auto" (escolhe o mais rápido para shape).
+        shape (tuple): Obrigatório para "auto".
+        workers (int): Número de threads para os backends que o suportam.
+
+    Returns:
+        tuple: (nome_resolvido, rfft2, irfft2).
+    """
+    if nome == "auto":
+        if shape is None:
+            raise ValueError("O backend 'auto' exige o shape a ser transformado.")
+        nome = escolher_backend_fft(tuple(shape), workers)
+    if nome not in BACKENDS_FFT:
+        raise ValueError(f"Backend de FFT desconhecido: {nome}. Use um de {tuple(BACKENDS_FFT)} ou 'auto'.")
+    rfft2, irfft2 = BACKENDS_FFT[nome]
+    return nome, rfft2, irfft2
@@ -0,0 +1,151 @@
+import functools
+import numpy as np
+
+# Tipos de função de transferência e bandas suportados pelo banco de filtros
+TIPOS_FILTRO = ("gaussiano", "butterworth", "ideal")
+BANDAS_FILTRO = ("passa_baixa", "passa_alta", "passa_banda")
+
+# Número máximo de máscaras mantidas em memória (LRU)
+TAMANHO_CACHE_MASCARAS = 32
+
+
+def _distancias_ao_centro(shape):
+    """
+    Calcula a distância de cada posição do espectro deslocado (fftshift) ao centro,
+    usando broadcasting em vez de laços por pixel.
+
+    O cálculo é feito em float64 (como no laço original) e convertido para o dtype
+    da máscara apenas no final.
+
+    Args:
+        shape (tuple): Dimensões (linhas, colunas) do espectro.
+
+    Returns:
+        numpy.ndarray: Matriz (linhas, colunas) com as distâncias D(u, v).
+    """
+    rows, cols = shape
+    crow, ccol = rows // 2, cols // 2
+    u = np.arange(rows, dtype=np.float64) - crow
+    v = np.arange(cols, dtype=np.float64) - ccol
+    return np.sqrt(u[:, np.newaxis] ** 2 + v[np.newaxis, :] ** 2)
+
+
+def _passa_baixa(D, tipo, D0, ordem):
+    if tipo == "gaussiano":
+        return np.exp(-(D ** 2) / (2 * D0 ** 2))
+    if tipo == "butterworth":
+        return 1 / (1 + (D / D0) ** (2 * ordem))
+    return (D <= D0).astype(D.dtype)
+
+
+def _passa_banda(D, tipo, D0, ordem, largura):
+    # D0 é o raio central da banda e largura a sua espessura
+    if tipo == "ideal":
+        return ((D >= D0 - largura / 2) & (D <= D0 + largura / 2)).astype(D.dtype)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if tipo == "gaussiano":
+            H = np.exp(-(((D ** 2 - D0 ** 2) / (D * largura)) ** 2))
+        else:
+            H = 1 - 1 / (1 + ((D * largura) / (D ** 2 - D0 ** 2)) ** (2 * ordem))
+    # Em D = 0 (gaussiano) e D = D0 (butterworth) as expressões ficam indeterminadas
+    H[D == 0] = 0
+    H[D == D0] = 1
+    return H
+
+
+def _distancias_rfft(shape, shape_original):
+    """
+    Calcula as distâncias D(u, v) no layout não deslocado da meia-espectro de rfft2
+    (frequência zero em [0, 0], apenas as colunas 0..colunas // 2).
+
+    As frequências são expressas nas unidades de índice da imagem original, de modo
+    que o preenchimento até um tamanho ótimo de DFT não altera a frequência de corte.
+
+    Args:
+        shape (tuple): Dimensões (linhas, colunas) do sinal transformado (já preenchido).
+        shape_original (tuple): Dimensões da imagem antes do preenchimento.
+
+    Returns:
+        numpy.ndarray: Matriz (linhas, colunas // 2 + 1) com as distâncias.
+    """
+    rows, cols = shape
+    rows_orig, cols_orig = shape_original
+    u = np.fft.fftfreq(rows) * rows_orig
+    v = np.fft.rfftfreq(cols) * cols_orig
+    return np.sqrt(u[:, np.newaxis] ** 2 + v[np.newaxis, :] ** 2)
+
+
+@functools.lru_cache(maxsize=TAMANHO_CACHE_MASCARAS)
+def _criar_mascara_em_cache(shape, tipo, banda, D0, ordem, largura, dtype, layout, shape_original):
+    if layout == "rfft":
+        D = _distancias_rfft(shape, shape_original)
+    else:
+        D = _distancias_ao_centro(shape)
+    if banda == "passa_baixa":
+        H = _passa_baixa(D, tipo, D0, ordem)
+    elif banda == "passa_alta":
+        H = 1 - _passa_baixa(D, tipo, D0, ordem)
+    else:
+        H = _passa_banda(D, tipo, D0, ordem, largura)
+    H = H.astype(dtype)
+    # A máscara é compartilhada entre chamadas, então é protegida contra escrita
+    H.setflags(write=False)
+    return H
+
+
+def criar_mascara(shape, tipo="gaussiano", banda="passa_baixa", D0=30, ordem=2, largura=None, dtype=np.float32,
+                  layout="centrado", shape_original=None):
+    """
+    Cria (ou recupera do cache) a função de transferência de um filtro de frequência.
+
+    No layout "centrado" a máscara segue o espectro após np.fft.fftshift. No layout
+    "rfft" ela segue a meia-espectro não deslocada de rfft2, com forma
+    (linhas, colunas // 2 + 1), e pode ser aplicada sem fftshift/ifftshift.
+
+    As máscaras são memorizadas em um cache LRU limitado, indexado por
+    (shape, tipo, banda, D0, ordem, largura, dtype, layout), de forma que uma
+    sequência de quadros do mesmo tamanho não reconstrói a máscara a cada chamada.
+
+    Args:
+        shape (tuple): Dimensões (linhas, colunas) do espectro.
+        tipo (str): "gaussiano", "butterworth" ou "ideal".
+        banda (str): "passa_baixa", "passa_alta" ou "passa_banda".
+        D0 (float): Frequência de corte (ou raio central da banda, para passa_banda).
+        ordem (int): Ordem do filtro Butterworth (ignorada pelos demais tipos).
+        largura (float): Largura da banda; obrigatória para passa_banda.
+        dtype (numpy.dtype): Tipo de ponto flutuante da máscara.
+        layout (str): "centrado" ou "rfft".
+        shape_original (tuple): Apenas para o layout "rfft": dimensões da imagem antes
+                                do preenchimento. Por padrão, igual a shape.
+
+    Returns:
+        numpy.ndarray: Máscara somente leitura.
+    """
+    if tipo not in TIPOS_FILTRO:
+        raise ValueError(f"Tipo de filtro desconhecido: {tipo}. Use um de {TIPOS_FILTRO}.")
+    if banda not in BANDAS_FILTRO:
+        raise ValueError(f"Banda de filtro desconhecida: {banda}. Use uma de {BANDAS_FILTRO}.")
+    if banda == "passa_banda" and largura is None:
+        raise ValueError("O filtro passa_banda exige o parâmetro largura.")
+    if tipo != "butterworth":
+        ordem = None
+    if banda != "passa_banda":
+        largura = None
+    if layout not in ("centrado", "rfft"):
+        raise ValueError(f"Layout de máscara desconhecido: {layout}. Use 'centrado' ou 'rfft'.")
+    shape = tuple(int(n) for n in shape)
+    if layout == "rfft":
+        shape_original = shape if shape_original is None else tuple(int(n) for n in shape_original)
+    else:
+        shape_original = None
+    return _criar_mascara_em_cache(shape, tipo, banda, float(D0), ordem, largura, np.dtype(dtype).str, layout, shape_original)
+
+
+def limpar_cache_mascaras():
+    """Descarta todas as máscaras memorizadas."""
+    _criar_mascara_em_cache.cache_clear()
+
+
+def info_cache_mascaras():
+    """Retorna as estatísticas (hits, misses, maxsize, currsize) do cache de máscaras."""
+    return _criar_mascara_em_cache.cache_info()
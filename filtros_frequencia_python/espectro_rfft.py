@@ -0,0 +1,133 @@
+import collections
+import numpy as np
+
+from .backends_fft import obter_backend_fft, tamanho_otimo_dft
+from .banco_filtros import criar_mascara
+
+# Meia-espectro de rfft2 e os metadados necessários para invertê-la
+EspectroRFFT = collections.namedtuple(
+    "EspectroRFFT", ["espectro", "shape_original", "shape_preenchido", "backend", "workers"]
+)
+
+
+def transformar_rfft(img, backend="numpy", workers=None, preencher=True):
+    """
+    Calcula uma única vez a meia-espectro (rfft2) dos dois últimos eixos de img.
+
+    Args:
+        img (numpy.ndarray): Imagem (linhas, colunas) ou pilha (..., linhas, colunas).
+        backend (str): "numpy", "scipy", "opencv" ou "auto".
+        workers (int): Número de threads para os backends que o suportam (scipy).
+        preencher (bool): Se True, preenche com zeros até o tamanho ótimo de DFT
+                          (cv2.getOptimalDFTSize).
+
+    Returns:
+        EspectroRFFT: Espectro complexo não deslocado e metadados para a inversa.
+    """
+    img = np.asarray(img, dtype=np.float32)
+    shape_original = img.shape[-2:]
+    shape_preenchido = tamanho_otimo_dft(shape_original) if preencher else shape_original
+    if shape_preenchido != shape_original:
+        preenchimento = [(0, 0)] * (img.ndim - 2) + [
+            (0, shape_preenchido[0] - shape_original[0]),
+            (0, shape_preenchido[1] - shape_original[1]),
+        ]
+        img = np.pad(img, preenchimento)
+    nome, rfft2, _ = obter_backend_fft(backend, img.shape, workers)
+    return EspectroRFFT(rfft2(img, workers), shape_original, shape_preenchido, nome, workers)
+
+
+def mascara_rfft(espectro_rfft, tipo="gaussiano", banda="passa_baixa", D0=30, ordem=2, largura=None):
+    """
+    Retorna a máscara (em cache) no layout da meia-espectro de espectro_rfft.
+
+    Args:
+        espectro_rfft (EspectroRFFT): Resultado de transformar_rfft.
+        tipo, banda, D0, ordem, largura: Parâmetros repassados a criar_mascara.
+
+    Returns:
+        numpy.ndarray: Máscara (linhas_preenchidas, colunas_preenchidas // 2 + 1).
+    """
+    return criar_mascara(espectro_rfft.shape_preenchido, tipo, banda, D0, ordem, largura,
+                         layout="rfft", shape_original=espectro_rfft.shape_original)
+
+
+def inverter_rfft(espectro_rfft, espectro_filtrado):
+    """
+    Volta ao domínio espacial e recorta o preenchimento.
+
+    Args:
+        espectro_rfft (EspectroRFFT): Transformada original (fornece shape e backend).
+        espectro_filtrado (numpy.ndarray): Meia-espectro já multiplicada pela máscara.
+
+    Returns:
+        numpy.ndarray: Imagem filtrada (float32) com a forma original.
+    """
+    _, _, irfft2 = obter_backend_fft(espectro_rfft.backend)
+    img = irfft2(espectro_filtrado, espectro_rfft.shape_preenchido, espectro_rfft.workers)
+    rows, cols = espectro_rfft.shape_original
+    return img[..., :rows, :cols].astype(np.float32, copy=False)
+
+
+def filtrar_espectro_rfft(espectro_rfft, tipo="gaussiano", banda="passa_baixa", D0=30, ordem=2, largura=None):
+    """
+    Aplica um filtro a uma meia-espectro já calculada, sem fftshift/ifftshift.
+
+    Args:
+        espectro_rfft (EspectroRFFT): Resultado de transformar_rfft.
+        tipo, banda, D0, ordem, largura: Parâmetros repassados a criar_mascara.
+
+    Returns:
+        numpy.ndarray: Imagem filtrada (float32) com a forma original.
+    """
+    mascara = mascara_rfft(espectro_rfft, tipo, banda, D0, ordem, largura)
+    return inverter_rfft(espectro_rfft, espectro_rfft.espectro * mascara)
+
+
+def filtrar_frequencia_rfft(img, filtros, backend="numpy", workers=None, preencher=True):
+    """
+    Aplica vários filtros de frequência compartilhando uma única transformada direta.
+
+    Args:
+        img (numpy.ndarray): Imagem (linhas, colunas) ou pilha (..., linhas, colunas).
+        filtros (dict): Nome do resultado -> parâmetros de criar_mascara, por exemplo
+                        {"passa_baixa": {"tipo": "gaussiano", "banda": "passa_baixa", "D0": 30}}.
+        backend (str): "numpy", "scipy", "opencv" ou "auto".
+        workers (int): Número de threads para os backends que o suportam (scipy).
+        preencher (bool): Se True, preenche até o tamanho ótimo de DFT.
+
+    Returns:
+        tuple: (EspectroRFFT, dict nome -> imagem filtrada float32).
+    """
+    espectro_rfft = transformar_rfft(img, backend, workers, preencher)
+    resultados = {nome: filtrar_espectro_rfft(espectro_rfft, **params) for nome, params in filtros.items()}
+    return espectro_rfft, resultados
+
+
+def magnitude_espectro_centrada(espectro, cols, shape_original=None):
+    """
+    Reconstrói o espectro de magnitude completo e centrado (como após fftshift) a partir
+    de uma meia-espectro, para visualização.
+
+    Args:
+        espectro (numpy.ndarray): Meia-espectro (linhas, cols // 2 + 1).
+        cols (int): Número de colunas do sinal transformado.
+        shape_original (tuple): Se dado, recorta uma janela (linhas, colunas) com a
+                                frequência zero na mesma posição que no fftshift da
+                                imagem sem preenchimento, para que a saída tenha o
+                                tamanho da imagem.
+
+    Returns:
+        numpy.ndarray: Magnitude (linhas, cols) float32 centrada, ou shape_original.
+    """
+    rows, meio = espectro.shape
+    magnitude = np.empty((rows, cols), np.float32)
+    magnitude[:, :meio] = np.abs(espectro)
+    # |F(-u, -v)| = |F(u, v)| para sinais reais
+    magnitude[:, meio:] = magnitude[(-np.arange(rows)) % rows][:, cols - np.arange(meio, cols)]
+    magnitude = np.fft.fftshift(magnitude)
+    if shape_original is None or tuple(shape_original) == (rows, cols):
+        return magnitude
+    linhas, colunas = shape_original
+    inicio_linha, inicio_coluna = rows // 2 - linhas // 2, cols // 2 - colunas // 2
+    return np.ascontiguousarray(magnitude[inicio_linha:inicio_linha + linhas, inicio_coluna:inicio_coluna + colunas])
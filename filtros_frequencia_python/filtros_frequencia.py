@@ -1,111 +1,190 @@
+import collections
+import logging
 import cv2
 import numpy as np
-from matplotlib import pyplot as plt
 import os
-import skimage.io
 from skimage import img_as_ubyte, color, exposure
 
-def aplicar_filtros_frequencia(caminho_imagem_entrada, caminho_imagem_saida_base):
+from utilitarios.cache_resultados import executar_etapa, hash_arquivo, hash_array
+from utilitarios.instrumentacao import configurar_log, contar, etapa, instrumentar
+from utilitarios.io_imagens import carregar_imagem, gravar
+from .banco_filtros import criar_mascara
+from .espectro_rfft import EspectroRFFT, inverter_rfft, magnitude_espectro_centrada, mascara_rfft, transformar_rfft
+
+logger = logging.getLogger(__name__)
+
+ResultadoFiltrosFrequencia = collections.namedtuple("ResultadoFiltrosFrequencia", [
+    "img_gray_ubyte", "magnitude_espectro_original", "passa_baixa", "magnitude_espectro_passa_baixa",
+    "passa_alta", "magnitude_espectro_passa_alta", "D0_passa_baixa", "D0_passa_alta", "modo", "backend",
+])
+
+
+def _magnitude_uint8(magnitude_espectro):
+    return cv2.normalize(magnitude_espectro, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+
+
+def converter_para_cinza(img):
     """
-    Aplica filtros de frequência (passa-baixa e passa-alta Gaussiano) a uma imagem.
+    Converte a imagem para a escala de cinza usada pelos filtros (rgb2gray para imagens
+    RGB; imagens em cinza são usadas como estão).
 
     Args:
-        caminho_imagem_entrada (str): Caminho para a imagem de entrada.
-        caminho_imagem_saida_base (str): Caminho base para salvar as imagens de saída (sem extensão).
+        img (numpy.ndarray): Imagem (linhas, colunas) ou (linhas, colunas, 3).
+
+    Returns:
+        numpy.ndarray: Imagem em cinza.
     """
-    print(f"[DEBUG] Iniciando aplicar_filtros_frequencia para: {caminho_imagem_entrada}")
-    diretorio_saida = os.path.dirname(caminho_imagem_saida_base)
-    if not os.path.exists(diretorio_saida):
-        os.makedirs(diretorio_saida)
-        print(f"[DEBUG] Diretório de saída criado: {diretorio_saida}")
+    if len(img.shape) == 3:
+        return color.rgb2gray(img)
+    return img
 
-    img = skimage.io.imread(caminho_imagem_entrada)
-    if img is None:
-        print(f"[ERRO] Erro ao carregar a imagem: {caminho_imagem_entrada}")
-        return
-    print(f"[DEBUG] Imagem carregada: {caminho_imagem_entrada}, shape: {img.shape}")
 
-    if len(img.shape) == 3:
-        img_gray = color.rgb2gray(img)
-    else:
-        img_gray = img
-    
-    img_gray_ubyte = img_as_ubyte(img_gray)
-    print(f"[DEBUG] Imagem convertida para escala de cinza ubyte, shape: {img_gray_ubyte.shape}")
+@instrumentar("cinza", "filtros_frequencia")
+def _etapa_cinza(img):
+    img_gray = converter_para_cinza(img)
+    return {"img_gray": img_gray, "img_gray_ubyte": img_as_ubyte(img_gray)}
+
 
+@instrumentar("transformada", "filtros_frequencia")
+def _etapa_dft(img_gray, modo, backend, workers):
+    if modo == "rfft":
+        # Meia-espectro não deslocada: uma única transformada direta compartilhada pelos
+        # filtros, máscaras aplicadas sem fftshift/ifftshift
+        espectro_rfft = transformar_rfft(img_gray, backend, workers)
+        # Magnitude recortada ao tamanho da imagem, como no modo "completo"
+        magnitude = 20 * np.log(magnitude_espectro_centrada(espectro_rfft.espectro, espectro_rfft.shape_preenchido[1],
+                                                            espectro_rfft.shape_original) + 1e-6)
+        return {"espectro": espectro_rfft.espectro, "shape_original": np.array(espectro_rfft.shape_original),
+                "shape_preenchido": np.array(espectro_rfft.shape_preenchido), "backend": np.array(espectro_rfft.backend),
+                "magnitude": magnitude}
     # Transformada de Fourier
     dft = cv2.dft(np.float32(img_gray), flags=cv2.DFT_COMPLEX_OUTPUT)
     dft_shift = np.fft.fftshift(dft)
-    magnitude_spectrum_original = 20 * np.log(cv2.magnitude(dft_shift[:, :, 0], dft_shift[:, :, 1]) + 1e-6) # Adicionado 1e-6 para evitar log(0)
-
-    rows, cols = img_gray.shape
-    crow, ccol = rows // 2, cols // 2
-
-    # --- Filtro Passa-Baixa Gaussiano ---
-    print("[DEBUG] Aplicando Filtro Passa-Baixa Gaussiano")
-    # Criar máscara para filtro passa-baixa (exemplo com D0 = 30)
-    D0_low = 30
-    mask_low = np.zeros((rows, cols, 2), np.float32)
-    for r in range(rows):
-        for c in range(cols):
-            D = np.sqrt((r - crow)**2 + (c - ccol)**2)
-            mask_low[r, c, 0] = np.exp(-(D**2) / (2 * D0_low**2))
-            mask_low[r, c, 1] = np.exp(-(D**2) / (2 * D0_low**2))
-
-    fshift_low = dft_shift * mask_low
-    magnitude_spectrum_low = 20 * np.log(cv2.magnitude(fshift_low[:, :, 0], fshift_low[:, :, 1]) + 1e-6)
-    f_ishift_low = np.fft.ifftshift(fshift_low)
-    img_back_low = cv2.idft(f_ishift_low, flags=cv2.DFT_SCALE | cv2.DFT_REAL_OUTPUT)
-    img_back_low_norm = cv2.normalize(img_back_low, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
-
-    # --- Filtro Passa-Alta Gaussiano ---
-    print("[DEBUG] Aplicando Filtro Passa-Alta Gaussiano")
-    # Criar máscara para filtro passa-alta (exemplo com D0 = 30)
-    D0_high = 30
-    mask_high = np.zeros((rows, cols, 2), np.float32)
-    for r in range(rows):
-        for c in range(cols):
-            D = np.sqrt((r - crow)**2 + (c - ccol)**2)
-            mask_high[r, c, 0] = 1 - np.exp(-(D**2) / (2 * D0_high**2))
-            mask_high[r, c, 1] = 1 - np.exp(-(D**2) / (2 * D0_high**2))
-    
-    fshift_high = dft_shift * mask_high
-    magnitude_spectrum_high = 20 * np.log(cv2.magnitude(fshift_high[:, :, 0], fshift_high[:, :, 1]) + 1e-6)
-    f_ishift_high = np.fft.ifftshift(fshift_high)
-    img_back_high = cv2.idft(f_ishift_high, flags=cv2.DFT_SCALE | cv2.DFT_REAL_OUTPUT)
-    img_back_high_norm = cv2.normalize(img_back_high, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
-
-    # Salvar imagens
-    print("[DEBUG] Iniciando salvamento de imagens.")
-    skimage.io.imsave(f"{caminho_imagem_saida_base}_original_gray.png", img_gray_ubyte)
-    skimage.io.imsave(f"{caminho_imagem_saida_base}_magnitude_spectrum_original.png", cv2.normalize(magnitude_spectrum_original, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8))
-    skimage.io.imsave(f"{caminho_imagem_saida_base}_passa_baixa_gaussiano.png", img_back_low_norm)
-    skimage.io.imsave(f"{caminho_imagem_saida_base}_magnitude_spectrum_low.png", cv2.normalize(magnitude_spectrum_low, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8))
-    skimage.io.imsave(f"{caminho_imagem_saida_base}_passa_alta_gaussiano.png", img_back_high_norm)
-    skimage.io.imsave(f"{caminho_imagem_saida_base}_magnitude_spectrum_high.png", cv2.normalize(magnitude_spectrum_high, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8))
-    print(f"[DEBUG] Imagens de filtros de frequência salvas em {diretorio_saida}")
-
-    # Plotar e salvar figura combinada
-    print("[DEBUG] Iniciando plotagem e salvamento da figura combinada.")
+    magnitude = 20 * np.log(cv2.magnitude(dft_shift[:, :, 0], dft_shift[:, :, 1]) + 1e-6) # Adicionado 1e-6 para evitar log(0)
+    return {"dft_shift": dft_shift, "magnitude": magnitude}
+
+
+@instrumentar("filtragem", "filtros_frequencia")
+def _etapa_filtro(dft, modo, banda, D0, workers):
+    if modo == "rfft":
+        espectro_rfft = EspectroRFFT(dft["espectro"], tuple(int(v) for v in dft["shape_original"]),
+                                     tuple(int(v) for v in dft["shape_preenchido"]), str(dft["backend"]), workers)
+        mascara = mascara_rfft(espectro_rfft, "gaussiano", banda, D0)
+        fshift = espectro_rfft.espectro * mascara
+        magnitude = 20 * np.log(magnitude_espectro_centrada(fshift, espectro_rfft.shape_preenchido[1],
+                                                            espectro_rfft.shape_original) + 1e-6)
+        img_back = inverter_rfft(espectro_rfft, fshift)
+    else:
+        dft_shift = dft["dft_shift"]
+        # A mesma máscara vale para as partes real e imaginária (broadcasting no último eixo)
+        mascara = criar_mascara(dft_shift.shape[:2], "gaussiano", banda, D0)[:, :, np.newaxis]
+        fshift = dft_shift * mascara
+        magnitude = 20 * np.log(cv2.magnitude(fshift[:, :, 0], fshift[:, :, 1]) + 1e-6)
+        f_ishift = np.fft.ifftshift(fshift)
+        img_back = cv2.idft(f_ishift, flags=cv2.DFT_SCALE | cv2.DFT_REAL_OUTPUT)
+    img_back_norm = cv2.normalize(img_back, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+    return {"filtrada": img_back_norm, "magnitude": magnitude}
+
+
+def calcular_filtros_frequencia(img, modo="completo", backend="numpy", workers=None, D0_passa_baixa=30, D0_passa_alta=30,
+                                cache=None, chave_imagem=None):
+    """
+    Aplica os filtros passa-baixa e passa-alta Gaussianos a uma imagem em memória, sem
+    ler nem escrever arquivos e sem gerar figuras.
+
+    As etapas (conversão para cinza, transformada e cada filtro) podem ser guardadas em
+    um CacheResultados: mudar só o D0 de um filtro reaproveita a transformada.
+
+    Args:
+        img (numpy.ndarray): Imagem (linhas, colunas) ou (linhas, colunas, canais).
+        modo (str): "completo" usa cv2.dft com espectro complexo completo e fftshift (método original).
+                    "rfft" usa meia-espectro (rfft2/irfft2) com preenchimento até o tamanho ótimo
+                    de DFT e uma única transformada direta para todos os filtros.
+        backend (str): Apenas para o modo "rfft": "numpy", "scipy", "opencv" ou "auto".
+        workers (int): Apenas para o modo "rfft": threads repassadas ao backend scipy.
+        D0_passa_baixa (float): Frequência de corte do passa-baixa.
+        D0_passa_alta (float): Frequência de corte do passa-alta.
+        cache (CacheResultados): Cache das etapas (opcional).
+        chave_imagem (str): Chave da imagem no cache (por exemplo, o hash do arquivo);
+                            se None, é o hash do conteúdo de img.
+
+    Returns:
+        ResultadoFiltrosFrequencia: Imagem em cinza, imagens filtradas normalizadas (uint8) e
+                                    espectros de magnitude em escala log (float, centrados).
+    """
+    if modo not in ("completo", "rfft"):
+        raise ValueError(f"Modo desconhecido: {modo}. Use 'completo' ou 'rfft'.")
+    if cache is not None and chave_imagem is None:
+        chave_imagem = hash_array(img)
+
+    chave_cinza, cinza = executar_etapa(cache, "filtros_frequencia.cinza", [chave_imagem], {}, lambda: _etapa_cinza(img))
+    parametros_dft = {"modo": modo, "backend": backend if modo == "rfft" else None}
+    chave_dft, dft = executar_etapa(cache, "filtros_frequencia.dft", [chave_cinza], parametros_dft,
+                                    lambda: _etapa_dft(cinza["img_gray"], modo, backend, workers))
+    _, passa_baixa = executar_etapa(cache, "filtros_frequencia.filtro", [chave_dft],
+                                    {"tipo": "gaussiano", "banda": "passa_baixa", "D0": D0_passa_baixa},
+                                    lambda: _etapa_filtro(dft, modo, "passa_baixa", D0_passa_baixa, workers))
+    _, passa_alta = executar_etapa(cache, "filtros_frequencia.filtro", [chave_dft],
+                                   {"tipo": "gaussiano", "banda": "passa_alta", "D0": D0_passa_alta},
+                                   lambda: _etapa_filtro(dft, modo, "passa_alta", D0_passa_alta, workers))
+
+    backend_usado = str(dft["backend"]) if modo == "rfft" else "opencv"
+    return ResultadoFiltrosFrequencia(cinza["img_gray_ubyte"], dft["magnitude"], passa_baixa["filtrada"],
+                                      passa_baixa["magnitude"], passa_alta["filtrada"], passa_alta["magnitude"],
+                                      D0_passa_baixa, D0_passa_alta, modo, backend_usado)
+
+
+@instrumentar("codificacao", "filtros_frequencia")
+def salvar_filtros_frequencia(resultado, caminho_imagem_saida_base, gravador=None):
+    """
+    Salva as imagens de um ResultadoFiltrosFrequencia em PNG.
+
+    Args:
+        resultado (ResultadoFiltrosFrequencia): Saída de calcular_filtros_frequencia.
+        caminho_imagem_saida_base (str): Caminho base das imagens de saída (sem extensão).
+        gravador (GravadorImagens): Grava em segundo plano (e com o nível de compressão ou o
+                                    formato dele); se None, grava na hora com skimage.io.
+    """
+    gravar(f"{caminho_imagem_saida_base}_original_gray.png", resultado.img_gray_ubyte, gravador)
+    gravar(f"{caminho_imagem_saida_base}_magnitude_spectrum_original.png", _magnitude_uint8(resultado.magnitude_espectro_original), gravador)
+    gravar(f"{caminho_imagem_saida_base}_passa_baixa_gaussiano.png", resultado.passa_baixa, gravador)
+    gravar(f"{caminho_imagem_saida_base}_magnitude_spectrum_low.png", _magnitude_uint8(resultado.magnitude_espectro_passa_baixa), gravador)
+    gravar(f"{caminho_imagem_saida_base}_passa_alta_gaussiano.png", resultado.passa_alta, gravador)
+    gravar(f"{caminho_imagem_saida_base}_magnitude_spectrum_high.png", _magnitude_uint8(resultado.magnitude_espectro_passa_alta), gravador)
+
+
+@instrumentar("renderizacao", "filtros_frequencia")
+def renderizar_filtros_frequencia(resultado, caminho_imagem_saida_base):
+    """
+    Gera a figura de comparação de um ResultadoFiltrosFrequencia (matplotlib é importado só aqui).
+
+    Args:
+        resultado (ResultadoFiltrosFrequencia): Saída de calcular_filtros_frequencia.
+        caminho_imagem_saida_base (str): Caminho base da figura (sem extensão).
+
+    Returns:
+        str: Caminho da figura salva.
+    """
+    from matplotlib import pyplot as plt
     fig, axes = plt.subplots(2, 3, figsize=(15, 10))
     ax = axes.ravel()
 
-    ax[0].imshow(img_gray_ubyte, cmap="gray")
+    ax[0].imshow(resultado.img_gray_ubyte, cmap="gray")
     ax[0].set_title("Imagem Original Cinza")
-    ax[1].imshow(magnitude_spectrum_original, cmap="gray")
+    ax[1].imshow(resultado.magnitude_espectro_original, cmap="gray")
     ax[1].set_title("Espectro de Magnitude Original")
     ax[2].axis("off") # Espaço vazio
 
-    ax[3].imshow(img_back_low_norm, cmap="gray")
-    ax[3].set_title("Filtro Passa-Baixa Gaussiano (D0=30)")
-    ax[4].imshow(img_back_high_norm, cmap="gray")
-    ax[4].set_title("Filtro Passa-Alta Gaussiano (D0=30)")
+    ax[3].imshow(resultado.passa_baixa, cmap="gray")
+    ax[3].set_title(f"Filtro Passa-Baixa Gaussiano (D0={resultado.D0_passa_baixa})")
+    ax[4].imshow(resultado.passa_alta, cmap="gray")
+    ax[4].set_title(f"Filtro Passa-Alta Gaussiano (D0={resultado.D0_passa_alta})")
     ax[5].axis("off") # Espaço vazio
-    
+
     # Adicionar espectros filtrados se desejado, ou mais imagens
-    # ax[2].imshow(magnitude_spectrum_low, cmap="gray")
+    # ax[2].imshow(resultado.magnitude_espectro_passa_baixa, cmap="gray")
     # ax[2].set_title("Espectro Pós Passa-Baixa")
-    # ax[5].imshow(magnitude_spectrum_high, cmap="gray")
+    # ax[5].imshow(resultado.magnitude_espectro_passa_alta, cmap="gray")
     # ax[5].set_title("Espectro Pós Passa-Alta")
 
     for a_plot in ax:
@@ -119,12 +198,69 @@ def aplicar_filtros_frequencia(caminho_imagem_entrada, caminho_imagem_saida_base
     path_figura_comparacao = f"{caminho_imagem_saida_base}_comparacao_filtros_frequencia.png"
     plt.savefig(path_figura_comparacao)
     plt.close(fig)
-    print(f"[DEBUG] Figura de comparação de Filtros de Frequência salva em {path_figura_comparacao}")
-    print(f"[DEBUG] Finalizando aplicar_filtros_frequencia para: {caminho_imagem_entrada}")
+    return path_figura_comparacao
+
+
+def aplicar_filtros_frequencia(caminho_imagem_entrada, caminho_imagem_saida_base, modo="completo", backend="numpy", workers=None,
+                               salvar=True, renderizar=True, cache=None, gravador=None):
+    """
+    Aplica filtros de frequência (passa-baixa e passa-alta Gaussiano) a uma imagem.
+
+    Lê a imagem, chama calcular_filtros_frequencia e, opcionalmente, salva as imagens e a
+    figura de comparação.
+
+    Args:
+        caminho_imagem_entrada (str): Caminho para a imagem de entrada.
+        caminho_imagem_saida_base (str): Caminho base para salvar as imagens de saída (sem extensão).
+        modo (str): "completo" ou "rfft" (ver calcular_filtros_frequencia).
+        backend (str): Apenas para o modo "rfft": "numpy", "scipy", "opencv" ou "auto".
+        workers (int): Apenas para o modo "rfft": threads repassadas ao backend scipy.
+        salvar (bool): Se True, salva as imagens intermediárias e filtradas em PNG.
+        renderizar (bool): Se True, salva a figura de comparação (matplotlib).
+        cache (CacheResultados): Se informado, a decodificação e as etapas são reaproveitadas
+                                 do cache (chave: hash dos bytes do arquivo e parâmetros).
+        gravador (GravadorImagens): Grava os PNGs em segundo plano (ver utilitarios.io_imagens).
+
+    Returns:
+        ResultadoFiltrosFrequencia: Resultado do processamento.
+    """
+    logger.debug("Iniciando aplicar_filtros_frequencia para: %s", caminho_imagem_entrada)
+    if modo not in ("completo", "rfft"):
+        raise ValueError(f"Modo desconhecido: {modo}. Use 'completo' ou 'rfft'.")
+    diretorio_saida = os.path.dirname(caminho_imagem_saida_base)
+    if (salvar or renderizar) and not os.path.exists(diretorio_saida):
+        os.makedirs(diretorio_saida)
+        logger.debug("Diretório de saída criado: %s", diretorio_saida)
+
+    chave_arquivo = hash_arquivo(caminho_imagem_entrada) if cache is not None else None
+    with etapa("decodificacao", "filtros_frequencia", arquivo=caminho_imagem_entrada):
+        chave_imagem, decodificada = executar_etapa(cache, "imagem", [chave_arquivo], {},
+                                                    lambda: {"imagem": carregar_imagem(caminho_imagem_entrada)})
+    img = decodificada["imagem"]
+    if img is None:
+        logger.error("Erro ao carregar a imagem: %s", caminho_imagem_entrada)
+        return
+    logger.debug("Imagem carregada: %s, shape: %s", caminho_imagem_entrada, img.shape)
+    contar("imagens")
+    contar("pixels", img.shape[0] * img.shape[1])
+
+    resultado = calcular_filtros_frequencia(img, modo, backend, workers, cache=cache, chave_imagem=chave_imagem)
+    logger.debug("Filtros aplicados no modo %s (backend: %s)", modo, resultado.backend)
+
+    if salvar:
+        salvar_filtros_frequencia(resultado, caminho_imagem_saida_base, gravador)
+        logger.debug("Imagens de filtros de frequência salvas em %s", diretorio_saida)
+
+    if renderizar:
+        path_figura_comparacao = renderizar_filtros_frequencia(resultado, caminho_imagem_saida_base)
+        logger.debug("Figura de comparação de Filtros de Frequência salva em %s", path_figura_comparacao)
+    logger.debug("Finalizando aplicar_filtros_frequencia para: %s", caminho_imagem_entrada)
+    return resultado
 
 if __name__ == "__main__":
-    base_path_projeto = "/home/ubuntu/trabalho_faculdade_python"
-    path_modulo_freq = os.path.join(base_path_projeto, "filtros_frequencia_python")
+    configurar_log()
+    # Caminhos relativos ao próprio módulo: funciona de qualquer pasta
+    path_modulo_freq = os.path.dirname(os.path.abspath(__file__))
     path_imagens_exemplos_freq = os.path.join(path_modulo_freq, "imagens_exemplo") # Usar pasta de imagens do módulo
     path_resultados_freq = os.path.join(path_modulo_freq, "resultados_imagens")
 
@@ -134,18 +270,18 @@ if __name__ == "__main__":
     # Imagem de exemplo: camera (da skimage, salva anteriormente)
     img_camera_path = os.path.join(path_imagens_exemplos_freq, "camera_original.png")
     if os.path.exists(img_camera_path):
-        print(f"[MAIN] Processando camera: {img_camera_path}")
+        logger.info("Processando camera: %s", img_camera_path)
         aplicar_filtros_frequencia(img_camera_path, os.path.join(path_resultados_freq, "camera_filtros"))
     else:
-        print(f"[ERRO] Imagem de exemplo camera não encontrada em: {img_camera_path}")
+        logger.error("Imagem de exemplo camera não encontrada em: %s", img_camera_path)
 
     # Imagem de exemplo: text (da skimage, salva anteriormente)
     img_text_path = os.path.join(path_imagens_exemplos_freq, "text_original.png")
     if os.path.exists(img_text_path):
-        print(f"[MAIN] Processando text: {img_text_path}")
+        logger.info("Processando text: %s", img_text_path)
         aplicar_filtros_frequencia(img_text_path, os.path.join(path_resultados_freq, "text_filtros"))
     else:
-        print(f"[ERRO] Imagem de exemplo text não encontrada em: {img_text_path}")
+        logger.error("Imagem de exemplo text não encontrada em: %s", img_text_path)
 
-    print("Processamento de filtros de frequência concluído.")
+    logger.info("Processamento de filtros de frequência concluído.")
 
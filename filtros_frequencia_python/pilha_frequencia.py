@@ -0,0 +1,76 @@
+import cv2
+import numpy as np
+from skimage import color
+
+from .espectro_rfft import inverter_rfft, mascara_rfft, transformar_rfft
+
+FORMATOS_PILHA = ("HW", "NHW", "HWC", "NHWC")
+
+
+def _normalizar_uint8(img, eixos):
+    # A mesma normalização das saídas de aplicar_filtros_frequencia, imagem a imagem:
+    # cv2.normalize seguido de astype(np.uint8), que trunca em vez de arredondar
+    forma_imagem = img.shape[-len(eixos):]
+    imagens = img.reshape((-1, int(np.prod(forma_imagem[:-1])), forma_imagem[-1]))
+    saida = np.empty(imagens.shape, np.uint8)
+    for indice, imagem in enumerate(imagens):
+        saida[indice] = cv2.normalize(imagem, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+    return saida.reshape(img.shape)
+
+
+def filtrar_pilha_frequencia(pilha, tipo="gaussiano", banda="passa_baixa", D0=30, ordem=2, largura=None,
+                             formato="NHW", modo_cor="por_canal", backend="scipy", workers=-1,
+                             preencher=True, normalizar=False):
+    """
+    Aplica um filtro de frequência a uma pilha de imagens (quadros de vídeo, fatias de
+    um volume ou canais de cor) com uma única FFT em lote sobre os dois eixos espaciais.
+
+    A máscara vem do cache do banco de filtros e é aplicada por broadcasting a todos
+    os quadros/canais de uma vez.
+
+    Args:
+        pilha (numpy.ndarray): Array no formato indicado por `formato`.
+        tipo, banda, D0, ordem, largura: Parâmetros do filtro (ver banco_filtros.criar_mascara).
+        formato (str): "HW", "NHW", "HWC" ou "NHWC" (N = quadros, C = canais de cor).
+        modo_cor (str): Para formatos com canais: "por_canal" filtra cada canal de cor
+                        separadamente; "cinza" converte para escala de cinza (rgb2gray) antes.
+        backend (str): Backend de FFT: "numpy", "scipy", "opencv" ou "auto". O padrão é
+                       scipy, cuja FFT em lote divide os quadros entre threads; a rfft2
+                       em lote do numpy é mais lenta que um laço por quadro.
+        workers (int): Threads para os backends que o suportam (scipy); -1 usa todos os núcleos.
+        preencher (bool): Se True, preenche até o tamanho ótimo de DFT.
+        normalizar (bool): Se True, normaliza cada imagem (todos os seus canais juntos)
+                           para uint8 [0, 255], como nas saídas de aplicar_filtros_frequencia.
+
+    Returns:
+        numpy.ndarray: Pilha filtrada (float32, ou uint8 se normalizar) no mesmo formato
+                       da entrada; no modo "cinza" o eixo de canais é removido.
+    """
+    if formato not in FORMATOS_PILHA:
+        raise ValueError(f"Formato de pilha desconhecido: {formato}. Use um de {FORMATOS_PILHA}.")
+    if modo_cor not in ("por_canal", "cinza"):
+        raise ValueError(f"Modo de cor desconhecido: {modo_cor}. Use 'por_canal' ou 'cinza'.")
+    pilha = np.asarray(pilha)
+    if pilha.ndim != len(formato):
+        raise ValueError(f"A pilha tem {pilha.ndim} eixos, mas o formato {formato} espera {len(formato)}.")
+
+    com_canais = formato.endswith("C")
+    if com_canais and modo_cor == "cinza":
+        pilha = color.rgb2gray(pilha[..., :3]).astype(np.float32)
+        com_canais = False
+    elif com_canais:
+        # Canais passam para antes dos eixos espaciais: (..., C, H, W)
+        pilha = np.moveaxis(pilha, -1, -3)
+
+    espectro_rfft = transformar_rfft(pilha, backend, workers, preencher)
+    espectro = espectro_rfft.espectro
+    # A transformada não é compartilhada com outros filtros, então a máscara pode ser
+    # aplicada no próprio espectro, sem outra cópia complexa do tamanho da pilha
+    espectro *= mascara_rfft(espectro_rfft, tipo, banda, D0, ordem, largura)
+    filtrada = inverter_rfft(espectro_rfft, espectro)
+
+    if normalizar:
+        filtrada = _normalizar_uint8(filtrada, (-3, -2, -1) if com_canais else (-2, -1))
+    if com_canais:
+        filtrada = np.moveaxis(filtrada, -3, -1)
+    return filtrada
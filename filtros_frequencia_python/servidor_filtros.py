@@ -0,0 +1,421 @@
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import logging
+import os
+import time
+import urllib.parse
+import cv2
+import numpy as np
+
+from utilitarios.instrumentacao import configurar_log, contar, etapa
+from utilitarios.io_imagens import codificar_png
+from .banco_filtros import BANDAS_FILTRO, TIPOS_FILTRO, info_cache_mascaras
+from .espectro_rfft import inverter_rfft, mascara_rfft, transformar_rfft
+from .filtros_frequencia import converter_para_cinza
+
+logger = logging.getLogger(__name__)
+
+ParametrosFiltro = collections.namedtuple("ParametrosFiltro", ["tipo", "banda", "D0", "ordem", "largura"],
+                                          defaults=("gaussiano", "passa_baixa", 30.0, 2, None))
+
+# Maior corpo de requisição aceito (bytes)
+TAMANHO_MAXIMO_CORPO = 64 * 1024 * 1024
+MENSAGENS_HTTP = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                  413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def ler_parametros_filtro(consulta):
+    """
+    Lê e valida os parâmetros do filtro de uma query string já decodificada.
+
+    Args:
+        consulta (dict): Nome -> lista de valores (urllib.parse.parse_qs).
+
+    Returns:
+        ParametrosFiltro: Parâmetros validados.
+    """
+    valor = lambda nome, padrao: consulta.get(nome, [padrao])[-1]
+    padrao = ParametrosFiltro()
+    tipo, banda = valor("tipo", padrao.tipo), valor("banda", padrao.banda)
+    if tipo not in TIPOS_FILTRO:
+        raise ValueError(f"Tipo de filtro desconhecido: {tipo}. Use um de {TIPOS_FILTRO}.")
+    if banda not in BANDAS_FILTRO:
+        raise ValueError(f"Banda de filtro desconhecida: {banda}. Use uma de {BANDAS_FILTRO}.")
+    D0, ordem = float(valor("D0", padrao.D0)), int(valor("ordem", padrao.ordem))
+    largura = valor("largura", None)
+    if D0 <= 0:
+        raise ValueError("D0 deve ser positivo.")
+    if banda == "passa_banda" and largura is None:
+        raise ValueError("O filtro passa_banda exige o parâmetro largura.")
+    return ParametrosFiltro(tipo, banda, D0, ordem, None if largura is None else float(largura))
+
+
+def decodificar_imagem(dados, forma=None):
+    """
+    Decodifica o corpo de uma requisição para a imagem em cinza usada pelos filtros.
+
+    Args:
+        dados (bytes): Arquivo de imagem (PNG, JPEG, ...) ou pixels uint8 crus; o canal
+                       alfa de imagens RGBA é descartado.
+        forma (str): Para pixels crus, "linhasxcolunas" ou "linhasxcolunasxcanais"; se None,
+                     dados é um arquivo de imagem decodificado com cv2.imdecode.
+
+    Returns:
+        numpy.ndarray: Imagem em cinza (a mesma conversão de calcular_filtros_frequencia).
+    """
+    if forma:
+        dimensoes = tuple(int(n) for n in forma.lower().split("x"))
+        if len(dimensoes) not in (2, 3) or np.prod(dimensoes) != len(dados):
+            raise ValueError(f"A forma {forma} não corresponde aos {len(dados)} bytes recebidos.")
+        imagem = np.frombuffer(dados, np.uint8).reshape(dimensoes)
+        if imagem.ndim == 3 and imagem.shape[2] == 4:
+            imagem = imagem[..., :3]
+    else:
+        imagem = cv2.imdecode(np.frombuffer(dados, np.uint8), cv2.IMREAD_UNCHANGED)
+        if imagem is None:
+            raise ValueError("Não foi possível decodificar a imagem recebida.")
+        if imagem.ndim == 3:
+            imagem = cv2.cvtColor(imagem, cv2.COLOR_BGRA2RGB if imagem.shape[2] == 4 else cv2.COLOR_BGR2RGB)
+    return converter_para_cinza(imagem)
+
+
+def filtrar_lote(imagens, parametros, backend="scipy", workers=-1):
+    """
+    Filtra várias imagens de mesma forma com uma única FFT em lote: a pilha é transformada
+    de uma vez, cada espectro é multiplicado pela máscara do seu filtro (do cache do banco
+    de filtros) e a pilha é invertida de uma vez.
+
+    Args:
+        imagens (list): Imagens em cinza (linhas, colunas), todas com a mesma forma.
+        parametros (list): Um ParametrosFiltro por imagem.
+        backend (str): Backend de FFT (ver backends_fft); "scipy" divide a pilha entre threads.
+        workers (int): Threads do backend scipy; -1 usa todos os núcleos.
+
+    Returns:
+        list: Imagens filtradas normalizadas para uint8, como em calcular_filtros_frequencia.
+    """
+    with etapa("lote", "servidor_filtros", tamanho=len(imagens)):
+        espectro_rfft = transformar_rfft(np.stack(imagens), backend, workers)
+        espectro = espectro_rfft.espectro
+        for indice, parametros_filtro in enumerate(parametros):
+            espectro[indice] *= mascara_rfft(espectro_rfft, *parametros_filtro)
+        filtradas = inverter_rfft(espectro_rfft, espectro)
+    return [cv2.normalize(filtrada, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8) for filtrada in filtradas]
+
+
+class LoteadorFFT():
+    """
+    Junta as requisições concorrentes de mesma forma em lotes (micro-batching). A primeira
+    requisição de uma forma abre uma janela curta; ao fim dela, ou quando a fila atinge
+    tamanho_maximo, o lote fica pronto e vai para o pool de threads assim que houver vaga
+    (no máximo lotes_simultaneos em cálculo). Enquanto os lotes em cálculo ocupam as vagas,
+    as requisições que chegam se acumulam, então os lotes crescem com a carga. Usado só de
+    dentro do laço asyncio.
+    """
+
+    def __init__(self, executor, janela=0.002, tamanho_maximo=1, backend="scipy", workers=-1, lotes_simultaneos=1):
+        self.executor = executor
+        self.janela = janela
+        self.tamanho_maximo = tamanho_maximo
+        self.backend = backend
+        self.workers = workers
+        self.lotes_simultaneos = lotes_simultaneos
+        self.lotes = 0
+        self.itens = 0
+        self._pendentes = {}
+        self._temporizadores = {}
+        # Formas com lote pronto, em ordem de chegada (dicionário usado como conjunto ordenado)
+        self._prontas = {}
+        self._em_calculo = 0
+
+    async def filtrar(self, imagem, parametros):
+        """
+        Returns:
+            tuple: (imagem filtrada uint8, tamanho do lote em que foi processada).
+        """
+        laco = asyncio.get_running_loop()
+        futuro = laco.create_future()
+        forma = imagem.shape
+        fila = self._pendentes.setdefault(forma, [])
+        fila.append((imagem, parametros, futuro))
+        if len(fila) >= self.tamanho_maximo:
+            self._prontas[forma] = None
+            self._despachar()
+        elif len(fila) == 1:
+            self._temporizadores[forma] = laco.call_later(self.janela, self._expirar, forma)
+        return await futuro
+
+    def _expirar(self, forma):
+        self._temporizadores.pop(forma, None)
+        if self._pendentes.get(forma):
+            self._prontas[forma] = None
+            self._despachar()
+
+    def _despachar(self):
+        while self._prontas and self._em_calculo < self.lotes_simultaneos:
+            forma = next(iter(self._prontas))
+            del self._prontas[forma]
+            fila = self._pendentes.pop(forma, [])
+            itens, resto = fila[:self.tamanho_maximo], fila[self.tamanho_maximo:]
+            if resto:
+                # O restante já esperou o lote atual: fica pronto para a próxima vaga
+                self._pendentes[forma] = resto
+                self._prontas[forma] = None
+            else:
+                temporizador = self._temporizadores.pop(forma, None)
+                if temporizador is not None:
+                    temporizador.cancel()
+            if itens:
+                self._calcular(itens)
+
+    def _calcular(self, itens):
+        self._em_calculo += 1
+        self.lotes += 1
+        self.itens += len(itens)
+        calculo = asyncio.get_running_loop().run_in_executor(
+            self.executor, filtrar_lote, [item[0] for item in itens], [item[1] for item in itens], self.backend,
+            self.workers)
+
+        def entregar(calculo):
+            self._em_calculo -= 1
+            excecao = None if calculo.cancelled() else calculo.exception()
+            for indice, (_, _, futuro) in enumerate(itens):
+                if futuro.done():
+                    continue
+                if calculo.cancelled():
+                    futuro.cancel()
+                elif excecao is not None:
+                    futuro.set_exception(excecao)
+                else:
+                    futuro.set_result((calculo.result()[indice], len(itens)))
+            self._despachar()
+
+        calculo.add_done_callback(entregar)
+
+
+class ServidorFiltros():
+    """
+    Serviço de filtros de frequência sobre HTTP/1.1 (com keep-alive), em TCP ou em socket
+    Unix, para evitar um processo novo e arquivos temporários por chamada.
+
+    Rotas:
+        POST /filtrar?tipo=gaussiano&banda=passa_baixa&D0=30[&ordem=2][&largura=10]
+             [&forma=512x512][&saida=png|raw][&compressao=1]
+             Corpo: arquivo de imagem ou, com forma, pixels uint8 crus. Resposta: a imagem
+             filtrada (uint8) em PNG ou crua (forma no cabeçalho X-Forma). O cabeçalho
+             X-Tamanho-Lote informa quantas requisições dividiram a mesma FFT (sempre 1 com
+             tamanho_maximo_lote=1, o padrão).
+        GET /saude: estatísticas em JSON (requisições, lotes, cache de máscaras).
+    Uma linha de requisição ou um Content-Length malformados recebem 400 e a conexão é fechada.
+
+    Decodificação, FFT em lote e codificação rodam em um pool de threads (OpenCV e
+    scipy.fft liberam o GIL); as máscaras e os planos de FFT ficam quentes entre requisições
+    (cache do banco de filtros e do backend), e as formas de aquecer são preparadas na partida.
+    """
+
+    def __init__(self, host="127.0.0.1", porta=8765, caminho_socket=None, workers=None, janela_lote=0.002,
+                 tamanho_maximo_lote=1, backend="scipy", workers_fft=-1, lotes_simultaneos=1, aquecer=(),
+                 tamanho_maximo_corpo=TAMANHO_MAXIMO_CORPO):
+        """
+        Args:
+            host (str), porta (int): Endereço TCP (ignorado se caminho_socket for dado).
+            caminho_socket (str): Caminho de um socket Unix.
+            workers (int): Threads do pool de cálculo; se None, o número de núcleos.
+            janela_lote (float): Espera máxima, em segundos, para juntar requisições de mesma forma.
+            tamanho_maximo_lote (int): Requisições por FFT em lote; 1 (o padrão) desativa os
+                                       lotes. Em um núcleo, os lotes só somam a espera da
+                                       janela: a FFT empilhada não é mais rápida que as
+                                       mesmas FFTs uma a uma.
+            backend (str): Backend de FFT ("numpy", "scipy", "opencv" ou "auto").
+            workers_fft (int): Threads de cada FFT no backend scipy.
+            lotes_simultaneos (int): Lotes em cálculo ao mesmo tempo (com workers_fft=-1, cada
+                                     lote já usa todos os núcleos).
+            aquecer (list): Formas (linhas, colunas) preparadas na partida: máscara gaussiana
+                            padrão (passa-baixa e passa-alta, D0=30), backend e planos de FFT.
+            tamanho_maximo_corpo (int): Maior corpo aceito, em bytes.
+        """
+        self.host = host
+        self.porta = porta
+        self.caminho_socket = caminho_socket
+        self.workers = workers or os.cpu_count()
+        self.aquecer = [tuple(forma) for forma in aquecer]
+        self.tamanho_maximo_corpo = tamanho_maximo_corpo
+        self.requisicoes = 0
+        self.erros = 0
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers,
+                                                               thread_name_prefix="servidor_filtros")
+        self.loteador = LoteadorFFT(self._executor, janela_lote, tamanho_maximo_lote, backend, workers_fft,
+                                    lotes_simultaneos)
+        self._servidor = None
+
+    def _aquecer(self):
+        for forma in self.aquecer:
+            imagem = np.zeros(forma, np.float32)
+            filtrar_lote([imagem, imagem], [ParametrosFiltro(), ParametrosFiltro(banda="passa_alta")],
+                         self.loteador.backend, self.loteador.workers)
+            logger.info("Forma %s preparada", forma)
+
+    async def iniciar(self):
+        """Prepara as formas de aquecimento e começa a aceitar conexões."""
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._aquecer)
+        if self.caminho_socket:
+            self._servidor = await asyncio.start_unix_server(self._tratar_conexao, path=self.caminho_socket)
+        else:
+            self._servidor = await asyncio.start_server(self._tratar_conexao, self.host, self.porta)
+            self.porta = self._servidor.sockets[0].getsockname()[1]
+        logger.info("Servindo filtros de frequência em %s", self.endereco)
+        return self
+
+    @property
+    def endereco(self):
+        return f"unix:{self.caminho_socket}" if self.caminho_socket else f"http://{self.host}:{self.porta}"
+
+    async def servir(self):
+        """Inicia o servidor e atende até ser cancelado."""
+        await self.iniciar()
+        try:
+            await self._servidor.serve_forever()
+        finally:
+            await self.encerrar()
+
+    async def encerrar(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+            self._servidor = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.caminho_socket and os.path.exists(self.caminho_socket):
+            os.unlink(self.caminho_socket)
+
+    def estatisticas(self):
+        lotes = self.loteador.lotes
+        return {"requisicoes": self.requisicoes, "erros": self.erros, "lotes": lotes,
+                "requisicoes_por_lote": self.loteador.itens / lotes if lotes else 0.0,
+                "cache_mascaras": info_cache_mascaras()._asdict()}
+
+    async def _tratar_conexao(self, leitor, escritor):
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                partes = linha.decode("latin-1").split()
+                if len(partes) != 3 or not partes[2].startswith("HTTP/"):
+                    await self._responder(escritor, 400, {"erro": "Linha de requisição inválida."}, manter=False)
+                    break
+                metodo, alvo, versao = partes
+                cabecalhos = {}
+                while True:
+                    linha = await leitor.readline()
+                    if linha in (b"\r\n", b"\n", b""):
+                        break
+                    nome, _, valor = linha.decode("latin-1").partition(":")
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                try:
+                    tamanho = int(cabecalhos.get("content-length", 0))
+                except ValueError:
+                    tamanho = -1
+                if tamanho < 0:
+                    await self._responder(escritor, 400, {"erro": "Content-Length inválido."}, manter=False)
+                    break
+                if tamanho > self.tamanho_maximo_corpo:
+                    await self._responder(escritor, 413, {"erro": f"Corpo maior que {self.tamanho_maximo_corpo} bytes."},
+                                          manter=False)
+                    break
+                corpo = await leitor.readexactly(tamanho)
+                status, dados, extras = await self._atender(metodo, alvo, corpo)
+                manter = versao == "HTTP/1.1" and cabecalhos.get("connection", "").lower() != "close"
+                await self._responder(escritor, status, dados, extras, manter)
+                if not manter:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # Cliente desconectado no meio da requisição
+            pass
+        finally:
+            escritor.close()
+
+    async def _atender(self, metodo, alvo, corpo):
+        url = urllib.parse.urlsplit(alvo)
+        if url.path == "/saude":
+            return 200, self.estatisticas(), {}
+        if url.path != "/filtrar":
+            return 404, {"erro": f"Rota desconhecida: {url.path}"}, {}
+        if metodo != "POST":
+            return 405, {"erro": "Use POST com a imagem no corpo."}, {}
+        self.requisicoes += 1
+        contar("requisicoes")
+        laco = asyncio.get_running_loop()
+        try:
+            consulta = urllib.parse.parse_qs(url.query)
+            parametros = ler_parametros_filtro(consulta)
+            saida = consulta.get("saida", ["png"])[-1]
+            if saida not in ("png", "raw"):
+                raise ValueError(f"Saída desconhecida: {saida}. Use 'png' ou 'raw'.")
+            compressao = int(consulta.get("compressao", [1])[-1])
+            imagem = await laco.run_in_executor(self._executor, decodificar_imagem, corpo,
+                                                consulta.get("forma", [None])[-1])
+        except ValueError as excecao:
+            self.erros += 1
+            return 400, {"erro": str(excecao)}, {}
+        try:
+            filtrada, tamanho_lote = await self.loteador.filtrar(imagem, parametros)
+            extras = {"X-Tamanho-Lote": str(tamanho_lote), "X-Forma": "x".join(map(str, filtrada.shape))}
+            if saida == "raw":
+                return 200, filtrada.tobytes(), dict(extras, **{"Content-Type": "application/octet-stream"})
+            png = await laco.run_in_executor(self._executor, codificar_png, filtrada, compressao)
+            return 200, png, dict(extras, **{"Content-Type": "image/png"})
+        except Exception as excecao:
+            self.erros += 1
+            logger.exception("Erro ao filtrar a requisição %s", alvo)
+            return 500, {"erro": repr(excecao)}, {}
+
+    async def _responder(self, escritor, status, dados, extras=None, manter=True):
+        cabecalhos = dict(extras or {})
+        if not isinstance(dados, bytes):
+            dados = json.dumps(dados).encode("utf-8")
+            cabecalhos["Content-Type"] = "application/json"
+        cabecalhos["Content-Length"] = str(len(dados))
+        cabecalhos["Connection"] = "keep-alive" if manter else "close"
+        cabecalho = f"HTTP/1.1 {status} {MENSAGENS_HTTP[status]}\r\n" + "".join(
+            f"{nome}: {valor}\r\n" for nome, valor in cabecalhos.items()) + "\r\n"
+        escritor.write(cabecalho.encode("latin-1") + dados)
+        await escritor.drain()
+
+
+def _ler_formas(texto):
+    return [tuple(int(n) for n in forma.lower().split("x")) for forma in texto.split(",") if forma]
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP de filtros de frequência com FFT em lote.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--socket", default=None, help="Caminho de um socket Unix (no lugar de host e porta).")
+    parser.add_argument("--workers", type=int, default=None, help="Threads de cálculo (padrão: núcleos).")
+    parser.add_argument("--janela-ms", type=float, default=2.0, help="Espera máxima para juntar um lote, em ms.")
+    parser.add_argument("--lote-maximo", type=int, default=1,
+                        help="Requisições por FFT em lote (padrão: 1, sem lotes).")
+    parser.add_argument("--lotes-simultaneos", type=int, default=1, help="Lotes em cálculo ao mesmo tempo.")
+    parser.add_argument("--backend", choices=("numpy", "scipy", "opencv", "auto"), default="scipy")
+    parser.add_argument("--aquecer", default="", help="Formas preparadas na partida, por exemplo 512x512,1024x768.")
+    args = parser.parse_args(argumentos)
+
+    configurar_log()
+    servidor = ServidorFiltros(args.host, args.porta, args.socket, args.workers, args.janela_ms / 1000,
+                               args.lote_maximo, args.backend, lotes_simultaneos=args.lotes_simultaneos,
+                               aquecer=_ler_formas(args.aquecer))
+    inicio = time.perf_counter()
+    try:
+        asyncio.run(servidor.servir())
+    except KeyboardInterrupt:
+        pass
+    estatisticas = servidor.estatisticas()
+    logger.info("Encerrado após %.1f s: %d requisições em %d lotes", time.perf_counter() - inicio,
+                estatisticas["requisicoes"], estatisticas["lotes"])
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ import skimage.data
 import skimage.io
 
 # Diretórios para salvar as imagens de exemplo
-base_path = "/home/ubuntu/trabalho_faculdade_python"
+base_path = os.path.dirname(os.path.abspath(__file__))
 image_dirs = {
     "filtros_frequencia": os.path.join(base_path, "filtros_frequencia_python", "imagens_exemplo"),
     "segmentacao_watershed": os.path.join(base_path, "segmentacao_watershed_python", "imagens_exemplo"),
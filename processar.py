@@ -0,0 +1,418 @@
+"""
+Linha de comando única para aplicar os algoritmos do projeto (filtros de frequência,
+segmentação watershed e crescimento de regiões) a lotes de imagens, em paralelo.
+
+Cada imagem passa por uma sequência de etapas. A sequência vem de --algoritmos (cada
+algoritmo aplicado à imagem original) ou de um arquivo de pipeline em JSON, em que uma
+etapa pode usar uma saída da anterior:
+
+    {"etapas": [
+        {"algoritmo": "filtros_frequencia", "parametros": {"D0_passa_baixa": 20}},
+        {"algoritmo": "watershed", "entrada": "passa_baixa", "parametros": {"usar_distancia": true}}
+    ]}
+
+As saídas de cada imagem ficam em <saida>/<nome da imagem>_<etapa>_*.png (com a pasta no
+nome quando duas imagens têm o mesmo nome). Imagens cujas saídas já estão atualizadas
+(mesma entrada, pelo mtime ou pelo hash, e mesma pipeline) são puladas.
+
+As sementes do crescimento de regiões podem ser dadas por imagem com --sementes, um JSON
+que associa o nome do arquivo (ou o nome sem extensão) a uma lista de sementes:
+
+    {"astronaut_original.png": [[200, 200], [100, 100]], "horse_original": [[150, 200]]}
+
+Uso (a partir da raiz do projeto):
+    python processar.py "dados/*.png" --saida resultados --algoritmos watershed,crescimento_regioes --workers 4
+    python processar.py dados --saida resultados --pipeline pipeline.json --parametro watershed.usar_distancia=false
+    python processar.py dados --saida resultados --algoritmos crescimento_regioes --sementes sementes.json
+"""
+import argparse
+import collections
+import concurrent.futures
+import hashlib
+import json
+import os
+import sys
+import time
+
+from segmentacao_watershed_python.lote_watershed import listar_imagens, nomes_saida
+from utilitarios.cache_resultados import hash_arquivo
+from utilitarios.instrumentacao import configurar_log
+from utilitarios.io_imagens import GravadorImagens, ler_imagem
+
+ALGORITMOS = ("filtros_frequencia", "watershed", "crescimento_regioes")
+# Saídas de cada algoritmo que podem ser a entrada da etapa seguinte
+SAIDAS_ENCADEAVEIS = {
+    "filtros_frequencia": ("img_gray_ubyte", "passa_baixa", "passa_alta"),
+    "watershed": ("img_ubyte", "imagem_segmentada"),
+    "crescimento_regioes": ("img_gray_ubyte", "img_segmentada"),
+}
+PASTA_MANIFESTOS = ".processar"
+# Incrementar quando as saídas dos algoritmos mudarem, para invalidar os manifestos
+VERSAO_MANIFESTO = 1
+
+ResultadoImagem = collections.namedtuple("ResultadoImagem", ["caminho", "tempo", "pid", "pulada", "pixels", "erro"])
+# salvar: PNGs de cada etapa; renderizar: figuras de comparação; formato: "png" ou "npy";
+# nivel_compressao: nível do PNG (None: skimage.io.imsave); salvar_original: regrava a
+# imagem de entrada de cada etapa (redundante: é o arquivo de entrada ou a saída anterior)
+OpcoesSaida = collections.namedtuple("OpcoesSaida", ["salvar", "renderizar", "formato", "nivel_compressao",
+                                                     "salvar_original"], defaults=(True, False, "png", None, False))
+
+
+def ler_pipeline(caminho):
+    """
+    Lê um arquivo de pipeline em JSON ({"etapas": [...]} ou diretamente a lista de etapas).
+
+    Returns:
+        list: Etapas validadas (ver validar_etapas).
+    """
+    with open(caminho, encoding="utf-8") as arquivo:
+        especificacao = json.load(arquivo)
+    return validar_etapas(especificacao["etapas"] if isinstance(especificacao, dict) else especificacao)
+
+
+def validar_etapas(etapas):
+    """
+    Valida e completa uma lista de etapas.
+
+    Cada etapa é um dicionário com "algoritmo" (um de ALGORITMOS), "parametros"
+    (argumentos do calcular_* correspondente, opcional), "entrada" (uma saída da etapa
+    anterior, ou "original", o padrão) e "nome" (usado nos arquivos, padrão: o algoritmo).
+
+    Returns:
+        list: Etapas com todas as chaves preenchidas.
+
+    Raises:
+        ValueError: Se uma etapa for inválida.
+    """
+    validadas = []
+    for indice, etapa in enumerate(etapas):
+        algoritmo = etapa.get("algoritmo")
+        if algoritmo not in ALGORITMOS:
+            raise ValueError(f"Etapa {indice}: algoritmo desconhecido {algoritmo!r}. Use um de {ALGORITMOS}.")
+        entrada = etapa.get("entrada", "original")
+        if entrada != "original":
+            if indice == 0:
+                raise ValueError("A primeira etapa só pode usar a imagem original.")
+            anterior = validadas[-1]["algoritmo"]
+            if entrada not in SAIDAS_ENCADEAVEIS[anterior]:
+                raise ValueError(f"Etapa {indice}: {anterior} não tem a saída {entrada!r}. "
+                                 f"Use uma de {SAIDAS_ENCADEAVEIS[anterior]}.")
+        validadas.append({"algoritmo": algoritmo, "parametros": dict(etapa.get("parametros", {})), "entrada": entrada,
+                          "nome": etapa.get("nome", algoritmo)})
+    nomes = [etapa["nome"] for etapa in validadas]
+    if len(set(nomes)) != len(nomes):
+        raise ValueError(f"Nomes de etapas repetidos: {nomes}. Dê um \"nome\" a cada etapa do mesmo algoritmo.")
+    return validadas
+
+
+def aplicar_parametros(etapas, atribuicoes):
+    """
+    Aplica atribuições "algoritmo.parametro=valor" (valor em JSON, ou texto) às etapas
+    do algoritmo (ou da etapa com esse nome).
+    """
+    for atribuicao in atribuicoes:
+        chave, separador, valor = atribuicao.partition("=")
+        alvo, ponto, parametro = chave.partition(".")
+        if not separador or not ponto:
+            raise ValueError(f"Parâmetro inválido: {atribuicao!r}. Use algoritmo.parametro=valor.")
+        try:
+            valor = json.loads(valor)
+        except json.JSONDecodeError:
+            pass
+        afetadas = [etapa for etapa in etapas if alvo in (etapa["nome"], etapa["algoritmo"])]
+        if not afetadas:
+            raise ValueError(f"Nenhuma etapa {alvo!r} na pipeline.")
+        for etapa in afetadas:
+            etapa["parametros"][parametro] = valor
+    return etapas
+
+
+def ler_sementes(caminho):
+    """
+    Lê um arquivo JSON de sementes por imagem ({"nome da imagem": [[linha, coluna], ...]}).
+
+    Returns:
+        dict: Nome da imagem -> lista de sementes (tuplas).
+
+    Raises:
+        ValueError: Se o arquivo não tiver esse formato.
+    """
+    with open(caminho, encoding="utf-8") as arquivo:
+        especificacao = json.load(arquivo)
+    if not isinstance(especificacao, dict):
+        raise ValueError("O arquivo de sementes deve associar o nome de cada imagem a uma lista de sementes.")
+    sementes = {}
+    for nome, lista in especificacao.items():
+        if (not isinstance(lista, list) or not lista
+                or not all(isinstance(semente, list) and len(semente) == 2 for semente in lista)):
+            raise ValueError(f"Sementes inválidas para {nome!r}: use uma lista de [linha, coluna].")
+        sementes[nome] = [tuple(int(coordenada) for coordenada in semente) for semente in lista]
+    return sementes
+
+
+def sementes_da_imagem(sementes, caminho, nome=None):
+    """
+    Procura as sementes de uma imagem pelo nome do arquivo, pelo nome base das saídas ou
+    pelo nome sem extensão, nessa ordem.
+
+    Returns:
+        list: Sementes da imagem, ou None se ela não estiver no mapa.
+    """
+    arquivo = os.path.basename(caminho)
+    for chave in (arquivo, nome, os.path.splitext(arquivo)[0]):
+        if chave is not None and chave in sementes:
+            return sementes[chave]
+    return None
+
+
+def aplicar_sementes(etapas, sementes):
+    """
+    Troca as sementes das etapas de crescimento de regiões pelas de uma imagem: uma
+    semente vira o parâmetro "semente" e várias, "sementes" (uma única passada).
+
+    Returns:
+        list: Cópia das etapas (as originais não são alteradas).
+    """
+    copias = []
+    for etapa in etapas:
+        etapa = dict(etapa, parametros=dict(etapa["parametros"]))
+        if etapa["algoritmo"] == "crescimento_regioes":
+            etapa["parametros"].pop("semente", None)
+            etapa["parametros"].pop("sementes", None)
+            if len(sementes) == 1:
+                etapa["parametros"]["semente"] = list(sementes[0])
+            else:
+                etapa["parametros"]["sementes"] = [list(semente) for semente in sementes]
+        copias.append(etapa)
+    return copias
+
+
+def _executar_algoritmo(algoritmo, imagem, parametros, base_saida, opcoes, gravador):
+    # Importações feitas no trabalhador: só os módulos usados pela pipeline são carregados
+    if algoritmo == "filtros_frequencia":
+        from filtros_frequencia_python.filtros_frequencia import (calcular_filtros_frequencia,
+                                                                  renderizar_filtros_frequencia,
+                                                                  salvar_filtros_frequencia)
+        resultado = calcular_filtros_frequencia(imagem, **parametros)
+        salvar_funcao, renderizar_funcao = salvar_filtros_frequencia, renderizar_filtros_frequencia
+        argumentos_salvar = {}
+    elif algoritmo == "watershed":
+        from segmentacao_watershed_python.segmentacao_watershed import (calcular_segmentacao_watershed,
+                                                                        renderizar_segmentacao_watershed,
+                                                                        salvar_segmentacao_watershed)
+        resultado = calcular_segmentacao_watershed(imagem, **parametros)
+        salvar_funcao, renderizar_funcao = salvar_segmentacao_watershed, renderizar_segmentacao_watershed
+        argumentos_salvar = {"salvar_original": opcoes.salvar_original}
+    else:
+        from crescimento_regioes_python import crescimento_regioes
+        parametros = dict(parametros)
+        if "sementes" in parametros:
+            resultado = crescimento_regioes.calcular_crescimento_regioes_multiplas(imagem, **parametros)
+            salvar_funcao = crescimento_regioes.salvar_crescimento_regioes_multiplas
+            renderizar_funcao = crescimento_regioes.renderizar_crescimento_regioes_multiplas
+            argumentos_salvar = {}
+        else:
+            # Sem semente informada, cresce a partir do centro da imagem
+            semente = parametros.pop("semente", (imagem.shape[0] // 2, imagem.shape[1] // 2))
+            resultado = crescimento_regioes.calcular_crescimento_regioes(imagem, tuple(semente), **parametros)
+            salvar_funcao = crescimento_regioes.salvar_crescimento_regioes
+            renderizar_funcao = crescimento_regioes.renderizar_crescimento_regioes
+            argumentos_salvar = {"salvar_original": opcoes.salvar_original}
+    if opcoes.salvar:
+        salvar_funcao(resultado, base_saida, gravador, **argumentos_salvar)
+    figura = renderizar_funcao(resultado, base_saida) if opcoes.renderizar else None
+    return resultado, figura
+
+
+def _caminho_manifesto(pasta_saida, nome):
+    return os.path.join(pasta_saida, PASTA_MANIFESTOS, f"{nome}.json")
+
+
+def _hash_etapas(etapas, opcoes):
+    descricao = json.dumps({"versao": VERSAO_MANIFESTO, "etapas": etapas, "opcoes": opcoes._asdict()}, sort_keys=True)
+    return hashlib.sha256(descricao.encode()).hexdigest()
+
+
+def saidas_atualizadas(caminho, pasta_saida, hash_etapas, criterio="mtime", nome=None):
+    """
+    Verifica se as saídas de uma imagem já correspondem à entrada e à pipeline atuais.
+
+    Args:
+        caminho (str): Imagem de entrada.
+        pasta_saida (str): Pasta das saídas.
+        hash_etapas (str): Hash da pipeline (etapas e opções de saída).
+        criterio (str): "mtime" compara tamanho e data de modificação da entrada (e, se só
+                        a data mudou, o hash); "hash" sempre compara o SHA-256 dos bytes.
+        nome (str): Nome base das saídas; se None, o nome do arquivo sem extensão.
+
+    Returns:
+        bool: True se o manifesto da imagem confere e todas as saídas listadas existem.
+    """
+    nome = nome or os.path.splitext(os.path.basename(caminho))[0]
+    try:
+        with open(_caminho_manifesto(pasta_saida, nome), encoding="utf-8") as arquivo:
+            manifesto = json.load(arquivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+    estado = os.stat(caminho)
+    if manifesto.get("etapas") != hash_etapas or manifesto.get("tamanho") != estado.st_size:
+        return False
+    if not all(os.path.exists(os.path.join(pasta_saida, saida)) for saida in manifesto.get("saidas", [])):
+        return False
+    if criterio == "mtime" and manifesto.get("mtime_ns") == estado.st_mtime_ns:
+        return True
+    return manifesto.get("sha256") == hash_arquivo(caminho)
+
+
+def processar_imagem(caminho, pasta_saida, etapas, opcoes=OpcoesSaida(), pular=None, nome=None, sementes=None):
+    """
+    Aplica as etapas a uma imagem e grava as saídas e o manifesto (executado em um trabalhador).
+
+    Args:
+        caminho (str): Imagem de entrada.
+        pasta_saida (str): Pasta das saídas.
+        etapas (list): Etapas validadas (ver validar_etapas).
+        opcoes (OpcoesSaida): O que gravar e como. Os PNGs são gravados em threads de fundo
+                              (GravadorImagens) enquanto as etapas seguintes calculam.
+        pular (str): "mtime" ou "hash" para pular imagens com saídas atualizadas; None
+                     processa sempre.
+        nome (str): Nome base das saídas; se None, o nome do arquivo sem extensão.
+        sementes (list): Sementes desta imagem para as etapas de crescimento de regiões
+                         (ver aplicar_sementes); se None, as dos parâmetros das etapas.
+
+    Returns:
+        ResultadoImagem: Caminho, tempo em s, pid, se foi pulada, pixels e erro ou None.
+    """
+    inicio = time.perf_counter()
+    if sementes is not None:
+        etapas = aplicar_sementes(etapas, sementes)
+    hash_etapas = _hash_etapas(etapas, opcoes)
+    nome = nome or os.path.splitext(os.path.basename(caminho))[0]
+    try:
+        if pular and saidas_atualizadas(caminho, pasta_saida, hash_etapas, pular, nome):
+            return ResultadoImagem(caminho, time.perf_counter() - inicio, os.getpid(), True, 0, None)
+        estado = os.stat(caminho)
+        # Decodificada uma vez e compartilhada por todas as etapas
+        imagem = ler_imagem(caminho)
+        pixels = imagem.shape[0] * imagem.shape[1]
+        resultado = None
+        figuras = []
+        with GravadorImagens(nivel_compressao=opcoes.nivel_compressao, formato=opcoes.formato) as gravador:
+            for etapa in etapas:
+                entrada = imagem if etapa["entrada"] == "original" else getattr(resultado, etapa["entrada"])
+                resultado, figura = _executar_algoritmo(etapa["algoritmo"], entrada, etapa["parametros"],
+                                                        os.path.join(pasta_saida, f"{nome}_{etapa['nome']}"), opcoes,
+                                                        gravador)
+                if figura is not None:
+                    figuras.append(figura)
+        # Só os arquivos gravados para esta imagem (um prefixo também pegaria os de outra
+        # imagem cujo nome comece com o desta)
+        saidas = sorted(os.path.relpath(saida, pasta_saida) for saida in gravador.gravados + figuras)
+        manifesto = {"entrada": os.path.abspath(caminho), "tamanho": estado.st_size, "mtime_ns": estado.st_mtime_ns,
+                     "sha256": hash_arquivo(caminho), "etapas": hash_etapas, "saidas": saidas}
+        caminho_manifesto = _caminho_manifesto(pasta_saida, nome)
+        with open(f"{caminho_manifesto}.{os.getpid()}.tmp", "w", encoding="utf-8") as arquivo:
+            json.dump(manifesto, arquivo, indent=2)
+        os.replace(f"{caminho_manifesto}.{os.getpid()}.tmp", caminho_manifesto)
+        erro = None
+    except Exception as excecao:
+        pixels = 0
+        erro = f"{type(excecao).__name__}: {excecao}"
+    return ResultadoImagem(caminho, time.perf_counter() - inicio, os.getpid(), False, pixels, erro)
+
+
+def processar_imagens(caminhos, pasta_saida, etapas, workers=None, opcoes=OpcoesSaida(), pular="mtime", sementes=None):
+    """
+    Processa as imagens em paralelo, com um processo por trabalhador.
+
+    Args:
+        caminhos (list): Imagens de entrada.
+        pasta_saida (str): Pasta das saídas (criada se não existir).
+        etapas (list): Etapas validadas (ver validar_etapas).
+        workers (int): Número de processos; se None, usa os.cpu_count(). Com 1, tudo roda
+                       no processo atual.
+        opcoes, pular: Ver processar_imagem.
+        sementes (dict): Sementes por imagem (ver ler_sementes); as imagens fora do mapa
+                         usam os parâmetros das etapas.
+
+    Yields:
+        ResultadoImagem: Resultado de cada imagem, na ordem em que terminam.
+    """
+    os.makedirs(os.path.join(pasta_saida, PASTA_MANIFESTOS), exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    nomes = nomes_saida(caminhos)
+    sementes = sementes or {}
+    argumentos = [(caminho, pasta_saida, etapas, opcoes, pular, nomes[caminho],
+                   sementes_da_imagem(sementes, caminho, nomes[caminho])) for caminho in caminhos]
+    if workers == 1:
+        for argumentos_imagem in argumentos:
+            yield processar_imagem(*argumentos_imagem)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = [executor.submit(processar_imagem, *argumentos_imagem) for argumentos_imagem in argumentos]
+        for futuro in concurrent.futures.as_completed(futuros):
+            yield futuro.result()
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entradas", nargs="+", help="Pastas ou padrões glob das imagens (use aspas nos globs).")
+    parser.add_argument("--saida", required=True, help="Pasta onde as saídas são salvas.")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--algoritmos", default=None,
+                       help=f"Algoritmos aplicados à imagem original, separados por vírgula ({', '.join(ALGORITMOS)}).")
+    grupo.add_argument("--pipeline", default=None, help="Arquivo JSON com as etapas da pipeline.")
+    parser.add_argument("--parametro", action="append", default=[], metavar="ALGORITMO.PARAMETRO=VALOR",
+                        help="Parâmetro de uma etapa (valor em JSON), por exemplo watershed.usar_distancia=false. "
+                             "Pode ser repetido.")
+    parser.add_argument("--sementes", default=None,
+                        help="Arquivo JSON com as sementes do crescimento de regiões de cada imagem.")
+    parser.add_argument("--workers", type=int, default=None, help="Número de processos (padrão: núcleos da máquina).")
+    parser.add_argument("--pular", choices=("mtime", "hash", "nunca"), default="mtime",
+                        help="Como detectar saídas atualizadas, que são puladas (padrão: mtime).")
+    parser.add_argument("--renderizar", action="store_true", help="Salva também as figuras de comparação.")
+    parser.add_argument("--formato", choices=("png", "npy"), default="png",
+                        help="Formato das saídas: PNG ou os arrays crus em .npy (o mais rápido).")
+    parser.add_argument("--compressao", type=int, choices=range(10), default=None, metavar="0-9",
+                        help="Nível de compressão do PNG, gravado pelo OpenCV (padrão: o do skimage.io.imsave).")
+    parser.add_argument("--salvar-original", action="store_true",
+                        help="Regrava a imagem de entrada de cada etapa (por padrão, omitida por ser redundante).")
+    args = parser.parse_args(argumentos)
+    configurar_log()
+
+    try:
+        if args.pipeline:
+            etapas = ler_pipeline(args.pipeline)
+        else:
+            etapas = validar_etapas([{"algoritmo": nome} for nome in (args.algoritmos or "watershed").split(",")])
+        aplicar_parametros(etapas, args.parametro)
+        sementes = ler_sementes(args.sementes) if args.sementes else None
+    except ValueError as excecao:
+        parser.error(str(excecao))
+
+    caminhos = sorted({caminho for entrada in args.entradas for caminho in listar_imagens(entrada)})
+    print(f"{len(caminhos)} imagens; etapas: {' -> '.join(etapa['nome'] for etapa in etapas)}")
+    inicio = time.perf_counter()
+    processadas = puladas = falhas = pixels = 0
+    opcoes = OpcoesSaida(True, args.renderizar, args.formato, args.compressao, args.salvar_original)
+    for i, resultado in enumerate(processar_imagens(caminhos, args.saida, etapas, args.workers, opcoes,
+                                                    None if args.pular == "nunca" else args.pular, sementes),
+                                 start=1):
+        if resultado.erro:
+            falhas += 1
+            print(f"[{i}/{len(caminhos)}] {resultado.caminho}: ERRO {resultado.erro}")
+        elif resultado.pulada:
+            puladas += 1
+            print(f"[{i}/{len(caminhos)}] {resultado.caminho}: atualizada, pulada")
+        else:
+            processadas += 1
+            pixels += resultado.pixels
+            print(f"[{i}/{len(caminhos)}] {resultado.caminho}: {resultado.tempo:.3f} s (pid {resultado.pid})")
+    total = max(time.perf_counter() - inicio, 1e-9)
+    print(f"Concluído em {total:.2f} s: {processadas} processadas, {puladas} puladas, {falhas} falhas; "
+          f"{processadas / total:.2f} imagens/s, {pixels / 1e6 / total:.2f} megapixels/s")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+import argparse
+import collections
+import concurrent.futures
+import glob
+import multiprocessing
+import os
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+from utilitarios.io_imagens import ler_imagem
+from .segmentacao_watershed import aplicar_segmentacao_watershed
+
+EXTENSOES_IMAGEM = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".npy")
+
+ResultadoLote = collections.namedtuple("ResultadoLote", ["caminho", "saida_base", "tempo", "pid", "erro"])
+
+
+def listar_imagens(entrada):
+    """
+    Lista as imagens de um lote.
+
+    Args:
+        entrada (str): Pasta (todas as imagens dela, em ordem alfabética) ou padrão glob
+                       (por exemplo "dados/**/*.png").
+
+    Returns:
+        list: Caminhos das imagens.
+    """
+    if os.path.isdir(entrada):
+        return sorted(os.path.join(entrada, nome) for nome in os.listdir(entrada)
+                      if nome.lower().endswith(EXTENSOES_IMAGEM))
+    return sorted(caminho for caminho in glob.glob(entrada, recursive=True)
+                  if caminho.lower().endswith(EXTENSOES_IMAGEM))
+
+
+def nomes_saida(caminhos):
+    """
+    Nome base das saídas de cada imagem: o nome do arquivo sem extensão ou, se dois
+    arquivos tiverem o mesmo nome sem extensão, o caminho relativo à pasta comum (com a
+    extensão) com "__" no lugar das barras.
+
+    Returns:
+        dict: caminho -> nome base.
+    """
+    nomes = {caminho: os.path.splitext(os.path.basename(caminho))[0] for caminho in caminhos}
+    repetidos = {nome for nome, quantidade in collections.Counter(nomes.values()).items() if quantidade > 1}
+    if repetidos:
+        comum = os.path.commonpath([os.path.abspath(caminho) for caminho in caminhos])
+        for caminho, nome in nomes.items():
+            if nome in repetidos:
+                nomes[caminho] = os.path.relpath(os.path.abspath(caminho), comum).replace(os.sep, "__")
+    return nomes
+
+
+def _processar_compartilhada(nome_memoria, shape, dtype, caminho, saida_base, usar_distancia):
+    # Executado no processo trabalhador: anexa a memória compartilhada criada pelo processo
+    # principal (sem cópia nem pickle dos pixels) e roda o watershed sobre ela
+    inicio = time.perf_counter()
+    # Os trabalhadores do pool compartilham o resource_tracker do processo principal, que
+    # cria e remove o bloco; aqui ele só é anexado e fechado
+    memoria = shared_memory.SharedMemory(name=nome_memoria)
+    try:
+        imagem = np.ndarray(shape, dtype=dtype, buffer=memoria.buf)
+        aplicar_segmentacao_watershed(caminho, saida_base, usar_distancia, imagem=imagem)
+        del imagem
+        erro = None
+    except Exception as excecao:
+        erro = f"{type(excecao).__name__}: {excecao}"
+    finally:
+        memoria.close()
+    return ResultadoLote(caminho, saida_base, time.perf_counter() - inicio, os.getpid(), erro)
+
+
+def _para_memoria_compartilhada(caminho):
+    imagem = ler_imagem(caminho)
+    memoria = shared_memory.SharedMemory(create=True, size=max(imagem.nbytes, 1))
+    np.ndarray(imagem.shape, dtype=imagem.dtype, buffer=memoria.buf)[...] = imagem
+    return memoria, imagem.shape, imagem.dtype.str
+
+
+def processar_lote_watershed(entrada, pasta_saida, usar_distancia=True, workers=None, max_pendentes=None,
+                             threads_leitura=None):
+    """
+    Aplica aplicar_segmentacao_watershed a um lote de imagens em paralelo.
+
+    As imagens são decodificadas adiantadamente por um pequeno pool de threads do
+    processo principal, cada uma em um bloco de multiprocessing.shared_memory, e os
+    trabalhadores de um ProcessPoolExecutor recebem só o nome do bloco. Só max_pendentes
+    imagens ficam decodificadas (ou em decodificação) ao mesmo tempo, e cada bloco é
+    liberado assim que sua imagem termina.
+
+    Args:
+        entrada (str | list): Pasta, padrão glob ou lista de caminhos de imagens.
+        pasta_saida (str): Pasta das saídas; os nomes base vêm de nomes_saida, únicos
+                           mesmo para arquivos de mesmo nome em subpastas.
+        usar_distancia (bool): Método do watershed (ver aplicar_segmentacao_watershed).
+        workers (int): Número de processos; se None, usa os.cpu_count().
+        max_pendentes (int): Imagens decodificadas e ainda não concluídas; se None, 2 * workers.
+        threads_leitura (int): Threads de decodificação; se None, min(workers, 4).
+
+    Yields:
+        ResultadoLote: Resultado de cada imagem, na ordem em que terminam (caminho,
+                       saida_base, tempo em s no trabalhador, pid e erro ou None).
+    """
+    caminhos = listar_imagens(entrada) if isinstance(entrada, str) else list(entrada)
+    workers = workers or os.cpu_count() or 1
+    max_pendentes = max_pendentes or 2 * workers
+    threads_leitura = threads_leitura or min(workers, 4)
+    os.makedirs(pasta_saida, exist_ok=True)
+
+    nomes = nomes_saida(caminhos)
+    proximos = iter(caminhos)
+    leituras = {}
+    pendentes = {}
+    # Com fork, um trabalhador criado enquanto uma thread de leitura segura uma trava
+    # (do OpenCV, do imageio, ...) herdaria a trava fechada e ficaria bloqueado
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context("forkserver")
+        # O servidor importa o watershed uma vez e cada trabalhador nasce dele já pronto
+        contexto.set_forkserver_preload([aplicar_segmentacao_watershed.__module__])
+    else:
+        contexto = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=contexto) as executor, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=threads_leitura) as leitores:
+        def ler_proximas():
+            # Começa a decodificar as próximas imagens enquanto houver vaga
+            while len(leituras) + len(pendentes) < max_pendentes:
+                caminho = next(proximos, None)
+                if caminho is None:
+                    break
+                leitura = leitores.submit(_para_memoria_compartilhada, caminho)
+                leituras[leitura] = (caminho, os.path.join(pasta_saida, nomes[caminho]))
+
+        try:
+            ler_proximas()
+            while leituras or pendentes:
+                concluidos, _ = concurrent.futures.wait([*leituras, *pendentes],
+                                                        return_when=concurrent.futures.FIRST_COMPLETED)
+                for futuro in concluidos:
+                    if futuro in leituras:
+                        caminho, saida_base = leituras.pop(futuro)
+                        try:
+                            memoria, shape, dtype = futuro.result()
+                        except Exception as excecao:
+                            ler_proximas()
+                            yield ResultadoLote(caminho, saida_base, 0.0, os.getpid(),
+                                                f"{type(excecao).__name__}: {excecao}")
+                            continue
+                        processamento = executor.submit(_processar_compartilhada, memoria.name, shape, dtype, caminho,
+                                                        saida_base, usar_distancia)
+                        pendentes[processamento] = memoria
+                    else:
+                        memoria = pendentes.pop(futuro)
+                        memoria.close()
+                        memoria.unlink()
+                        ler_proximas()
+                        yield futuro.result()
+        finally:
+            for leitura in leituras:
+                if not leitura.cancel() and leitura.exception() is None:
+                    pendentes[leitura] = leitura.result()[0]
+            for memoria in pendentes.values():
+                memoria.close()
+                memoria.unlink()
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Segmentação watershed em lote, em paralelo.")
+    parser.add_argument("entrada", help="Pasta ou padrão glob das imagens (use aspas no glob).")
+    parser.add_argument("--saida", required=True, help="Pasta onde as saídas são salvas.")
+    parser.add_argument("--metodo", choices=("distancia", "gradiente"), default="distancia")
+    parser.add_argument("--workers", type=int, default=None, help="Número de processos (padrão: núcleos da máquina).")
+    args = parser.parse_args(argumentos)
+
+    caminhos = listar_imagens(args.entrada)
+    print(f"{len(caminhos)} imagens encontradas em {args.entrada}")
+    inicio = time.perf_counter()
+    falhas = 0
+    for i, resultado in enumerate(processar_lote_watershed(caminhos, args.saida, args.metodo == "distancia",
+                                                           args.workers), start=1):
+        if resultado.erro:
+            falhas += 1
+            print(f"[{i}/{len(caminhos)}] {resultado.caminho}: ERRO {resultado.erro}")
+        else:
+            print(f"[{i}/{len(caminhos)}] {resultado.caminho}: {resultado.tempo:.3f} s (pid {resultado.pid})")
+    total = time.perf_counter() - inicio
+    print(f"Lote concluído em {total:.2f} s ({len(caminhos) / max(total, 1e-9):.2f} imagens/s, {falhas} falhas)")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,201 @@
+import functools
+import itertools
+import cv2
+import numpy as np
+from scipy import ndimage as ndi
+from skimage.feature import peak_local_max
+from skimage.filters import sobel
+from skimage.morphology import h_maxima
+
+# Convenção de todos os marcadores: int32, 0 na região ainda não decidida (inundada pelo
+# watershed) e rótulos positivos nas sementes. Os marcadores de primeiro plano (limiar da
+# distância, h-máximos e picos locais) seguem o estilo OpenCV: 1 no fundo certo e as
+# sementes a partir de 2.
+
+
+class PreprocessamentoMarcadores():
+    """
+    Pré-processamento de uma imagem em cinza compartilhado pelas estratégias de marcadores.
+
+    Cada etapa (limiarização de Otsu com abertura, fundo certo, transformada de distância,
+    gradiente de Sobel e histograma) é calculada no primeiro acesso e guardada, então
+    várias estratégias e varreduras de parâmetros sobre a mesma imagem pagam o
+    pré-processamento uma única vez. Os arrays não devem ser modificados.
+    """
+
+    def __init__(self, img_ubyte):
+        """
+        Args:
+            img_ubyte (numpy.ndarray): Imagem em escala de cinza uint8.
+        """
+        self.img_ubyte = img_ubyte
+
+    @functools.cached_property
+    def abertura(self):
+        """Objetos (Otsu invertido) após a abertura 3x3 com 2 iterações, uint8 0/255."""
+        _, thresh = cv2.threshold(self.img_ubyte, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        return cv2.morphologyEx(thresh, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8), iterations=2)
+
+    @functools.cached_property
+    def fundo_certo(self):
+        """Dilatação da abertura (3 iterações): fora dela, é fundo com certeza."""
+        return cv2.dilate(self.abertura, np.ones((3, 3), np.uint8), iterations=3)
+
+    @functools.cached_property
+    def distancia(self):
+        """Transformada de distância (L2, máscara 5x5) da abertura, float32."""
+        return cv2.distanceTransform(self.abertura, cv2.DIST_L2, 5)
+
+    @functools.cached_property
+    def gradiente(self):
+        """Magnitude do gradiente de Sobel, float64 (o watershed do skimage usaria float64)."""
+        return sobel(self.img_ubyte)
+
+    @functools.cached_property
+    def histograma(self):
+        """Contagem de cada um dos 256 níveis de cinza."""
+        return np.bincount(self.img_ubyte.ravel(), minlength=256)
+
+    def percentil(self, q):
+        """Percentil q da imagem, igual ao de np.percentile, sem ordenar os pixels."""
+        return percentil_histograma(self.histograma, q)
+
+
+def percentil_histograma(histograma, q):
+    """
+    Percentil q (interpolação linear, como np.percentile) dos valores contados em um
+    histograma de inteiros: os dois valores vizinhos na ordem vêm da contagem acumulada,
+    em vez de uma ordenação de todos os pixels.
+
+    Args:
+        histograma (numpy.ndarray): Contagem de cada valor (índice = valor).
+        q (float): Percentil, de 0 a 100.
+
+    Returns:
+        float: O mesmo valor de np.percentile aplicado aos dados do histograma.
+    """
+    acumulado = np.cumsum(histograma)
+    n = int(acumulado[-1])
+    indice_virtual = (n - 1) * np.true_divide(q, 100)
+    anterior = int(np.floor(indice_virtual))
+    proximo = min(anterior + 1, n - 1)
+    gama = indice_virtual - anterior
+    a, b = np.searchsorted(acumulado, [anterior, proximo], side="right")
+    # Mesma fórmula do _lerp do NumPy, para o resultado ser idêntico bit a bit
+    diferenca = float(b - a)
+    if gama >= 0.5:
+        return float(b - diferenca * (1 - gama))
+    return float(a + diferenca * gama)
+
+
+def _marcadores_primeiro_plano(pre, primeiro_plano):
+    # Sementes = componentes conexos do primeiro plano (a partir de 2), fundo certo = 1 e a
+    # faixa entre os dois fica 0, como em marcadores_distancia
+    primeiro_plano = primeiro_plano.astype(np.uint8, copy=False)
+    _, marcadores = cv2.connectedComponents(primeiro_plano)
+    marcadores += 1
+    marcadores[(pre.fundo_certo == 255) & (primeiro_plano == 0)] = 0
+    return marcadores
+
+
+def marcadores_limiar_distancia(pre, fracao=0.7):
+    """
+    Sementes onde a transformada de distância passa de fracao da distância máxima (o
+    método original do OpenCV, com fracao=0.7).
+    """
+    return _marcadores_primeiro_plano(pre, pre.distancia > fracao * pre.distancia.max())
+
+
+def marcadores_h_maximos(pre, h=2.0):
+    """
+    Sementes nos h-máximos da transformada de distância: máximos regionais com altura
+    de pelo menos h pixels. Separa objetos encostados sem depender da distância máxima
+    da imagem (o limiar global perde objetos pequenos quando há um grande).
+    """
+    return _marcadores_primeiro_plano(pre, h_maxima(pre.distancia, h) > 0)
+
+
+def marcadores_picos_locais(pre, distancia_minima=10, limiar_relativo=0.0):
+    """
+    Uma semente por pico local da transformada de distância (skimage.feature.peak_local_max)
+    dentro dos objetos, com pelo menos distancia_minima pixels entre picos e altura mínima
+    de limiar_relativo vezes a distância máxima.
+    """
+    picos = peak_local_max(pre.distancia, min_distance=int(distancia_minima), threshold_rel=limiar_relativo,
+                           exclude_border=False, labels=(pre.abertura > 0).astype(np.uint8))
+    primeiro_plano = np.zeros(pre.distancia.shape, np.uint8)
+    primeiro_plano[tuple(picos.T)] = 1
+    return _marcadores_primeiro_plano(pre, primeiro_plano)
+
+
+def mascara_percentis(img_ubyte, inferior=20, superior=80, histograma=None):
+    """
+    Pixels abaixo do percentil inferior ou acima do superior, em uma única passada pela
+    imagem: os percentis saem do histograma e a máscara, de uma tabela de 256 entradas.
+
+    Returns:
+        numpy.ndarray: Máscara booleana, igual a (img < p_inferior) | (img > p_superior)
+                       com os percentis de np.percentile.
+    """
+    if histograma is None:
+        histograma = np.bincount(img_ubyte.ravel(), minlength=256)
+    niveis = np.arange(256)
+    tabela = (niveis < percentil_histograma(histograma, inferior)) | (niveis > percentil_histograma(histograma, superior))
+    return tabela[img_ubyte]
+
+
+def marcadores_percentis(pre, inferior=20, superior=80):
+    """
+    Sementes nos componentes conexos dos pixels mais escuros (abaixo do percentil inferior)
+    e mais claros (acima do superior); o método original do Scikit-image, com 20 e 80.
+    """
+    marcadores, _ = ndi.label(mascara_percentis(pre.img_ubyte, inferior, superior, pre.histograma))
+    return marcadores.astype(np.int32, copy=False)
+
+
+ESTRATEGIAS_MARCADORES = {
+    "limiar_distancia": marcadores_limiar_distancia,
+    "h_maximos": marcadores_h_maximos,
+    "picos_locais": marcadores_picos_locais,
+    "percentis": marcadores_percentis,
+}
+
+
+def gerar_marcadores(pre, estrategia="limiar_distancia", **parametros):
+    """
+    Gera os marcadores de uma estratégia de ESTRATEGIAS_MARCADORES.
+
+    Args:
+        pre (PreprocessamentoMarcadores): Pré-processamento da imagem (reaproveitado).
+        estrategia (str): "limiar_distancia", "h_maximos", "picos_locais" ou "percentis".
+        **parametros: Parâmetros da estratégia (fracao; h; distancia_minima e
+                      limiar_relativo; inferior e superior).
+
+    Returns:
+        numpy.ndarray: Marcadores int32 (0 na região a inundar).
+    """
+    if estrategia not in ESTRATEGIAS_MARCADORES:
+        raise ValueError(f"Estratégia de marcadores desconhecida: {estrategia}. "
+                         f"Use uma de {sorted(ESTRATEGIAS_MARCADORES)}.")
+    return ESTRATEGIAS_MARCADORES[estrategia](pre, **parametros)
+
+
+def varrer_marcadores(pre, estrategia, **grade):
+    """
+    Gera os marcadores de uma estratégia para cada combinação de parâmetros da grade, com
+    um único pré-processamento da imagem.
+
+    Exemplo: varrer_marcadores(pre, "h_maximos", h=[1, 2, 4]).
+
+    Args:
+        pre (PreprocessamentoMarcadores): Pré-processamento da imagem.
+        estrategia (str): Nome da estratégia (ver gerar_marcadores).
+        **grade: Lista de valores de cada parâmetro.
+
+    Yields:
+        tuple: (dicionário de parâmetros, marcadores).
+    """
+    nomes = list(grade)
+    for valores in itertools.product(*(grade[nome] for nome in nomes)):
+        parametros = dict(zip(nomes, valores))
+        yield parametros, gerar_marcadores(pre, estrategia, **parametros)
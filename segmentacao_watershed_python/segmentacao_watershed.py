@@ -1,3 +1,5 @@
+import collections
+import logging
 import cv2
 import numpy as np
 from skimage.segmentation import watershed
@@ -5,102 +7,372 @@ from skimage.segmentation import watershed
 # from skimage.morphology import disk, opening, closing # Not directly used
 from skimage.filters import sobel
 from scipy import ndimage as ndi
-from matplotlib import pyplot as plt
 import os
-import skimage.io
 from skimage import img_as_ubyte, color, exposure
+from skimage.color.colorlabel import DEFAULT_COLORS
 
-def aplicar_segmentacao_watershed(caminho_imagem_entrada, caminho_imagem_saida_base, usar_distancia=True):
+from utilitarios.cache_resultados import executar_etapa, hash_arquivo, hash_array
+from utilitarios.instrumentacao import configurar_log, contar, etapa, instrumentar
+from utilitarios.io_imagens import carregar_imagem, gravar
+from .marcadores import PreprocessamentoMarcadores, gerar_marcadores, mascara_percentis
+
+logger = logging.getLogger(__name__)
+
+ResultadoWatershed = collections.namedtuple("ResultadoWatershed", [
+    "imagem_original", "img_ubyte", "etapa_intermediaria", "marcadores", "rotulos", "imagem_segmentada", "usar_distancia",
+    "economizar_memoria", "estrategia_marcadores",
+], defaults=(False, None))
+
+# Pixels por faixa de linhas nas conversões feitas em float64 no modo econômico (rgb2gray, label2rgb)
+PIXELS_POR_FAIXA = 1 << 16
+
+
+def _faixas(altura, largura, pixels_por_faixa=PIXELS_POR_FAIXA):
+    # Fatias de linhas com cerca de pixels_por_faixa pixels cada
+    linhas = max(1, pixels_por_faixa // max(largura, 1))
+    return [slice(inicio, inicio + linhas) for inicio in range(0, altura, linhas)]
+
+
+def marcadores_distancia(img_ubyte, economizar_memoria=False):
     """
-    Aplica a segmentação watershed a uma imagem.
+    Marcadores pelo método da transformada de distância (estilo OpenCV): limiarização de
+    Otsu, abertura, fundo certo por dilatação e primeiro plano certo em 70% da distância máxima.
 
     Args:
-        caminho_imagem_entrada (str): Caminho para a imagem de entrada.
-        caminho_imagem_saida_base (str): Caminho base para salvar as imagens de saída (sem extensão).
-        usar_distancia (bool): Se True, usa a transformada de distância para encontrar marcadores (OpenCV style).
-                             Se False, usa gradiente e mínimos regionais (Scikit-image style).
+        img_ubyte (numpy.ndarray): Imagem em escala de cinza uint8.
+        economizar_memoria (bool): Se True, as etapas escrevem em dois buffers uint8
+                                   reaproveitados (dst=) em vez de um temporário por etapa;
+                                   o resultado é o mesmo.
+
+    Returns:
+        tuple: (marcadores int32 com 0 na região desconhecida, transformada de distância float32).
     """
-    print(f"[DEBUG] Iniciando aplicar_segmentacao_watershed para: {caminho_imagem_entrada}")
-    diretorio_saida = os.path.dirname(caminho_imagem_saida_base)
-    if not os.path.exists(diretorio_saida):
-        os.makedirs(diretorio_saida)
-        print(f"[DEBUG] Diretório de saída criado: {diretorio_saida}")
+    if economizar_memoria:
+        kernel = np.ones((3, 3), np.uint8)
+        buffer = np.empty_like(img_ubyte)
+        cv2.threshold(img_ubyte, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU, dst=buffer)
+        cv2.morphologyEx(buffer, cv2.MORPH_OPEN, kernel, dst=buffer, iterations=2)
+        desconhecida = cv2.dilate(buffer, kernel, iterations=3)
+        dist_transform = cv2.distanceTransform(buffer, cv2.DIST_L2, 5)
+        # Primeiro plano certo direto em uint8, sem o float32 de cv2.threshold
+        cv2.compare(dist_transform, float(0.7 * dist_transform.max()), cv2.CMP_GT, dst=buffer)
+        cv2.subtract(desconhecida, buffer, dst=desconhecida)
+        markers_cv = np.empty(img_ubyte.shape, np.int32)
+        cv2.connectedComponents(buffer, labels=markers_cv)
+        np.add(markers_cv, 1, out=markers_cv)
+        np.putmask(markers_cv, desconhecida == 255, 0)
+        return markers_cv, dist_transform
 
-    img_color_original = skimage.io.imread(caminho_imagem_entrada)
-    if img_color_original is None:
-        print(f"[ERRO] Erro ao carregar a imagem: {caminho_imagem_entrada}")
-        return
-    print(f"[DEBUG] Imagem carregada: {caminho_imagem_entrada}, shape: {img_color_original.shape}")
+    # Mesmas etapas da estratégia "limiar_distancia" de marcadores.py
+    pre = PreprocessamentoMarcadores(img_ubyte)
+    return gerar_marcadores(pre, "limiar_distancia"), pre.distancia
+
+
+def marcadores_gradiente(img_ubyte, economizar_memoria=False):
+    """
+    Marcadores pelo método do gradiente (estilo Scikit-image): pixels abaixo do percentil 20
+    e acima do percentil 80, rotulados por componentes conexos.
+
+    Args:
+        img_ubyte (numpy.ndarray): Imagem em escala de cinza uint8.
+        economizar_memoria (bool): Mantido por compatibilidade: a máscara dos marcadores já é
+                                   um único array booleano nos dois modos.
+
+    Returns:
+        tuple: (marcadores rotulados, magnitude do gradiente de Sobel).
+    """
+    # O gradiente fica em float64: o watershed do skimage converteria para float64 de todo modo
+    gradient = sobel(img_ubyte)
+    # Os dois percentis saem de um histograma, sem ordenar a imagem (ver mascara_percentis)
+    markers_sk_labeled, _ = ndi.label(mascara_percentis(img_ubyte, 20, 80))
+    return markers_sk_labeled, gradient
+
+
+def watershed_distancia(imagem, marcadores, economizar_memoria=False, gerar_imagem=True):
+    """
+    Executa cv2.watershed sobre a imagem colorida (imagens em cinza são convertidas para RGB).
 
-    img_para_watershed_cv = img_color_original.copy()
+    Args:
+        imagem (numpy.ndarray): Imagem original; não é modificada.
+        marcadores (numpy.ndarray): Marcadores int32 de marcadores_distancia; são preenchidos no
+                                    próprio array, com -1 nas fronteiras.
+        economizar_memoria (bool): Se True, uma imagem RGB uint8 é passada ao cv2.watershed
+                                   sem cópia (ele não a modifica) e a imagem segmentada é a
+                                   única cópia.
+        gerar_imagem (bool): Se False, a imagem segmentada não é gerada (None).
+
+    Returns:
+        tuple: (rótulos, imagem com as fronteiras em vermelho).
+    """
+    if economizar_memoria:
+        if imagem.ndim == 2:
+            img_para_watershed_cv = cv2.cvtColor(img_as_ubyte(imagem), cv2.COLOR_GRAY2RGB)
+        else:
+            img_para_watershed_cv = np.ascontiguousarray(imagem)
+        cv2.watershed(img_para_watershed_cv, marcadores)
+        if not gerar_imagem:
+            return marcadores, None
+        # A conversão de uma imagem em cinza já é um array próprio, que pode ser pintado
+        img_resultado_watershed = img_para_watershed_cv if imagem.ndim == 2 else img_para_watershed_cv.copy()
+        img_resultado_watershed[marcadores == -1] = [255,0,0]
+        return marcadores, img_resultado_watershed
+
+    img_para_watershed_cv = imagem.copy()
+    if len(img_para_watershed_cv.shape) == 2:
+        img_para_watershed_cv = color.gray2rgb(img_as_ubyte(img_para_watershed_cv))
+
+    cv2.watershed(img_para_watershed_cv, marcadores)
+    if not gerar_imagem:
+        return marcadores, None
+    img_resultado_watershed = img_para_watershed_cv.copy()
+    img_resultado_watershed[marcadores == -1] = [255,0,0]
+    return marcadores, img_resultado_watershed
+
+
+def watershed_gradiente(imagem, img_ubyte, gradiente, marcadores, economizar_memoria=False, gerar_imagem=True):
+    """
+    Executa skimage.segmentation.watershed sobre o gradiente, mascarado aos pixels não nulos.
+
+    Args:
+        imagem (numpy.ndarray): Imagem original, usada na sobreposição dos rótulos.
+        img_ubyte (numpy.ndarray): Imagem em escala de cinza uint8.
+        gradiente (numpy.ndarray): Magnitude do gradiente.
+        marcadores (numpy.ndarray): Marcadores rotulados de marcadores_gradiente.
+        economizar_memoria (bool): Se True, a sobreposição é gerada em uint8 por faixas de
+                                   linhas (ver label2rgb_ubyte) em vez de em float64.
+        gerar_imagem (bool): Se False, a sobreposição não é gerada (None).
 
-    if len(img_color_original.shape) == 3:
-        img_gray = color.rgb2gray(img_color_original)
+    Returns:
+        tuple: (rótulos, sobreposição colorida dos rótulos na imagem).
+    """
+    labels_ws = watershed(gradiente, marcadores, mask=img_ubyte > 0)
+    if not gerar_imagem:
+        return labels_ws, None
+    if economizar_memoria:
+        return labels_ws, label2rgb_ubyte(labels_ws, imagem)
+    img_resultado_watershed = color.label2rgb(labels_ws, image=imagem, bg_label=0, kind="overlay")
+    return labels_ws, img_resultado_watershed
+
+
+def label2rgb_ubyte(rotulos, imagem, pixels_por_faixa=PIXELS_POR_FAIXA):
+    """
+    img_as_ubyte(color.label2rgb(rotulos, image=imagem, bg_label=0, kind="overlay")) calculada
+    por faixas de linhas, sem o resultado float64 (24 bytes por pixel) da imagem inteira.
+
+    O label2rgb atribui as cores em ciclo pela ordem dos rótulos presentes; cada faixa
+    recebe a lista exata das cores dos seus rótulos na imagem inteira, então o resultado é
+    idêntico.
+
+    Args:
+        rotulos (numpy.ndarray): Rótulos não negativos (0 é o fundo, sem cor).
+        imagem (numpy.ndarray): Imagem de fundo, com a forma dos rótulos (e canais opcionais).
+        pixels_por_faixa (int): Tamanho aproximado das faixas, em pixels.
+
+    Returns:
+        numpy.ndarray: Sobreposição RGB uint8.
+    """
+    presentes = np.flatnonzero(np.bincount(rotulos.ravel()))
+    presentes = presentes[presentes != 0]
+    saida = np.empty(rotulos.shape + (3,), np.uint8)
+    for linhas in _faixas(*rotulos.shape, pixels_por_faixa):
+        faixa = rotulos[linhas]
+        rotulos_faixa = np.unique(faixa)
+        posicoes = np.searchsorted(presentes, rotulos_faixa[rotulos_faixa != 0])
+        cores = [DEFAULT_COLORS[posicao % len(DEFAULT_COLORS)] for posicao in posicoes]
+        saida[linhas] = img_as_ubyte(color.label2rgb(faixa, image=imagem[linhas], colors=cores, bg_label=0,
+                                                     kind="overlay"))
+    return saida
+
+
+@instrumentar("cinza", "watershed")
+def _etapa_cinza_ubyte(imagem, economizar_memoria=False):
+    if economizar_memoria and len(imagem.shape) == 3:
+        # rgb2gray é por pixel: em faixas, só uma faixa existe em float64 de cada vez
+        img_ubyte = np.empty(imagem.shape[:2], np.uint8)
+        for linhas in _faixas(*imagem.shape[:2]):
+            img_ubyte[linhas] = img_as_ubyte(color.rgb2gray(imagem[linhas]))
+        return {"img_ubyte": img_ubyte}
+    if len(imagem.shape) == 3:
+        img_gray = color.rgb2gray(imagem)
     else:
-        img_gray = img_color_original
+        img_gray = imagem
+    return {"img_ubyte": img_as_ubyte(img_gray)}
 
-    img_ubyte = img_as_ubyte(img_gray)
-    print(f"[DEBUG] Imagem convertida para ubyte, shape: {img_ubyte.shape}")
 
-    if usar_distancia:
-        print("[DEBUG] Usando método de transformada de distância (OpenCV)")
-        _, thresh = cv2.threshold(img_ubyte, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-        kernel = np.ones((3,3),np.uint8)
-        opening_img = cv2.morphologyEx(thresh,cv2.MORPH_OPEN,kernel, iterations = 2)
-        sure_bg = cv2.dilate(opening_img,kernel,iterations=3)
-        dist_transform = cv2.distanceTransform(opening_img,cv2.DIST_L2,5)
-        _, sure_fg = cv2.threshold(dist_transform,0.7*dist_transform.max(),255,0)
-        sure_fg = np.uint8(sure_fg)
-        unknown = cv2.subtract(sure_bg,sure_fg)
-        _, markers_cv = cv2.connectedComponents(sure_fg)
-        markers_cv = markers_cv + 1 
-        markers_cv[unknown==255] = 0 
-        
-        if len(img_para_watershed_cv.shape) == 2: 
-            img_para_watershed_cv = color.gray2rgb(img_as_ubyte(img_para_watershed_cv))
-        
-        cv2.watershed(img_para_watershed_cv, markers_cv)
-        img_resultado_watershed = img_para_watershed_cv.copy()
-        img_resultado_watershed[markers_cv == -1] = [255,0,0] 
+def calcular_segmentacao_watershed(imagem, usar_distancia=True, cache=None, chave_imagem=None, economizar_memoria=False,
+                                   manter_visualizacao=True, estrategia_marcadores=None, parametros_marcadores=None,
+                                   preprocessamento=None):
+    """
+    Aplica a segmentação watershed a uma imagem em memória, sem ler nem escrever arquivos
+    e sem gerar figuras.
 
-        etapa_intermediaria_titulo = "Transformada de Distância"
-        etapa_intermediaria_img_plot = dist_transform
-        marcadores_plot = cv2.normalize(markers_cv.astype(np.float32), None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
-        marcadores_titulo = "Marcadores (OpenCV)"
-        print("[DEBUG] Método OpenCV concluído.")
+    As etapas (conversão para cinza, marcadores e watershed) podem ser guardadas em um
+    CacheResultados, cada uma com a chave da etapa anterior.
+
+    Args:
+        imagem (numpy.ndarray): Imagem (linhas, colunas) ou (linhas, colunas, canais); não é modificada.
+        usar_distancia (bool): Se True, usa a transformada de distância para encontrar marcadores (OpenCV style).
+                             Se False, usa gradiente e mínimos regionais (Scikit-image style).
+        cache (CacheResultados): Cache das etapas (opcional).
+        chave_imagem (str): Chave da imagem no cache (por exemplo, o hash do arquivo);
+                            se None, é o hash do conteúdo da imagem.
+        economizar_memoria (bool): Modo de pouca memória: conversão para cinza por faixas,
+                                   buffers uint8 reaproveitados nos marcadores, watershed da
+                                   distância sem cópias da imagem nem dos marcadores (o campo
+                                   marcadores passa a ser o próprio array de rótulos) e
+                                   sobreposições geradas em uint8. Os rótulos e os PNGs
+                                   salvos são os mesmos.
+        manter_visualizacao (bool): Se False, a etapa intermediária e a imagem segmentada não
+                                    são geradas nem guardadas (None); só os rótulos interessam.
+        estrategia_marcadores (str): Estratégia de marcadores (ver marcadores.gerar_marcadores):
+                                     "limiar_distancia", "h_maximos", "picos_locais" ou
+                                     "percentis". Se None, "limiar_distancia" com usar_distancia
+                                     e "percentis" sem; usar_distancia continua escolhendo a
+                                     inundação (cv2.watershed ou watershed sobre o gradiente).
+        parametros_marcadores (dict): Parâmetros da estratégia (por exemplo {"h": 3}).
+        preprocessamento (PreprocessamentoMarcadores): Pré-processamento desta imagem já usado
+                                     antes (distância, gradiente e histograma calculados uma
+                                     vez), para testar estratégias e parâmetros sem refazê-lo.
+
+    Returns:
+        ResultadoWatershed: Imagem em cinza, etapa intermediária (distância ou gradiente),
+                            marcadores, rótulos e imagem segmentada.
+    """
+    if cache is not None and chave_imagem is None:
+        chave_imagem = hash_array(imagem)
+    # Os parâmetros novos só entram nas chaves quando mudam o conteúdo das entradas, para não
+    # invalidar as entradas já existentes do modo padrão
+    parametros = {"usar_distancia": usar_distancia}
+    if not manter_visualizacao:
+        parametros["manter_visualizacao"] = False
+    estrategia = estrategia_marcadores or ("limiar_distancia" if usar_distancia else "percentis")
+    parametros_marcadores = parametros_marcadores or {}
+    padrao = estrategia == ("limiar_distancia" if usar_distancia else "percentis") and not parametros_marcadores
+    if not padrao:
+        parametros["estrategia_marcadores"] = estrategia
+        parametros["parametros_marcadores"] = parametros_marcadores
+    # O gradiente é usado pelo watershed; a transformada de distância, só na visualização
+    descartar_intermediaria = usar_distancia and not manter_visualizacao
+
+    if preprocessamento is not None:
+        etapa_cinza = lambda: {"img_ubyte": preprocessamento.img_ubyte}
     else:
-        print("[DEBUG] Usando método de gradiente (Scikit-image)")
-        gradient = sobel(img_ubyte)
-        markers_sk_bool = np.zeros_like(img_ubyte, dtype=bool)
-        markers_sk_bool[img_ubyte < np.percentile(img_ubyte, 20)] = True 
-        markers_sk_bool[img_ubyte > np.percentile(img_ubyte, 80)] = True 
-        markers_sk_labeled, _ = ndi.label(markers_sk_bool)
-        labels_ws = watershed(gradient, markers_sk_labeled, mask=img_ubyte > 0) 
-        img_resultado_watershed = color.label2rgb(labels_ws, image=img_color_original, bg_label=0, kind="overlay")
-        etapa_intermediaria_titulo = "Magnitude do Gradiente (Sobel)"
-        etapa_intermediaria_img_plot = gradient
-        marcadores_plot = color.label2rgb(markers_sk_labeled, image=img_color_original, bg_label=0)
-        marcadores_titulo = "Marcadores (Scikit-image)"
-        print("[DEBUG] Método Scikit-image concluído.")
+        etapa_cinza = lambda: _etapa_cinza_ubyte(imagem, economizar_memoria)
+    chave_cinza, cinza = executar_etapa(cache, "cinza_ubyte", [chave_imagem], {}, etapa_cinza)
+    img_ubyte = cinza["img_ubyte"]
 
-    print("[DEBUG] Iniciando salvamento de imagens intermediárias e resultado.")
-    skimage.io.imsave(f"{caminho_imagem_saida_base}_original.png", img_as_ubyte(img_color_original))
-    
+    def etapa_marcadores():
+        with etapa("marcadores", "watershed", usar_distancia=usar_distancia, estrategia=estrategia):
+            if economizar_memoria and padrao and preprocessamento is None:
+                # Versões com buffers reaproveitados das estratégias padrão
+                marcadores, etapa_intermediaria = (marcadores_distancia if usar_distancia else marcadores_gradiente)(
+                    img_ubyte, economizar_memoria)
+            else:
+                pre = preprocessamento if preprocessamento is not None else PreprocessamentoMarcadores(img_ubyte)
+                marcadores = gerar_marcadores(pre, estrategia, **parametros_marcadores)
+                etapa_intermediaria = None if descartar_intermediaria else pre.distancia if usar_distancia else pre.gradiente
+        if descartar_intermediaria:
+            return {"marcadores": marcadores}
+        return {"marcadores": marcadores, "etapa_intermediaria": etapa_intermediaria}
+
+    def etapa_watershed():
+        with etapa("segmentacao", "watershed", usar_distancia=usar_distancia):
+            if usar_distancia:
+                # cv2.watershed preenche os marcadores no próprio array; a cópia guarda os marcadores
+                # iniciais (no modo econômico, só é feita se o array for somente leitura)
+                marcadores_ws = marcadores["marcadores"]
+                if not economizar_memoria or not marcadores_ws.flags.writeable:
+                    marcadores_ws = np.array(marcadores_ws)
+                rotulos, img_resultado_watershed = watershed_distancia(imagem, marcadores_ws, economizar_memoria,
+                                                                       manter_visualizacao)
+            else:
+                rotulos, img_resultado_watershed = watershed_gradiente(imagem, img_ubyte, marcadores["etapa_intermediaria"],
+                                                                       marcadores["marcadores"], economizar_memoria,
+                                                                       manter_visualizacao)
+        if img_resultado_watershed is None:
+            return {"rotulos": rotulos}
+        return {"rotulos": rotulos, "imagem_segmentada": img_resultado_watershed}
+
+    chave_marcadores, marcadores = executar_etapa(cache, "watershed.marcadores", [chave_cinza], parametros,
+                                                  etapa_marcadores)
+    # A imagem original também entra na chave: a etapa usa as cores dela. No modo econômico,
+    # a sobreposição do gradiente é guardada em uint8
+    parametros_rotulos = dict(parametros, economizar_memoria=True) if economizar_memoria else parametros
+    _, rotulos = executar_etapa(cache, "watershed.rotulos", [chave_marcadores, chave_imagem], parametros_rotulos,
+                                etapa_watershed)
+    if economizar_memoria and usar_distancia:
+        marcadores["marcadores"] = rotulos["rotulos"]
+    etapa_intermediaria = marcadores.get("etapa_intermediaria") if manter_visualizacao else None
+    return ResultadoWatershed(imagem, img_ubyte, etapa_intermediaria, marcadores["marcadores"], rotulos["rotulos"],
+                              rotulos.get("imagem_segmentada"), usar_distancia, economizar_memoria,
+                              None if padrao else estrategia)
+
+
+def _imagens_visualizacao(resultado):
+    # Etapa intermediária em uint8 e marcadores prontos para exibição, como nas saídas originais
+    etapa_intermediaria_img_plot = resultado.etapa_intermediaria
     if etapa_intermediaria_img_plot.dtype == np.float32 or etapa_intermediaria_img_plot.dtype == np.float64:
-        print(f"[DEBUG] Normalizando etapa_intermediaria_img_plot (tipo: {etapa_intermediaria_img_plot.dtype}, min: {etapa_intermediaria_img_plot.min()}, max: {etapa_intermediaria_img_plot.max()})")
         etapa_intermediaria_img_plot_save = cv2.normalize(etapa_intermediaria_img_plot, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
     else:
         etapa_intermediaria_img_plot_save = img_as_ubyte(etapa_intermediaria_img_plot)
-    skimage.io.imsave(f"{caminho_imagem_saida_base}_etapa_intermediaria.png", etapa_intermediaria_img_plot_save)
-    
-    skimage.io.imsave(f"{caminho_imagem_saida_base}_marcadores.png", img_as_ubyte(marcadores_plot))
-    skimage.io.imsave(f"{caminho_imagem_saida_base}_segmentada_watershed.png", img_as_ubyte(img_resultado_watershed))
-    print(f"[DEBUG] Imagens individuais salvas em {diretorio_saida}")
+    if resultado.usar_distancia and resultado.economizar_memoria:
+        # Mesma normalização, convertendo int32 -> float32 dentro do cv2.normalize
+        marcadores_plot = cv2.normalize(resultado.rotulos, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_32F).astype(np.uint8)
+    elif resultado.usar_distancia:
+        # Os marcadores exibidos são os do array preenchido pelo watershed (com as fronteiras)
+        marcadores_plot = cv2.normalize(resultado.rotulos.astype(np.float32), None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+    elif resultado.economizar_memoria:
+        marcadores_plot = label2rgb_ubyte(resultado.marcadores, resultado.imagem_original)
+    else:
+        marcadores_plot = color.label2rgb(resultado.marcadores, image=resultado.imagem_original, bg_label=0)
+    return etapa_intermediaria_img_plot_save, marcadores_plot
 
-    # Corrigido: f-string para o print, usando aspas simples externas
-    print(f'Segmentação Watershed (método: {"Distância" if usar_distancia else "Gradiente"}) aplicada e imagens salvas em {diretorio_saida}')
 
-    print("[DEBUG] Iniciando plotagem e salvamento da figura combinada.")
+@instrumentar("codificacao", "watershed")
+def salvar_segmentacao_watershed(resultado, caminho_imagem_saida_base, gravador=None, salvar_original=True):
+    """
+    Salva as imagens de um ResultadoWatershed em PNG.
+
+    Args:
+        resultado (ResultadoWatershed): Saída de calcular_segmentacao_watershed.
+        caminho_imagem_saida_base (str): Caminho base das imagens de saída (sem extensão).
+        gravador (GravadorImagens): Grava em segundo plano (e com o nível de compressão ou o
+                                    formato dele); se None, grava na hora com skimage.io.
+        salvar_original (bool): Se False, não grava de novo a imagem de entrada.
+    """
+    etapa_intermediaria_img_plot_save, marcadores_plot = _imagens_visualizacao(resultado)
+    if salvar_original:
+        gravar(f"{caminho_imagem_saida_base}_original.png", img_as_ubyte(resultado.imagem_original), gravador)
+    gravar(f"{caminho_imagem_saida_base}_etapa_intermediaria.png", etapa_intermediaria_img_plot_save, gravador)
+    gravar(f"{caminho_imagem_saida_base}_marcadores.png", img_as_ubyte(marcadores_plot), gravador)
+    gravar(f"{caminho_imagem_saida_base}_segmentada_watershed.png", img_as_ubyte(resultado.imagem_segmentada), gravador)
+
+
+@instrumentar("renderizacao", "watershed")
+def renderizar_segmentacao_watershed(resultado, caminho_imagem_saida_base):
+    """
+    Gera a figura de comparação de um ResultadoWatershed (matplotlib é importado só aqui).
+
+    Args:
+        resultado (ResultadoWatershed): Saída de calcular_segmentacao_watershed.
+        caminho_imagem_saida_base (str): Caminho base da figura (sem extensão).
+
+    Returns:
+        str: Caminho da figura salva.
+    """
+    from matplotlib import pyplot as plt
+    usar_distancia = resultado.usar_distancia
+    img_color_original = resultado.imagem_original
+    etapa_intermediaria_img_plot_save, marcadores_plot = _imagens_visualizacao(resultado)
+    if usar_distancia:
+        etapa_intermediaria_titulo = "Transformada de Distância"
+        marcadores_titulo = "Marcadores (OpenCV)"
+    else:
+        etapa_intermediaria_titulo = "Magnitude do Gradiente (Sobel)"
+        marcadores_titulo = "Marcadores (Scikit-image)"
+    if resultado.estrategia_marcadores:
+        marcadores_titulo = f"Marcadores ({resultado.estrategia_marcadores})"
+
     fig, axes = plt.subplots(nrows=1, ncols=4, figsize=(16, 5), sharex=True, sharey=True)
     ax = axes.ravel()
 
@@ -108,9 +380,9 @@ def aplicar_segmentacao_watershed(caminho_imagem_entrada, caminho_imagem_saida_b
     ax[0].set_title("Imagem Original")
     ax[1].imshow(etapa_intermediaria_img_plot_save, cmap="gray")
     ax[1].set_title(etapa_intermediaria_titulo)
-    ax[2].imshow(marcadores_plot, cmap=plt.cm.nipy_spectral if (usar_distancia and marcadores_plot.ndim == 2) else None) 
+    ax[2].imshow(marcadores_plot, cmap=plt.cm.nipy_spectral if (usar_distancia and marcadores_plot.ndim == 2) else None)
     ax[2].set_title(marcadores_titulo)
-    ax[3].imshow(img_resultado_watershed)
+    ax[3].imshow(resultado.imagem_segmentada)
     ax[3].set_title("Segmentação Watershed")
 
     for a_plot in ax:
@@ -121,12 +393,79 @@ def aplicar_segmentacao_watershed(caminho_imagem_entrada, caminho_imagem_saida_b
     path_figura_comparacao = f'{caminho_imagem_saida_base}_comparacao_watershed_{"dist" if usar_distancia else "grad"}.png'
     plt.savefig(path_figura_comparacao)
     plt.close(fig)
-    print(f"[DEBUG] Figura de comparação Watershed salva em {path_figura_comparacao}")
-    print(f"[DEBUG] Finalizando aplicar_segmentacao_watershed para: {caminho_imagem_entrada}")
+    return path_figura_comparacao
+
+
+def aplicar_segmentacao_watershed(caminho_imagem_entrada, caminho_imagem_saida_base, usar_distancia=True, imagem=None,
+                                  salvar=True, renderizar=True, cache=None, economizar_memoria=False, gravador=None):
+    """
+    Aplica a segmentação watershed a uma imagem.
+
+    Lê a imagem, chama calcular_segmentacao_watershed e, opcionalmente, salva as imagens e
+    a figura de comparação.
+
+    Args:
+        caminho_imagem_entrada (str): Caminho para a imagem de entrada.
+        caminho_imagem_saida_base (str): Caminho base para salvar as imagens de saída (sem extensão).
+        usar_distancia (bool): Se True, usa a transformada de distância para encontrar marcadores (OpenCV style).
+                             Se False, usa gradiente e mínimos regionais (Scikit-image style).
+        imagem (numpy.ndarray): Imagem já decodificada (por exemplo, em memória compartilhada
+                                no processamento em lote); se None, é lida de caminho_imagem_entrada.
+                                Não é modificada.
+        salvar (bool): Se True, salva as imagens intermediárias e a segmentada em PNG.
+        renderizar (bool): Se True, salva a figura de comparação (matplotlib).
+        cache (CacheResultados): Se informado, a decodificação e as etapas são reaproveitadas
+                                 do cache (chave: hash dos bytes do arquivo e parâmetros).
+        economizar_memoria (bool): Modo de pouca memória (ver calcular_segmentacao_watershed);
+                                   a etapa intermediária e a imagem segmentada só são geradas
+                                   se salvar ou renderizar.
+        gravador (GravadorImagens): Grava os PNGs em segundo plano (ver utilitarios.io_imagens).
+
+    Returns:
+        ResultadoWatershed: Resultado do processamento.
+    """
+    logger.debug("Iniciando aplicar_segmentacao_watershed para: %s", caminho_imagem_entrada)
+    diretorio_saida = os.path.dirname(caminho_imagem_saida_base)
+    if (salvar or renderizar) and not os.path.exists(diretorio_saida):
+        os.makedirs(diretorio_saida)
+        logger.debug("Diretório de saída criado: %s", diretorio_saida)
+
+    chave_imagem = None
+    if imagem is None:
+        chave_arquivo = hash_arquivo(caminho_imagem_entrada) if cache is not None else None
+        with etapa("decodificacao", "watershed", arquivo=caminho_imagem_entrada):
+            chave_imagem, decodificada = executar_etapa(cache, "imagem", [chave_arquivo], {},
+                                                        lambda: {"imagem": carregar_imagem(caminho_imagem_entrada)})
+        imagem = decodificada["imagem"]
+    img_color_original = imagem
+    if img_color_original is None:
+        logger.error("Erro ao carregar a imagem: %s", caminho_imagem_entrada)
+        return
+    logger.debug("Imagem carregada: %s, shape: %s", caminho_imagem_entrada, img_color_original.shape)
+    contar("imagens")
+    contar("pixels", img_color_original.shape[0] * img_color_original.shape[1])
+
+    logger.debug("Usando método %s", "de transformada de distância (OpenCV)" if usar_distancia else "de gradiente (Scikit-image)")
+    manter_visualizacao = salvar or renderizar or not economizar_memoria
+    resultado = calcular_segmentacao_watershed(img_color_original, usar_distancia, cache, chave_imagem, economizar_memoria,
+                                               manter_visualizacao)
+    logger.debug("Segmentação concluída.")
+
+    if salvar:
+        salvar_segmentacao_watershed(resultado, caminho_imagem_saida_base, gravador)
+        logger.info("Segmentação Watershed (método: %s) aplicada e imagens salvas em %s",
+                    "Distância" if usar_distancia else "Gradiente", diretorio_saida)
+
+    if renderizar:
+        path_figura_comparacao = renderizar_segmentacao_watershed(resultado, caminho_imagem_saida_base)
+        logger.debug("Figura de comparação Watershed salva em %s", path_figura_comparacao)
+    logger.debug("Finalizando aplicar_segmentacao_watershed para: %s", caminho_imagem_entrada)
+    return resultado
 
 if __name__ == "__main__":
-    base_path_projeto = "/home/ubuntu/trabalho_faculdade_python"
-    path_modulo_watershed = os.path.join(base_path_projeto, "segmentacao_watershed_python")
+    configurar_log()
+    # Caminhos relativos ao próprio módulo: funciona de qualquer pasta
+    path_modulo_watershed = os.path.dirname(os.path.abspath(__file__))
     path_imagens_exemplo = os.path.join(path_modulo_watershed, "imagens_exemplo")
     path_resultados = os.path.join(path_modulo_watershed, "resultados_imagens")
 
@@ -134,15 +473,15 @@ if __name__ == "__main__":
         os.makedirs(path_resultados)
 
     img_coins_original_path = os.path.join(path_imagens_exemplo, "coins_original.png")
-    print(f"[MAIN] Processando coins: {img_coins_original_path}")
+    logger.info("Processando coins: %s", img_coins_original_path)
     aplicar_segmentacao_watershed(img_coins_original_path, os.path.join(path_resultados, "coins"), usar_distancia=True)
     
     img_chelsea_original_path = os.path.join(path_imagens_exemplo, "chelsea_original.png")
-    print(f"[MAIN] Processando chelsea: {img_chelsea_original_path}")
+    logger.info("Processando chelsea: %s", img_chelsea_original_path)
     aplicar_segmentacao_watershed(img_chelsea_original_path, os.path.join(path_resultados, "chelsea"), usar_distancia=True)
     
-    print(f"[MAIN] Processando chelsea (método gradiente): {img_chelsea_original_path}")
+    logger.info("Processando chelsea (método gradiente): %s", img_chelsea_original_path)
     aplicar_segmentacao_watershed(img_chelsea_original_path, os.path.join(path_resultados, "chelsea_grad"), usar_distancia=False)
 
-    print("Processamento de segmentação watershed concluído.")
+    logger.info("Processamento de segmentação watershed concluído.")
 
@@ -0,0 +1,279 @@
+import argparse
+import collections
+import itertools
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+
+from utilitarios.instrumentacao import etapa
+from .segmentacao_watershed import marcadores_distancia, watershed_distancia
+
+QuadroSegmentado = collections.namedtuple("QuadroSegmentado", ["indice", "quadro", "rotulos", "imagem_segmentada", "reusou_marcadores"])
+
+# Marca o fim do fluxo em cada fila do pipeline
+_FIM = object()
+
+
+class MedidorEstagios():
+    """
+    Acumula a latência por quadro de cada estágio do pipeline (segura entre threads).
+    """
+
+    def __init__(self):
+        self.latencias = collections.defaultdict(list)
+        self._trava = threading.Lock()
+        self.inicio = time.perf_counter()
+        self.quadros = 0
+        self.quadros_com_reuso = 0
+
+    def registrar(self, estagio, segundos):
+        with self._trava:
+            self.latencias[estagio].append(segundos)
+
+    def resumo(self):
+        """
+        Returns:
+            dict: Quadros, tempo total, FPS sustentado, quadros que reusaram marcadores e,
+                  por estágio, latência média, p50 e p99 em ms.
+        """
+        tempo_total = time.perf_counter() - self.inicio
+        estagios = {}
+        for estagio, valores in self.latencias.items():
+            ms = 1000 * np.asarray(valores)
+            estagios[estagio] = {"media_ms": float(ms.mean()), "p50_ms": float(np.percentile(ms, 50)),
+                                 "p99_ms": float(np.percentile(ms, 99))}
+        return {"quadros": self.quadros, "tempo_s": tempo_total, "fps": self.quadros / max(tempo_total, 1e-9),
+                "quadros_com_reuso": self.quadros_com_reuso, "estagios": estagios}
+
+
+def ler_quadros(caminho_video):
+    """
+    Gerador dos quadros (BGR) de um arquivo de vídeo lido com cv2.VideoCapture.
+
+    Args:
+        caminho_video (str): Caminho do vídeo (ou de um dispositivo/URL aceito pelo OpenCV).
+
+    Yields:
+        numpy.ndarray: Quadro (linhas, colunas, 3) uint8.
+    """
+    captura = cv2.VideoCapture(caminho_video)
+    if not captura.isOpened():
+        raise IOError(f"Não foi possível abrir o vídeo: {caminho_video}")
+    try:
+        while True:
+            lido, quadro = captura.read()
+            if not lido:
+                break
+            yield quadro
+    finally:
+        captura.release()
+
+
+def _executar_estagio(nome, funcao, entrada, saida, medidor, erros, parar):
+    # Consome a fila de entrada, aplica funcao a cada item e repassa o resultado; o
+    # marcador de fim (ou um erro) é sempre propagado para não travar os outros estágios
+    try:
+        while True:
+            item = entrada.get()
+            if item is _FIM:
+                break
+            inicio = time.perf_counter()
+            with etapa(nome, "video_watershed"):
+                resultado = funcao(item)
+            medidor.registrar(nome, time.perf_counter() - inicio)
+            saida.put(resultado)
+    except BaseException as excecao:
+        erros.append(excecao)
+        # Interrompe a decodificação e esvazia a entrada para que o estágio anterior não
+        # fique bloqueado em put()
+        parar.set()
+        while entrada.get() is not _FIM:
+            pass
+    finally:
+        saida.put(_FIM)
+
+
+def segmentar_video_watershed(quadros, limiar_reuso=2.0, max_reuso=30, tamanho_fila=8, medidor=None):
+    """
+    Segmenta um fluxo de quadros com o watershed por transformada de distância
+    (marcadores_distancia e watershed_distancia).
+
+    Decodificação, pré-processamento (cinza e marcadores) e watershed rodam em threads
+    separadas ligadas por filas limitadas; as operações do OpenCV liberam o GIL, então os
+    estágios se sobrepõem. Quando a diferença média absoluta entre o quadro e o último
+    quadro em que os marcadores foram calculados é no máximo limiar_reuso, os marcadores
+    são reaproveitados (sem Otsu, aberturas, dilatações, distanceTransform e
+    connectedComponents) e só o watershed é refeito sobre o quadro novo. O cinza vem de
+    cv2.cvtColor, mais rápido que o rgb2gray usado nas imagens estáticas.
+
+    Args:
+        quadros (iterable): Quadros BGR uint8 (por exemplo, ler_quadros(caminho)).
+        limiar_reuso (float): Diferença média máxima (níveis de cinza) para reusar os
+                              marcadores; None desativa o reuso.
+        max_reuso (int): Número máximo de quadros seguidos com os mesmos marcadores.
+        tamanho_fila (int): Capacidade de cada fila entre estágios.
+        medidor (MedidorEstagios): Recebe as latências por estágio (opcional).
+
+    Yields:
+        QuadroSegmentado: Índice, quadro em RGB, rótulos do watershed (-1 nas fronteiras),
+                          quadro RGB com as fronteiras em vermelho e se os marcadores
+                          foram reusados.
+    """
+    medidor = medidor or MedidorEstagios()
+    filas = [queue.Queue(maxsize=tamanho_fila) for _ in range(3)]
+    erros = []
+    parar = threading.Event()
+    referencia = {"cinza": None, "marcadores": None, "reusos": 0}
+
+    def decodificar():
+        try:
+            iterador = iter(quadros)
+            for indice in itertools.count():
+                if parar.is_set():
+                    break
+                inicio = time.perf_counter()
+                with etapa("decodificacao", "video_watershed"):
+                    quadro = next(iterador, None)
+                if quadro is None:
+                    break
+                medidor.registrar("decodificacao", time.perf_counter() - inicio)
+                filas[0].put((indice, quadro))
+        except BaseException as excecao:
+            erros.append(excecao)
+        finally:
+            filas[0].put(_FIM)
+
+    def preprocessar(item):
+        indice, quadro = item
+        quadro = cv2.cvtColor(quadro, cv2.COLOR_BGR2RGB)
+        cinza = cv2.cvtColor(quadro, cv2.COLOR_RGB2GRAY)
+        reusar = (limiar_reuso is not None and referencia["cinza"] is not None and referencia["reusos"] < max_reuso
+                  and cv2.mean(cv2.absdiff(cinza, referencia["cinza"]))[0] <= limiar_reuso)
+        if reusar:
+            referencia["reusos"] += 1
+        else:
+            referencia["marcadores"], _ = marcadores_distancia(cinza)
+            referencia["cinza"] = cinza
+            referencia["reusos"] = 0
+        # cv2.watershed preenche os marcadores no próprio array
+        return indice, quadro, referencia["marcadores"].copy(), reusar
+
+    def segmentar(item):
+        indice, quadro, marcadores, reusou = item
+        rotulos, imagem_segmentada = watershed_distancia(quadro, marcadores)
+        return QuadroSegmentado(indice, quadro, rotulos, imagem_segmentada, reusou)
+
+    threads = [
+        threading.Thread(target=decodificar, daemon=True),
+        threading.Thread(target=_executar_estagio, daemon=True,
+                         args=("preprocessamento", preprocessar, filas[0], filas[1], medidor, erros, parar)),
+        threading.Thread(target=_executar_estagio, daemon=True,
+                         args=("watershed", segmentar, filas[1], filas[2], medidor, erros, parar)),
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            resultado = filas[2].get()
+            if resultado is _FIM:
+                break
+            medidor.quadros += 1
+            medidor.quadros_com_reuso += resultado.reusou_marcadores
+            yield resultado
+    finally:
+        # Consumidor encerrado antes do fim: sinaliza a decodificação e encerra os estágios
+        # em ordem, drenando a saída de cada um (o que pode descartar o marcador de fim, que
+        # então é reposto para o estágio seguinte)
+        parar.set()
+        for thread, fila in zip(threads, filas):
+            while thread.is_alive():
+                while not fila.empty():
+                    fila.get_nowait()
+                thread.join(timeout=0.01)
+            while not fila.empty():
+                fila.get_nowait()
+            fila.put(_FIM)
+    if erros:
+        raise erros[0]
+
+
+def processar_video_watershed(caminho_entrada, caminho_saida=None, limiar_reuso=2.0, max_reuso=30, tamanho_fila=8,
+                              fourcc="mp4v"):
+    """
+    Segmenta um arquivo de vídeo quadro a quadro e, opcionalmente, grava o resultado.
+
+    A codificação roda em uma quarta thread (cv2.VideoWriter), alimentada por uma fila
+    limitada, depois dos estágios de segmentar_video_watershed.
+
+    Args:
+        caminho_entrada (str): Vídeo de entrada.
+        caminho_saida (str): Vídeo de saída com as fronteiras em vermelho; se None, nada é gravado.
+        limiar_reuso, max_reuso, tamanho_fila: Ver segmentar_video_watershed.
+        fourcc (str): Codec do vídeo de saída.
+
+    Returns:
+        dict: Resumo do MedidorEstagios (FPS sustentado e latência por estágio).
+    """
+    medidor = MedidorEstagios()
+    captura = cv2.VideoCapture(caminho_entrada)
+    fps_entrada = captura.get(cv2.CAP_PROP_FPS) or 30
+    captura.release()
+
+    fila_codificacao = queue.Queue(maxsize=tamanho_fila)
+    erros = []
+    parar = threading.Event()
+    gravador = {"video": None}
+
+    def codificar(item):
+        if gravador["video"] is None:
+            altura, largura = item.shape[:2]
+            gravador["video"] = cv2.VideoWriter(caminho_saida, cv2.VideoWriter_fourcc(*fourcc), fps_entrada, (largura, altura))
+        gravador["video"].write(cv2.cvtColor(item, cv2.COLOR_RGB2BGR))
+
+    thread_codificacao = None
+    if caminho_saida is not None:
+        thread_codificacao = threading.Thread(target=_executar_estagio, daemon=True,
+                                              args=("codificacao", codificar, fila_codificacao, queue.Queue(), medidor,
+                                                    erros, parar))
+        thread_codificacao.start()
+    try:
+        for resultado in segmentar_video_watershed(ler_quadros(caminho_entrada), limiar_reuso, max_reuso, tamanho_fila, medidor):
+            if parar.is_set():
+                # A codificação falhou: encerra a segmentação em vez de ler o resto do vídeo
+                break
+            if thread_codificacao is not None:
+                fila_codificacao.put(resultado.imagem_segmentada)
+    finally:
+        if thread_codificacao is not None:
+            fila_codificacao.put(_FIM)
+            thread_codificacao.join()
+            if gravador["video"] is not None:
+                gravador["video"].release()
+    if erros:
+        raise erros[0]
+    return medidor.resumo()
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Segmentação watershed de vídeo com reuso de marcadores entre quadros.")
+    parser.add_argument("entrada", help="Arquivo de vídeo de entrada.")
+    parser.add_argument("--saida", default=None, help="Vídeo de saída com as fronteiras marcadas (opcional).")
+    parser.add_argument("--limiar-reuso", type=float, default=2.0,
+                        help="Diferença média (níveis de cinza) abaixo da qual os marcadores são reusados; negativo desativa.")
+    parser.add_argument("--max-reuso", type=int, default=30)
+    parser.add_argument("--tamanho-fila", type=int, default=8)
+    args = parser.parse_args(argumentos)
+
+    resumo = processar_video_watershed(args.entrada, args.saida, args.limiar_reuso if args.limiar_reuso >= 0 else None,
+                                       args.max_reuso, args.tamanho_fila)
+    print(f"{resumo['quadros']} quadros em {resumo['tempo_s']:.2f} s: {resumo['fps']:.1f} FPS "
+          f"({resumo['quadros_com_reuso']} com marcadores reusados)")
+    for estagio, latencia in resumo["estagios"].items():
+        print(f"  {estagio:<18} média {latencia['media_ms']:7.2f} ms  p50 {latencia['p50_ms']:7.2f} ms  "
+              f"p99 {latencia['p99_ms']:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
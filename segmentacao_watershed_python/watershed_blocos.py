@@ -0,0 +1,341 @@
+import concurrent.futures
+import os
+import tempfile
+import cv2
+import numpy as np
+from scipy import ndimage as ndi
+from skimage import img_as_ubyte, color
+from skimage.filters import sobel
+from skimage.segmentation import watershed
+
+from .marcadores import percentil_histograma
+
+TAMANHO_BLOCO_PADRAO = 512
+SOBREPOSICAO_PADRAO = 64
+
+# Halo mínimo para a abertura (2 iterações) seguida da dilatação (3 iterações) 3x3
+_HALO_MORFOLOGIA = 8
+# Marcador do anel externo das janelas no método do gradiente
+_ROTULO_ANEL = np.iinfo(np.int32).max
+
+
+def limiar_otsu_histograma(histograma):
+    """
+    Limiar de Otsu a partir de um histograma de 256 níveis, com o mesmo cálculo de
+    cv2.threshold(..., cv2.THRESH_OTSU) para imagens uint8.
+    """
+    histograma = np.asarray(histograma, np.float64)
+    total = histograma.sum()
+    mu = np.dot(np.arange(256), histograma) / total
+    q1 = mu1 = 0.0
+    melhor_sigma = melhor_limiar = 0.0
+    eps = float(np.finfo(np.float32).eps)
+    for i in range(256):
+        p_i = histograma[i] / total
+        mu1 *= q1
+        q1 += p_i
+        q2 = 1.0 - q1
+        if min(q1, q2) < eps or max(q1, q2) > 1.0 - eps:
+            continue
+        mu1 = (mu1 + i * p_i) / q1
+        mu2 = (mu - q1 * mu1) / q2
+        sigma = q1 * q2 * (mu1 - mu2) ** 2
+        if sigma > melhor_sigma:
+            melhor_sigma = sigma
+            melhor_limiar = i
+    return melhor_limiar
+
+
+def _blocos(altura, largura, tamanho_bloco):
+    return [(n0, min(n0 + tamanho_bloco, altura), m0, min(m0 + tamanho_bloco, largura))
+            for n0 in range(0, altura, tamanho_bloco) for m0 in range(0, largura, tamanho_bloco)]
+
+
+def _janela(bloco, halo, altura, largura):
+    # Janela com halo, recortada nas bordas da imagem, e a posição do núcleo dentro dela
+    n0, n1, m0, m1 = bloco
+    l0, l1, c0, c1 = max(n0 - halo, 0), min(n1 + halo, altura), max(m0 - halo, 0), min(m1 + halo, largura)
+    return (l0, l1, c0, c1), (slice(n0 - l0, n1 - l0), slice(m0 - c0, m1 - c0))
+
+
+def _ler_cinza_ubyte(imagem, l0, l1, c0, c1):
+    # Mesma conversão de _etapa_cinza_ubyte, que é por pixel e vale para qualquer janela
+    janela = np.asarray(imagem[l0:l1, c0:c1])
+    return img_as_ubyte(color.rgb2gray(janela) if janela.ndim == 3 else janela)
+
+
+def _ler_colorida(imagem, l0, l1, c0, c1):
+    # Mesma entrada de cv2.watershed em watershed_distancia
+    janela = np.array(imagem[l0:l1, c0:c1])
+    return color.gray2rgb(img_as_ubyte(janela)) if janela.ndim == 2 else janela
+
+
+def _anel_externo(janela, altura, largura, espessura=2):
+    # Faixa de espessura pixels junto às bordas da janela que não são bordas da imagem, onde
+    # o gradiente (Sobel) e a moldura de cv2.watershed diferem dos da imagem inteira
+    l0, l1, c0, c1 = janela
+    anel = np.zeros((l1 - l0, c1 - c0), bool)
+    anel[:espessura] |= l0 > 0
+    anel[-espessura:] |= l1 < altura
+    anel[:, :espessura] |= c0 > 0
+    anel[:, -espessura:] |= c1 < largura
+    return anel
+
+
+def _inundacao_contida(marcadores_janela, anel, nucleo):
+    # A inundação de um pixel depende só da componente (4-conexa, como no watershed) da
+    # região sem marcadores que o contém e dos marcadores vizinhos a ela: se nenhuma
+    # componente que alcança o núcleo chega ao anel externo, o núcleo é inundado como na
+    # imagem inteira
+    componentes, _ = ndi.label(marcadores_janela == 0)
+    na_borda = np.unique(componentes[anel])
+    return not np.isin(componentes[nucleo], na_borda[na_borda > 0]).any()
+
+
+def _abertura_distancia(cinza, limiar_otsu):
+    # Etapas de marcadores_distancia até a transformada de distância, com o limiar global
+    _, thresh = cv2.threshold(cinza, limiar_otsu, 255, cv2.THRESH_BINARY_INV)
+    kernel = np.ones((3, 3), np.uint8)
+    opening_img = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, iterations=2)
+    return opening_img, cv2.distanceTransform(opening_img, cv2.DIST_L2, 5)
+
+
+class _UniaoBusca():
+    """Union-find sobre os rótulos provisórios dos blocos."""
+
+    def __init__(self, tamanho):
+        self.pai = np.arange(tamanho)
+
+    def raiz(self, x):
+        raiz = x
+        while self.pai[raiz] != raiz:
+            raiz = self.pai[raiz]
+        while self.pai[x] != raiz:
+            self.pai[x], x = raiz, self.pai[x]
+        return raiz
+
+    def unir(self, a, b):
+        a, b = self.raiz(a), self.raiz(b)
+        if a != b:
+            self.pai[max(a, b)] = min(a, b)
+
+    def raizes(self):
+        # Salto de ponteiros vetorizado até cada elemento apontar para a raiz
+        pai = self.pai
+        while True:
+            avo = pai[pai]
+            if np.array_equal(avo, pai):
+                return pai
+            pai = avo
+
+
+def segmentar_watershed_em_blocos(imagem, usar_distancia=True, tamanho_bloco=TAMANHO_BLOCO_PADRAO,
+                                  sobreposicao=SOBREPOSICAO_PADRAO, workers=None, caminho_saida=None,
+                                  sobreposicao_maxima=None):
+    """
+    Calcula os rótulos do watershed de calcular_segmentacao_watershed em blocos
+    sobrepostos, sem manter a imagem inteira nem os intermediários float (distância ou
+    gradiente) na memória.
+
+    As etapas que dependem da imagem inteira são feitas em passadas pelos blocos,
+    executadas em paralelo por threads (OpenCV e skimage liberam o GIL):
+
+    1. histograma global, de onde saem o limiar de Otsu (ou os percentis 20 e 80);
+    2. (distância) máximo global da transformada de distância, para o limiar de 70%;
+    3. componentes conexos dos marcadores em cada bloco, unidos entre blocos vizinhos
+       por union-find sobre as linhas e colunas das emendas e renumerados na mesma ordem
+       de cv2.connectedComponents / ndi.label;
+    4. watershed de cada bloco com um halo de sobreposicao pixels, guardando só o núcleo.
+
+    O halo cresce onde as etapas locais alcançam mais longe: para toda a imagem quando
+    a transformada de distância passa da sobreposição, e em cada bloco cuja região a
+    inundar (sem marcadores) liga o núcleo à borda da janela, dobrando até que ela fique
+    contida (no limite, a janela é a imagem inteira). Assim os rótulos são idênticos aos
+    da imagem inteira; a memória só passa do tamanho do bloco nos blocos que precisam.
+    No método do gradiente, o watershed do skimage insere todos os marcadores com a mesma
+    idade na fila de prioridade, e pixels empatados entre dois marcadores podem ficar com
+    o outro rótulo (alguns pixels por milhão).
+
+    Args:
+        imagem (numpy.ndarray): Imagem (linhas, colunas) ou (linhas, colunas, canais), de
+                                preferência mapeada em memória (np.load com mmap_mode).
+        usar_distancia (bool): Método do watershed (ver calcular_segmentacao_watershed).
+        tamanho_bloco (int): Lado do núcleo dos blocos.
+        sobreposicao (int): Halo inicial lido em volta de cada bloco.
+        workers (int): Número de threads; se None, usa os.cpu_count().
+        caminho_saida (str): Se informado, os rótulos são escritos em um .npy mapeado em
+                             memória, e os marcadores intermediários em um arquivo
+                             temporário, em vez de arrays na memória.
+        sobreposicao_maxima (int): Se informado, maior halo permitido; um bloco que
+                                   precisaria de mais lança ValueError, em vez de ler
+                                   uma janela maior.
+
+    Returns:
+        numpy.ndarray: Rótulos int32 (com -1 nas fronteiras no método da distância).
+    """
+    altura, largura = imagem.shape[:2]
+    sobreposicao = max(int(sobreposicao), _HALO_MORFOLOGIA)
+
+    def verificar_halo(halo, motivo):
+        if sobreposicao_maxima is not None and halo > sobreposicao_maxima:
+            raise ValueError(f"{motivo} exige uma sobreposição de {halo} pixels, mais que sobreposicao_maxima "
+                             f"({sobreposicao_maxima}).")
+
+    blocos = _blocos(altura, largura, tamanho_bloco)
+    grade_colunas = -(-largura // tamanho_bloco)
+    workers = workers or os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as pasta_temporaria, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        if caminho_saida is not None:
+            rotulos = np.lib.format.open_memmap(caminho_saida, mode="w+", dtype=np.int32, shape=(altura, largura))
+            marcadores = np.lib.format.open_memmap(os.path.join(pasta_temporaria, "marcadores.npy"), mode="w+",
+                                                   dtype=np.int32, shape=(altura, largura))
+        else:
+            rotulos = np.empty((altura, largura), np.int32)
+            marcadores = np.empty((altura, largura), np.int32)
+
+        # 1. Histograma global
+        def histograma_bloco(bloco):
+            return np.bincount(_ler_cinza_ubyte(imagem, *bloco).ravel(), minlength=256)
+
+        histograma = sum(executor.map(histograma_bloco, blocos))
+
+        if usar_distancia:
+            limiar_otsu = limiar_otsu_histograma(histograma)
+
+            # 2. Máximo global da transformada de distância
+            def maximo_distancia(bloco):
+                janela, nucleo = _janela(bloco, sobreposicao, altura, largura)
+                _, distancia = _abertura_distancia(_ler_cinza_ubyte(imagem, *janela), limiar_otsu)
+                return float(distancia[nucleo].max())
+
+            # A distância calculada em uma janela nunca é menor que a exata; abaixo do halo,
+            # ela é exata
+            maximo = max(executor.map(maximo_distancia, blocos))
+            while maximo >= sobreposicao:
+                sobreposicao = int(np.ceil(maximo)) + 1
+                verificar_halo(sobreposicao, f"A transformada de distância (até {maximo:.1f} pixels)")
+                maximo = max(executor.map(maximo_distancia, blocos))
+
+            # 3. Componentes do primeiro plano certo; -1 no fundo certo e 0 na região desconhecida
+            def componentes_bloco(bloco):
+                janela, nucleo = _janela(bloco, sobreposicao, altura, largura)
+                opening_img, distancia = _abertura_distancia(_ler_cinza_ubyte(imagem, *janela), limiar_otsu)
+                sure_bg = cv2.dilate(opening_img, np.ones((3, 3), np.uint8), iterations=3)[nucleo]
+                _, sure_fg = cv2.threshold(distancia[nucleo], 0.7 * maximo, 255, 0)
+                sure_fg = np.uint8(sure_fg)
+                num_rotulos, locais = cv2.connectedComponents(sure_fg)
+                locais[locais == 0] = -1
+                locais[cv2.subtract(sure_bg, sure_fg) == 255] = 0
+                return num_rotulos - 1, locais
+        else:
+            p20, p80 = percentil_histograma(histograma, 20), percentil_histograma(histograma, 80)
+
+            def componentes_bloco(bloco):
+                cinza = _ler_cinza_ubyte(imagem, *bloco)
+                locais, num_rotulos = ndi.label((cinza < p20) | (cinza > p80))
+                return num_rotulos, locais
+
+        def rotular_bloco(bloco):
+            n0, n1, m0, m1 = bloco
+            num_rotulos, locais = componentes_bloco(bloco)
+            marcadores[n0:n1, m0:m1] = locais
+            # Posição de cada componente na ordem de numeração da imagem inteira: primeiro
+            # bloco 2x2 (cv2.connectedComponents) ou primeiro pixel (ndi.label) da varredura
+            linhas, colunas = np.nonzero(locais > 0)
+            if usar_distancia:
+                chaves = ((linhas + n0) // 2) * ((largura + 1) // 2) + (colunas + m0) // 2
+            else:
+                chaves = (linhas + n0) * largura + (colunas + m0)
+            primeiras = np.full(num_rotulos + 1, np.iinfo(np.int64).max)
+            np.minimum.at(primeiras, locais[linhas, colunas], chaves)
+            return num_rotulos, primeiras[1:]
+
+        contagens, primeiras = zip(*executor.map(rotular_bloco, blocos))
+        deslocamentos = np.concatenate([[0], np.cumsum(contagens)])
+        uniao = _UniaoBusca(deslocamentos[-1] + 1)
+
+        def provisorios(locais, indices_blocos):
+            # Rótulos locais -> rótulos provisórios globais (0 fora dos componentes)
+            return np.where(locais > 0, locais + deslocamentos[indices_blocos], 0)
+
+        # Emendas: pares de pixels vizinhos de blocos diferentes que pertencem a componentes
+        vizinhanca = (-1, 0, 1) if usar_distancia else (0,)
+        pares = []
+        colunas_blocos = np.arange(largura) // tamanho_bloco
+        for linha in range(tamanho_bloco, altura, tamanho_bloco):
+            grade = linha // tamanho_bloco * grade_colunas
+            acima = provisorios(np.asarray(marcadores[linha - 1]), grade - grade_colunas + colunas_blocos)
+            abaixo = provisorios(np.asarray(marcadores[linha]), grade + colunas_blocos)
+            for d in vizinhanca:
+                a, b = acima[max(-d, 0):largura - max(d, 0)], abaixo[max(d, 0):largura - max(-d, 0)]
+                pares.append(np.stack([a, b], 1)[(a > 0) & (b > 0)])
+        linhas_blocos = np.arange(altura) // tamanho_bloco * grade_colunas
+        for coluna in range(tamanho_bloco, largura, tamanho_bloco):
+            grade = coluna // tamanho_bloco
+            esquerda = provisorios(np.asarray(marcadores[:, coluna - 1]), linhas_blocos + grade - 1)
+            direita = provisorios(np.asarray(marcadores[:, coluna]), linhas_blocos + grade)
+            for d in vizinhanca:
+                a, b = esquerda[max(-d, 0):altura - max(d, 0)], direita[max(d, 0):altura - max(-d, 0)]
+                pares.append(np.stack([a, b], 1)[(a > 0) & (b > 0)])
+        if pares:
+            for a, b in np.unique(np.concatenate(pares), axis=0):
+                uniao.unir(a, b)
+
+        # Renumeração global na ordem da imagem inteira
+        raizes = uniao.raizes()
+        primeira_raiz = np.full(len(raizes), np.iinfo(np.int64).max)
+        np.minimum.at(primeira_raiz, raizes[1:], np.concatenate(primeiras))
+        numeros = np.zeros(len(raizes), np.int64)
+        numeradas = np.unique(raizes[1:])
+        numeros[numeradas[np.argsort(primeira_raiz[numeradas], kind="stable")]] = np.arange(1, len(numeradas) + 1)
+        globais = numeros[raizes]
+
+        def numerar_bloco(indice_bloco):
+            n0, n1, m0, m1 = blocos[indice_bloco]
+            inicio, fim = deslocamentos[indice_bloco], deslocamentos[indice_bloco + 1]
+            if usar_distancia:
+                # -1 (fundo certo) -> 1, 0 (desconhecida) -> 0, componente k -> número + 1
+                tabela = np.concatenate([[1, 0], globais[inicio + 1:fim + 1] + 1]).astype(np.int32)
+                marcadores[n0:n1, m0:m1] = tabela[marcadores[n0:n1, m0:m1] + 1]
+            else:
+                tabela = np.concatenate([[0], globais[inicio + 1:fim + 1]]).astype(np.int32)
+                marcadores[n0:n1, m0:m1] = tabela[marcadores[n0:n1, m0:m1]]
+
+        list(executor.map(numerar_bloco, range(len(blocos))))
+
+        # 4. Watershed de cada bloco com halo
+        def watershed_bloco(bloco):
+            halo = sobreposicao
+            while True:
+                janela, nucleo = _janela(bloco, halo, altura, largura)
+                l0, l1, c0, c1 = janela
+                marcadores_janela = np.array(marcadores[l0:l1, c0:c1])
+                anel = _anel_externo(janela, altura, largura)
+                if usar_distancia:
+                    if _inundacao_contida(marcadores_janela, anel, nucleo):
+                        cv2.watershed(_ler_colorida(imagem, *janela), marcadores_janela)
+                        resultado = marcadores_janela
+                        break
+                else:
+                    # Na região sem marcadores dos percentis, quase sempre conexa, o anel vira
+                    # um marcador próprio: tudo o que vem de fora da janela passa por ele, então
+                    # se ele não inunda nenhum pixel do núcleo, nada de fora inundaria
+                    cinza = _ler_cinza_ubyte(imagem, *janela)
+                    mascara = cinza > 0
+                    marcadores_janela[anel & mascara] = _ROTULO_ANEL
+                    resultado = watershed(sobel(cinza), marcadores_janela, mask=mascara)
+                    if not np.any(resultado[nucleo] == _ROTULO_ANEL):
+                        break
+                halo *= 2
+                verificar_halo(halo, f"A inundação do bloco {bloco}")
+            n0, n1, m0, m1 = bloco
+            rotulos[n0:n1, m0:m1] = resultado[nucleo]
+
+        list(executor.map(watershed_bloco, blocos))
+        del marcadores
+
+    if caminho_saida is not None:
+        rotulos.flush()
+    return rotulos
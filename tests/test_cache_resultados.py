@@ -0,0 +1,93 @@
+import os
+import numpy as np
+import pytest
+
+from utilitarios.cache_resultados import CacheResultados, executar_etapa
+
+MIB = 1024 * 1024
+
+
+def _entrada(valor):
+    return {"dados": np.full(MIB // 8, valor, np.float64)}
+
+
+@pytest.mark.parametrize("comprimir", [False, True])
+def test_acerto_e_falha(tmp_path, comprimir):
+    cache = CacheResultados(str(tmp_path), comprimir=comprimir)
+    chamadas = []
+
+    def calcular():
+        chamadas.append(1)
+        return {"a": np.arange(10), "b": np.ones((2, 3), np.float32)}
+
+    chave = cache.chave("etapa", ["raiz"], limiar=3)
+    primeira = cache.obter_ou_calcular(chave, calcular)
+    segunda = cache.obter_ou_calcular(chave, calcular)
+    assert len(chamadas) == 1
+    assert (cache.acertos, cache.falhas) == (1, 1)
+    assert sorted(segunda) == ["a", "b"]
+    for nome, array in primeira.items():
+        np.testing.assert_array_equal(segunda[nome], array)
+        assert segunda[nome].dtype == array.dtype
+        assert not segunda[nome].flags.writeable
+    assert cache.obter(cache.chave("etapa", ["raiz"], limiar=4)) is None
+
+
+def test_chave_depende_dos_parametros_e_dependencias():
+    chave = CacheResultados.chave("etapa", ["raiz"], limiar=3)
+    assert chave == CacheResultados.chave("etapa", ["raiz"], limiar=3)
+    assert chave != CacheResultados.chave("etapa", ["raiz"], limiar=4)
+    assert chave != CacheResultados.chave("etapa", ["outra"], limiar=3)
+
+
+def test_executar_etapa_sem_cache():
+    assert executar_etapa(None, "etapa", [], {}, lambda: {"a": np.zeros(1)})[0] is None
+
+
+def test_limite_remove_as_menos_usadas(tmp_path):
+    cache = CacheResultados(str(tmp_path), tamanho_maximo=int(3.5 * MIB))
+    chaves = [cache.chave("etapa", [], indice=i) for i in range(3)]
+    for i, chave in enumerate(chaves):
+        cache.guardar(chave, _entrada(i))
+        os.utime(cache._caminho(chave), (i, i))
+    # Um acerto atualiza o mtime: a primeira entrada passa a ser a mais recente
+    assert cache.obter(chaves[0]) is not None
+    cache.guardar(cache.chave("etapa", [], indice=3), _entrada(3))
+    assert cache.obter(chaves[1]) is None
+    assert cache.obter(chaves[0]) is not None
+    assert cache.obter(chaves[2]) is not None
+    assert cache.tamanho() <= cache.tamanho_maximo
+    assert not [nome for nome in os.listdir(tmp_path) if nome.endswith(".tmp")]
+
+
+def test_entrada_removida_por_outro_processo(tmp_path, monkeypatch):
+    # Uma entrada listada que some antes de ser medida ou removida é ignorada
+    cache = CacheResultados(str(tmp_path), tamanho_maximo=int(1.5 * MIB))
+    listdir = os.listdir
+
+    def listdir_com_fantasma(caminho):
+        nomes = listdir(caminho)
+        return nomes + ["0" * 64] if caminho == str(tmp_path) else nomes
+
+    monkeypatch.setattr(os, "listdir", listdir_com_fantasma)
+    cache.guardar(cache.chave("etapa", [], indice=0), _entrada(0))
+    cache.guardar(cache.chave("etapa", [], indice=1), _entrada(1))
+    assert len(listdir(tmp_path)) == 1
+    cache.limpar()
+    assert listdir(tmp_path) == []
+
+
+def test_obter_entrada_removida_durante_a_leitura(tmp_path, monkeypatch):
+    cache = CacheResultados(str(tmp_path))
+    chave = cache.chave("etapa", [])
+    cache.guardar(chave, {"a": np.zeros(3), "b": np.ones(3)})
+    carregar = np.load
+
+    def carregar_e_remover(caminho, *args, **kwargs):
+        array = carregar(caminho, *args, **kwargs)
+        cache._remover(cache._caminho(chave))
+        return array
+
+    monkeypatch.setattr(np, "load", carregar_e_remover)
+    assert cache.obter(chave) is None
+    assert cache.falhas == 1
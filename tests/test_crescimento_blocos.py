@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+import tifffile
+
+from crescimento_regioes_python.crescimento_blocos import crescer_regiao_em_blocos
+from crescimento_regioes_python.motor_crescimento import crescer_regiao
+from utilitarios.imagens_sinteticas import imagem_textura
+
+
+@pytest.mark.parametrize("caso", range(30))
+def test_blocos_iguais_a_crescer_regiao(caso):
+    rng = np.random.default_rng(caso)
+    img = imagem_textura(300)
+    semente = tuple(int(v) for v in rng.integers(0, 300, 2))
+    limiar = int(rng.integers(-1, 60))
+    obtido = crescer_regiao_em_blocos(img, semente, limiar, tamanho_bloco=16) > 0
+    np.testing.assert_array_equal(obtido, crescer_regiao(img, semente, limiar))
+
+
+@pytest.mark.parametrize("tamanho_bloco", [16, 37, 512])
+def test_blocos_de_varios_tamanhos(tamanho_bloco):
+    img = imagem_textura(256, semente=3)
+    obtido = crescer_regiao_em_blocos(img, (128, 128), 25, tamanho_bloco=tamanho_bloco) > 0
+    np.testing.assert_array_equal(obtido, crescer_regiao(img, (128, 128), 25))
+
+
+@pytest.mark.parametrize("extensao", [".npy", ".tif"])
+def test_blocos_de_arquivo_mapeado(tmp_path, extensao):
+    img = imagem_textura(200, semente=1)
+    caminho_imagem = str(tmp_path / f"imagem{extensao}")
+    if extensao == ".npy":
+        np.save(caminho_imagem, img)
+    else:
+        tifffile.imwrite(caminho_imagem, img)
+    caminho_saida = str(tmp_path / "mascara.npy")
+    mascara = crescer_regiao_em_blocos(caminho_imagem, (100, 100), 20, caminho_saida, tamanho_bloco=32)
+    esperado = crescer_regiao(img, (100, 100), 20)
+    np.testing.assert_array_equal(mascara > 0, esperado)
+    np.testing.assert_array_equal(np.load(caminho_saida) > 0, esperado)
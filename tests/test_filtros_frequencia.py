@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from filtros_frequencia_python.espectro_rfft import magnitude_espectro_centrada, transformar_rfft
+from filtros_frequencia_python.filtros_frequencia import calcular_filtros_frequencia
+
+
+def _imagem(forma):
+    return np.random.default_rng(0).integers(0, 256, forma).astype(np.uint8)
+
+
+@pytest.mark.parametrize("forma", [(64, 96), (63, 95)])
+def test_magnitude_centrada_igual_ao_fftshift(forma):
+    img = _imagem(forma)
+    espectro_rfft = transformar_rfft(img, preencher=False)
+    esperada = np.fft.fftshift(np.abs(np.fft.fft2(img.astype(np.float64))))
+    np.testing.assert_allclose(magnitude_espectro_centrada(espectro_rfft.espectro, forma[1]), esperada, rtol=1e-4,
+                               atol=1e-2)
+
+
+@pytest.mark.parametrize("forma", [(300, 451), (97, 131), (64, 96)])
+def test_espectros_rfft_com_o_tamanho_da_imagem(forma):
+    img = _imagem(forma)
+    completo = calcular_filtros_frequencia(img, "completo")
+    rfft = calcular_filtros_frequencia(img, "rfft")
+    for campo in ("magnitude_espectro_original", "magnitude_espectro_passa_baixa", "magnitude_espectro_passa_alta"):
+        assert getattr(rfft, campo).shape == getattr(completo, campo).shape == forma, campo
+    # A frequência zero fica no mesmo pixel nos dois modos
+    centro = (forma[0] // 2, forma[1] // 2)
+    assert np.unravel_index(np.argmax(rfft.magnitude_espectro_original), forma) == centro
+    assert np.unravel_index(np.argmax(completo.magnitude_espectro_original), forma) == centro
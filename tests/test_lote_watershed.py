@@ -0,0 +1,17 @@
+import os
+
+from segmentacao_watershed_python.lote_watershed import nomes_saida
+
+
+def test_nomes_saida_sem_repeticao():
+    assert nomes_saida(["d/a.png", "d/b.jpg"]) == {"d/a.png": "a", "d/b.jpg": "b"}
+
+
+def test_nomes_saida_mesmo_nome_em_pastas_diferentes():
+    caminhos = [os.path.join("d", "x", "a.png"), os.path.join("d", "y", "a.png"), os.path.join("d", "b.png")]
+    assert nomes_saida(caminhos) == {caminhos[0]: "x__a.png", caminhos[1]: "y__a.png", caminhos[2]: "b"}
+
+
+def test_nomes_saida_mesmo_nome_com_extensoes_diferentes():
+    nomes = nomes_saida(["d/a.png", "d/a.jpg"])
+    assert nomes == {"d/a.png": "a.png", "d/a.jpg": "a.jpg"}
@@ -0,0 +1,193 @@
+import os
+import cv2
+import numpy as np
+import pytest
+import skimage.io
+from skimage import img_as_ubyte, color
+
+from crescimento_regioes_python.crescimento_regioes import IMAGENS_E_SEMENTES_EXEMPLO, LIMIAR_EXEMPLO
+from crescimento_regioes_python.indice_limiar import calcular_indice_minimax
+from crescimento_regioes_python.motor_crescimento import METODOS_CRESCIMENTO, crescer_regiao, crescer_regioes_multiplas
+from crescimento_regioes_python.referencia import crescer_regiao_referencia
+from utilitarios.imagens_sinteticas import imagem_textura
+
+PASTA_MODULO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "crescimento_regioes_python")
+PASTA_IMAGENS = os.path.join(PASTA_MODULO, "imagens_exemplo")
+PASTA_RESULTADOS = os.path.join(PASTA_MODULO, "resultados_imagens")
+CASOS = [(nome, semente) for nome, sementes in IMAGENS_E_SEMENTES_EXEMPLO.items() for semente in sementes]
+
+
+def _carregar_cinza(nome):
+    img = skimage.io.imread(os.path.join(PASTA_IMAGENS, nome))
+    return img_as_ubyte(color.rgb2gray(img) if img.ndim == 3 else img)
+
+
+@pytest.mark.parametrize("nome, semente", CASOS)
+@pytest.mark.parametrize("limiar", [0, 5, LIMIAR_EXEMPLO, 60])
+def test_motores_iguais_ao_laco_original(nome, semente, limiar):
+    img_gray = _carregar_cinza(nome)
+    referencia = crescer_regiao_referencia(img_gray, semente, limiar)
+    for metodo in METODOS_CRESCIMENTO:
+        np.testing.assert_array_equal(crescer_regiao(img_gray, semente, limiar, metodo), referencia, err_msg=metodo)
+
+
+@pytest.mark.parametrize("nome, semente", CASOS)
+def test_referencia_igual_aos_resultados_salvos(nome, semente):
+    # Saídas do laço original, com uma semente por passada, guardadas no repositório
+    i = IMAGENS_E_SEMENTES_EXEMPLO[nome].index(semente)
+    nome_saida = os.path.splitext(nome)[0] + f"_semente{i + 1}_limiar{LIMIAR_EXEMPLO}_segmentada.png"
+    caminho_saida = os.path.join(PASTA_RESULTADOS, nome_saida)
+    if not os.path.exists(caminho_saida):
+        pytest.skip(f"{nome_saida} ainda não foi gerada")
+    salva = skimage.io.imread(caminho_saida) > 0
+    img_gray = _carregar_cinza(nome)
+    np.testing.assert_array_equal(crescer_regiao_referencia(img_gray, semente, LIMIAR_EXEMPLO), salva)
+
+
+def test_indice_minimax_igual_a_crescer_regiao():
+    img = imagem_textura(128)
+    semente = (64, 64)
+    indice = calcular_indice_minimax(img, semente)
+    for limiar in range(0, 256, 5):
+        np.testing.assert_array_equal(indice.consultar(limiar), crescer_regiao(img, semente, limiar),
+                                      err_msg=f"limiar {limiar}")
+
+
+def _rampa(altura=64, largura=256, passo=1):
+    # Intensidade crescendo com a coluna
+    return np.tile((np.arange(largura) * passo).clip(0, 255).astype(np.uint8), (altura, 1))
+
+
+def _colunas(regiao):
+    # A região inteira é formada por colunas completas; retorna as colunas
+    colunas = np.flatnonzero(regiao.any(axis=0))
+    assert regiao[:, colunas].all()
+    return colunas
+
+
+@pytest.mark.parametrize("ordem", ["largura", "prioridade"])
+def test_criterio_semente_na_rampa(ordem):
+    regiao = crescer_regiao(_rampa(), (32, 100), 10, criterio="semente", ordem=ordem)
+    np.testing.assert_array_equal(_colunas(regiao), np.arange(90, 111))
+
+
+def test_criterio_media_na_rampa():
+    # Crescendo por níveis, a região fica simétrica em torno da semente e a média não muda
+    regiao = crescer_regiao(_rampa(), (32, 100), 10, criterio="media", ordem="largura")
+    np.testing.assert_array_equal(_colunas(regiao), np.arange(90, 111))
+
+
+@pytest.mark.parametrize("criterio", ["media", "media_desvio"])
+def test_ordem_prioridade_para_na_fronteira(criterio):
+    # Crescimento semeado: ao terminar, nenhum vizinho da região passa na tolerância
+    # calculada com as estatísticas finais da região
+    img = imagem_textura(96)
+    limiar, k = 12, 1.0
+    regiao = crescer_regiao(img, (48, 48), limiar, criterio=criterio, k=k, ordem="prioridade")
+    valores = img[regiao].astype(np.float64)
+    tolerancia = limiar if criterio == "media" else max(limiar, k * valores.std())
+    vizinhos = cv2.dilate(regiao.view(np.uint8), np.ones((3, 3), np.uint8)).view(bool) & ~regiao
+    assert vizinhos.any()
+    assert np.all(np.abs(img[vizinhos] - valores.mean()) > tolerancia)
+
+
+def test_ordem_prioridade_usa_a_media_atual():
+    # 92 e 108 estão a 8 da semente; depois que 92 entra, a média cai para 96 e 108 passa a
+    # estar a 12, fora do limiar, enquanto a região segue pela direita
+    img = np.array([[108, 100, 92, 91, 90, 89, 88, 60]], np.uint8)
+    regiao = crescer_regiao(img, (0, 1), 10, criterio="media", ordem="prioridade")
+    np.testing.assert_array_equal(regiao[0], [False, True, True, True, True, True, True, False])
+
+
+def test_criterio_media_desvio_na_rampa():
+    rampa = _rampa()
+    media = crescer_regiao(rampa, (32, 100), 10, criterio="media")
+    # Com k=0 a tolerância é só o limiar, como em "media"
+    np.testing.assert_array_equal(crescer_regiao(rampa, (32, 100), 10, criterio="media_desvio", k=0), media)
+    # Em uma rampa o desvio cresce com a largura da região, que acaba tomando a imagem toda
+    for ordem in ("largura", "prioridade"):
+        assert crescer_regiao(rampa, (32, 100), 10, criterio="media_desvio", k=2, ordem=ordem).all()
+
+
+def test_criterio_vizinho_na_rampa():
+    assert crescer_regiao(_rampa(), (32, 100), 1, criterio="vizinho").all()
+    np.testing.assert_array_equal(_colunas(crescer_regiao(_rampa(passo=2), (32, 100), 1, criterio="vizinho")), [100])
+
+
+def _vizinho_referencia(img, semente, limiar):
+    # Componente conexo (vizinhança 8) do grafo cujas arestas ligam vizinhos com
+    # diferença <= limiar, por busca em profundidade pixel a pixel
+    altura, largura = img.shape
+    regiao = np.zeros(img.shape, bool)
+    regiao[semente] = True
+    pilha = [semente]
+    while pilha:
+        x, y = pilha.pop()
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                nx, ny = x + dx, y + dy
+                if (0 <= nx < altura and 0 <= ny < largura and not regiao[nx, ny]
+                        and abs(int(img[nx, ny]) - int(img[x, y])) <= limiar):
+                    regiao[nx, ny] = True
+                    pilha.append((nx, ny))
+    return regiao
+
+
+@pytest.mark.parametrize("limiar", [1, 3, 8])
+def test_criterio_vizinho_nao_depende_da_ordem(limiar):
+    img = np.random.default_rng(limiar).integers(0, 256, (64, 64)).astype(np.uint8)
+    img = cv2.GaussianBlur(img, (5, 5), 1.5)
+    referencia = _vizinho_referencia(img, (32, 32), limiar)
+    for ordem in ("largura", "prioridade"):
+        np.testing.assert_array_equal(crescer_regiao(img, (32, 32), limiar, criterio="vizinho", ordem=ordem),
+                                      referencia, err_msg=ordem)
+
+
+@pytest.mark.parametrize("nome, semente", CASOS)
+def test_multiplas_com_uma_semente_igual_a_crescer_regiao(nome, semente):
+    img_gray = _carregar_cinza(nome)
+    rotulos = crescer_regioes_multiplas(img_gray, [semente], LIMIAR_EXEMPLO)
+    assert rotulos.dtype == np.int32
+    np.testing.assert_array_equal(rotulos == 1, crescer_regiao(img_gray, semente, LIMIAR_EXEMPLO))
+
+
+def test_multiplas_regioes_separadas():
+    # Faixas separadas por uma coluna de valor distante: cada região é a de crescer_regiao
+    img = np.full((20, 30), 50, np.uint8)
+    img[:, 15] = 200
+    img[:, 16:] = 90
+    sementes, limiares = [(5, 3), (10, 25)], [10, 4]
+    rotulos = crescer_regioes_multiplas(img, sementes, limiares)
+    for i, (semente, limiar) in enumerate(zip(sementes, limiares), start=1):
+        np.testing.assert_array_equal(rotulos == i, crescer_regiao(img, semente, limiar))
+    assert not rotulos[:, 15].any()
+
+
+@pytest.mark.parametrize("linha, esperado", [
+    # 1. a região que chega primeiro; 2. no mesmo passo, a semente de valor mais próximo
+    ([100, 102, 102, 103, 102, 102, 104], [1, 1, 1, 2, 2, 2, 2]),
+    # 3. persistindo o empate, a semente de menor índice
+    ([100, 102, 102, 102, 102, 102, 104], [1, 1, 1, 1, 2, 2, 2]),
+])
+def test_multiplas_desempate(linha, esperado):
+    img = np.array([linha], np.uint8)
+    np.testing.assert_array_equal(crescer_regioes_multiplas(img, [(0, 0), (0, 6)], 5)[0], esperado)
+    # Com as sementes em ordem inversa, o empate do terceiro critério troca de lado
+    invertido = crescer_regioes_multiplas(img, [(0, 6), (0, 0)], 5)[0]
+    if linha[3] == 102:
+        np.testing.assert_array_equal(invertido, [2, 2, 2, 1, 1, 1, 1])
+    else:
+        np.testing.assert_array_equal(invertido, 3 - np.array(esperado))
+
+
+def test_multiplas_semente_repetida():
+    img = np.full((8, 8), 10, np.uint8)
+    rotulos = crescer_regioes_multiplas(img, [(2, 2), (5, 5), (2, 2)], 0)
+    assert set(np.unique(rotulos)) == {1, 2}
+    assert rotulos[2, 2] == 1 and rotulos[5, 5] == 2
+
+
+@pytest.mark.parametrize("sementes, limiares", [([], 10), ([(0, 0), (9, 9)], 10), ([(0, 0)], [1, 2])])
+def test_multiplas_argumentos_invalidos(sementes, limiares):
+    with pytest.raises(ValueError):
+        crescer_regioes_multiplas(np.zeros((5, 5), np.uint8), sementes, limiares)
@@ -0,0 +1,133 @@
+import json
+import os
+import cv2
+import numpy as np
+import pytest
+
+from processar import (OpcoesSaida, _caminho_manifesto, _hash_etapas, aplicar_parametros, ler_sementes,
+                       processar_imagem, processar_imagens, saidas_atualizadas, validar_etapas)
+
+
+def _gravar_imagem(caminho, altura, largura, semente=0):
+    rng = np.random.default_rng(semente)
+    cv2.imwrite(str(caminho), cv2.GaussianBlur(rng.integers(0, 256, (altura, largura), np.uint8), (9, 9), 3))
+    return str(caminho)
+
+
+def test_validar_etapas_completa_os_padroes():
+    parametros = {"usar_distancia": True}
+    etapas = validar_etapas([{"algoritmo": "filtros_frequencia"},
+                             {"algoritmo": "watershed", "entrada": "passa_baixa", "parametros": parametros}])
+    assert etapas == [
+        {"algoritmo": "filtros_frequencia", "parametros": {}, "entrada": "original", "nome": "filtros_frequencia"},
+        {"algoritmo": "watershed", "parametros": parametros, "entrada": "passa_baixa", "nome": "watershed"},
+    ]
+
+
+@pytest.mark.parametrize("etapas", [
+    [{"algoritmo": "desconhecido"}],
+    [{"algoritmo": "watershed", "entrada": "passa_baixa"}],
+    [{"algoritmo": "watershed"}, {"algoritmo": "crescimento_regioes", "entrada": "passa_baixa"}],
+    [{"algoritmo": "watershed"}, {"algoritmo": "watershed"}],
+])
+def test_validar_etapas_invalidas(etapas):
+    with pytest.raises(ValueError):
+        validar_etapas(etapas)
+
+
+def test_aplicar_parametros():
+    etapas = validar_etapas([{"algoritmo": "watershed"}, {"algoritmo": "watershed", "nome": "gradiente"}])
+    aplicar_parametros(etapas, ["watershed.usar_distancia=false", "gradiente.estrategia_marcadores=percentis"])
+    assert etapas[0]["parametros"] == {"usar_distancia": False}
+    # Pelo algoritmo, todas as etapas dele; pelo nome, só a etapa
+    assert etapas[1]["parametros"] == {"usar_distancia": False, "estrategia_marcadores": "percentis"}
+
+
+@pytest.mark.parametrize("atribuicao", ["watershed", "watershed=1", "filtros_frequencia.D0=1"])
+def test_aplicar_parametros_invalidos(atribuicao):
+    with pytest.raises(ValueError):
+        aplicar_parametros(validar_etapas([{"algoritmo": "watershed"}]), [atribuicao])
+
+
+def test_saidas_atualizadas(tmp_path):
+    caminho = _gravar_imagem(tmp_path / "a.png", 64, 80)
+    saida = str(tmp_path / "saida")
+    os.makedirs(os.path.join(saida, ".processar"))
+    etapas = validar_etapas([{"algoritmo": "watershed"}])
+    hash_etapas = _hash_etapas(etapas, OpcoesSaida())
+    assert not saidas_atualizadas(caminho, saida, hash_etapas)
+
+    assert processar_imagem(caminho, saida, etapas).erro is None
+    assert saidas_atualizadas(caminho, saida, hash_etapas, "mtime")
+    assert saidas_atualizadas(caminho, saida, hash_etapas, "hash")
+    assert not saidas_atualizadas(caminho, saida, _hash_etapas(validar_etapas([{"algoritmo": "crescimento_regioes"}]),
+                                                               OpcoesSaida()))
+    assert processar_imagem(caminho, saida, etapas, pular="mtime").pulada
+
+    # Só a data mudou: o hash dos bytes confirma que a entrada é a mesma
+    estado = os.stat(caminho)
+    os.utime(caminho, ns=(estado.st_atime_ns, estado.st_mtime_ns + 10 ** 9))
+    assert saidas_atualizadas(caminho, saida, hash_etapas, "mtime")
+
+    # Mesmo tamanho, conteúdo diferente
+    with open(caminho, "r+b") as arquivo:
+        arquivo.seek(-1, os.SEEK_END)
+        ultimo = arquivo.read(1)
+        arquivo.seek(-1, os.SEEK_END)
+        arquivo.write(bytes([ultimo[0] ^ 1]))
+    assert not saidas_atualizadas(caminho, saida, hash_etapas, "hash")
+
+
+def test_saidas_atualizadas_sem_uma_saida(tmp_path):
+    caminho = _gravar_imagem(tmp_path / "a.png", 64, 80)
+    saida = str(tmp_path / "saida")
+    os.makedirs(os.path.join(saida, ".processar"))
+    etapas = validar_etapas([{"algoritmo": "watershed"}])
+    processar_imagem(caminho, saida, etapas)
+    with open(_caminho_manifesto(saida, "a"), encoding="utf-8") as arquivo:
+        saidas = json.load(arquivo)["saidas"]
+    os.remove(os.path.join(saida, saidas[0]))
+    assert not saidas_atualizadas(caminho, saida, _hash_etapas(etapas, OpcoesSaida()))
+
+
+def test_manifesto_so_com_as_saidas_da_imagem(tmp_path):
+    # "a" é prefixo das saídas de "a_watershed"
+    entradas = tmp_path / "entradas"
+    entradas.mkdir()
+    caminhos = [_gravar_imagem(entradas / "a.png", 64, 64), _gravar_imagem(entradas / "a_watershed.png", 64, 64, 1)]
+    saida = str(tmp_path / "saida")
+    etapas = validar_etapas([{"algoritmo": "watershed"}])
+    assert all(resultado.erro is None for resultado in processar_imagens(caminhos, saida, etapas, workers=1))
+    with open(_caminho_manifesto(saida, "a"), encoding="utf-8") as arquivo:
+        saidas = json.load(arquivo)["saidas"]
+    assert saidas and all(nome.startswith("a_watershed_") and not nome.startswith("a_watershed_watershed")
+                          for nome in saidas)
+
+
+def test_sementes_por_imagem(tmp_path):
+    entradas = tmp_path / "entradas"
+    entradas.mkdir()
+    caminhos = [_gravar_imagem(entradas / "grande.png", 120, 160), _gravar_imagem(entradas / "pequena.png", 40, 50)]
+    arquivo_sementes = tmp_path / "sementes.json"
+    arquivo_sementes.write_text(json.dumps({"grande.png": [[100, 150], [10, 10]], "pequena": [[30, 40]]}))
+    sementes = ler_sementes(str(arquivo_sementes))
+    assert sementes == {"grande.png": [(100, 150), (10, 10)], "pequena": [(30, 40)]}
+
+    saida = str(tmp_path / "saida")
+    etapas = validar_etapas([{"algoritmo": "crescimento_regioes", "parametros": {"semente": [100, 150]}}])
+    resultados = list(processar_imagens(caminhos, saida, etapas, workers=1, sementes=sementes))
+    assert [resultado.erro for resultado in resultados] == [None, None]
+    arquivos = os.listdir(saida)
+    # Duas sementes: uma passada com várias sementes; uma: o crescimento de uma semente
+    assert "grande_crescimento_regioes_rotulos.png" in arquivos
+    assert "pequena_crescimento_regioes_segmentada.png" in arquivos
+    # Sem o mapa, a semente da etapa fica fora da imagem pequena
+    resultado = processar_imagem(caminhos[1], str(tmp_path / "sem_mapa"), etapas)
+    assert resultado.erro is not None and resultado.erro.startswith("ValueError")
+
+
+def test_ler_sementes_invalidas(tmp_path):
+    arquivo_sementes = tmp_path / "sementes.json"
+    arquivo_sementes.write_text(json.dumps({"a.png": [1, 2]}))
+    with pytest.raises(ValueError):
+        ler_sementes(str(arquivo_sementes))
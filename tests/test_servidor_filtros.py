@@ -0,0 +1,107 @@
+import asyncio
+import concurrent.futures
+import cv2
+import numpy as np
+import pytest
+from skimage import color
+
+from filtros_frequencia_python.servidor_filtros import (LoteadorFFT, ParametrosFiltro, ServidorFiltros,
+                                                        decodificar_imagem, filtrar_lote, ler_parametros_filtro)
+
+
+def _imagem(semente=0, forma=(48, 64)):
+    return np.random.default_rng(semente).integers(0, 256, forma).astype(np.uint8)
+
+
+def test_parametros_padrao():
+    assert ler_parametros_filtro({}) == ParametrosFiltro()
+    parametros = ler_parametros_filtro({"tipo": ["butterworth"], "banda": ["passa_banda"], "D0": ["12.5"],
+                                        "ordem": ["3"], "largura": ["4"]})
+    assert parametros == ParametrosFiltro("butterworth", "passa_banda", 12.5, 3, 4.0)
+
+
+@pytest.mark.parametrize("consulta", [
+    {"tipo": ["triangular"]},
+    {"banda": ["passa_tudo"]},
+    {"D0": ["0"]},
+    {"D0": ["abc"]},
+    {"banda": ["passa_banda"]},
+])
+def test_parametros_invalidos(consulta):
+    with pytest.raises(ValueError):
+        ler_parametros_filtro(consulta)
+
+
+def test_decodificar_png_cinza_e_bgra():
+    cinza = _imagem()
+    _, png = cv2.imencode(".png", cinza)
+    np.testing.assert_array_equal(decodificar_imagem(png.tobytes()), cinza)
+    rgb = np.stack([_imagem(1), _imagem(2), _imagem(3)], axis=-1)
+    bgra = np.dstack([rgb[..., ::-1], np.full(cinza.shape, 255, np.uint8)])
+    _, png = cv2.imencode(".png", bgra)
+    # O canal alfa é descartado e a conversão é a de calcular_filtros_frequencia
+    np.testing.assert_allclose(decodificar_imagem(png.tobytes()), color.rgb2gray(rgb))
+
+
+def test_decodificar_pixels_crus():
+    rgba = np.stack([_imagem(1), _imagem(2), _imagem(3), _imagem(4)], axis=-1)
+    np.testing.assert_array_equal(decodificar_imagem(_imagem().tobytes(), "48x64"), _imagem())
+    np.testing.assert_allclose(decodificar_imagem(rgba.tobytes(), "48x64x4"), color.rgb2gray(rgba[..., :3]))
+
+
+@pytest.mark.parametrize("dados, forma", [(bytes(100), "48x64"), (bytes(48 * 64), "48x64x1x1"),
+                                          (b"nao e uma imagem", None)])
+def test_decodificar_invalido(dados, forma):
+    with pytest.raises(ValueError):
+        decodificar_imagem(dados, forma)
+
+
+def test_loteador_junta_formas_iguais():
+    imagens = [_imagem(semente).astype(np.float64) for semente in range(4)] + [_imagem(9, (32, 32)).astype(np.float64)]
+    parametros = [ParametrosFiltro(), ParametrosFiltro(banda="passa_alta"), ParametrosFiltro("ideal", D0=10),
+                  ParametrosFiltro("butterworth", "passa_banda", 20, 2, 6), ParametrosFiltro()]
+
+    async def filtrar():
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            loteador = LoteadorFFT(executor, janela=0.05, tamanho_maximo=4)
+            resultados = await asyncio.gather(*(loteador.filtrar(imagem, parametros_filtro)
+                                                for imagem, parametros_filtro in zip(imagens, parametros)))
+        return loteador, resultados
+
+    loteador, resultados = asyncio.run(filtrar())
+    # As quatro imagens 48x64 enchem um lote; a 32x32 sai sozinha ao fim da janela
+    assert [tamanho for _, tamanho in resultados] == [4, 4, 4, 4, 1]
+    assert (loteador.lotes, loteador.itens) == (2, 5)
+    esperadas = filtrar_lote(imagens[:4], parametros[:4]) + filtrar_lote(imagens[4:], parametros[4:])
+    for (filtrada, _), esperada in zip(resultados, esperadas):
+        np.testing.assert_array_equal(filtrada, esperada)
+
+
+def test_loteador_sem_lotes_por_padrao():
+    async def filtrar():
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            loteador = LoteadorFFT(executor)
+            return await asyncio.gather(*(loteador.filtrar(_imagem(semente).astype(np.float64), ParametrosFiltro())
+                                          for semente in range(3)))
+
+    assert [tamanho for _, tamanho in asyncio.run(filtrar())] == [1, 1, 1]
+
+
+@pytest.mark.parametrize("requisicao", [b"LIXO\r\n\r\n", b"GET /saude\r\n\r\n",
+                                        b"POST /filtrar HTTP/1.1\r\nContent-Length: x\r\n\r\n"])
+def test_requisicao_malformada_recebe_400(requisicao):
+    async def enviar():
+        servidor = await ServidorFiltros(porta=0, workers=1).iniciar()
+        try:
+            leitor, escritor = await asyncio.open_connection(servidor.host, servidor.porta)
+            escritor.write(requisicao)
+            await escritor.drain()
+            resposta = await asyncio.wait_for(leitor.read(), 5)
+            escritor.close()
+            return resposta
+        finally:
+            await servidor.encerrar()
+
+    resposta = asyncio.run(enviar())
+    assert resposta.startswith(b"HTTP/1.1 400 Bad Request\r\n")
+    assert b"Connection: close\r\n" in resposta
@@ -0,0 +1,73 @@
+import os
+import cv2
+import numpy as np
+import pytest
+import skimage.io
+
+from segmentacao_watershed_python.segmentacao_watershed import calcular_segmentacao_watershed
+from segmentacao_watershed_python.watershed_blocos import segmentar_watershed_em_blocos
+from utilitarios.imagens_sinteticas import imagem_discos
+
+PASTA_IMAGENS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "segmentacao_watershed_python", "imagens_exemplo")
+IMAGENS_EXEMPLO = sorted(os.listdir(PASTA_IMAGENS))
+
+
+def _rotulos_vizinhos(rotulos):
+    # Conjunto de rótulos 8-vizinhos de cada pixel, como máscaras por deslocamento
+    preenchido = np.pad(rotulos, 1, mode="edge")
+    altura, largura = rotulos.shape
+    return [preenchido[1 + dl:1 + dl + altura, 1 + dc:1 + dc + largura]
+            for dl in (-1, 0, 1) for dc in (-1, 0, 1) if dl or dc]
+
+
+@pytest.mark.parametrize("semente", [0, 1])
+@pytest.mark.parametrize("usar_distancia", [True, False])
+@pytest.mark.parametrize("tamanho_bloco", [64, 100, 256])
+def test_blocos_iguais_a_imagem_inteira_discos(semente, usar_distancia, tamanho_bloco):
+    img = imagem_discos(300, 337, semente=semente)
+    referencia = calcular_segmentacao_watershed(img, usar_distancia).rotulos
+    rotulos = segmentar_watershed_em_blocos(img, usar_distancia, tamanho_bloco, workers=2)
+    if usar_distancia:
+        np.testing.assert_array_equal(rotulos, referencia)
+        return
+    # No gradiente, um pixel disputado por dois marcadores fica com o que chega primeiro na
+    # fila de prioridade do skimage, e a ordem de chegada em valores empatados depende da
+    # janela. Só esses pixels podem diferir: na fronteira entre duas regiões da imagem
+    # inteira e com o rótulo de uma região vizinha.
+    vizinhos = _rotulos_vizinhos(referencia)
+    fronteira = np.any([vizinho != referencia for vizinho in vizinhos], axis=0)
+    rotulo_vizinho = np.any([vizinho == rotulos for vizinho in vizinhos], axis=0)
+    diferentes = rotulos != referencia
+    np.testing.assert_array_equal(rotulos[~fronteira], referencia[~fronteira])
+    assert np.all(rotulo_vizinho[diferentes])
+    # Pixels isolados, não uma costura entre blocos
+    _, componentes = cv2.connectedComponents(diferentes.view(np.uint8))
+    assert np.bincount(componentes[diferentes]).max(initial=0) <= 2
+
+
+@pytest.mark.parametrize("nome", IMAGENS_EXEMPLO)
+@pytest.mark.parametrize("usar_distancia", [True, False])
+@pytest.mark.parametrize("tamanho_bloco, sobreposicao", [(128, 128), (64, 8)])
+def test_blocos_iguais_a_imagem_inteira_exemplos(nome, usar_distancia, tamanho_bloco, sobreposicao):
+    # Regiões sem marcadores inundadas a partir de marcadores distantes fazem o halo crescer
+    img = skimage.io.imread(os.path.join(PASTA_IMAGENS, nome))
+    referencia = calcular_segmentacao_watershed(img, usar_distancia).rotulos
+    rotulos = segmentar_watershed_em_blocos(img, usar_distancia, tamanho_bloco, sobreposicao)
+    np.testing.assert_array_equal(rotulos, referencia)
+
+
+def test_sobreposicao_maxima():
+    img = skimage.io.imread(os.path.join(PASTA_IMAGENS, "coins_original.png"))
+    with pytest.raises(ValueError):
+        segmentar_watershed_em_blocos(img, False, 64, 8, sobreposicao_maxima=16)
+
+
+def test_rotulos_em_arquivo(tmp_path):
+    img = imagem_discos(200, 230)
+    caminho_imagem = tmp_path / "imagem.npy"
+    np.save(caminho_imagem, img)
+    rotulos = segmentar_watershed_em_blocos(np.load(caminho_imagem, mmap_mode="r"), True, 64,
+                                            caminho_saida=str(tmp_path / "rotulos.npy"))
+    np.testing.assert_array_equal(np.load(tmp_path / "rotulos.npy"), rotulos)
+    np.testing.assert_array_equal(rotulos, calcular_segmentacao_watershed(img, True).rotulos)
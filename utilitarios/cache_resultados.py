@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import numpy as np
+
+from .instrumentacao import contar
+
+# Incrementar quando o formato das entradas ou o cálculo de alguma etapa mudar
+VERSAO_CACHE = 1
+TAMANHO_MAXIMO_PADRAO = 1024 * 1024 * 1024
+
+
+def hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """SHA-256 (hex) dos bytes de um arquivo, lido em blocos."""
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b""):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def hash_array(array):
+    """SHA-256 (hex) do conteúdo, da forma e do dtype de um array."""
+    array = np.ascontiguousarray(array)
+    resumo = hashlib.sha256(f"{array.shape}{array.dtype.str}".encode())
+    resumo.update(array.data)
+    return resumo.hexdigest()
+
+
+class CacheResultados():
+    """
+    Cache em disco de resultados de etapas de processamento, endereçado por conteúdo.
+
+    A chave de uma etapa é o SHA-256 do nome da etapa, de seus parâmetros e das chaves
+    das etapas de que depende (na raiz, o hash dos bytes da imagem). Assim, mudar um
+    parâmetro só invalida a etapa que o usa e as seguintes.
+
+    Cada entrada é um dicionário de arrays. Por padrão (comprimir=False) ela é gravada em
+    uma pasta com um .npy por array, recarregados por memory-map sem ler os dados, o modo
+    mais rápido em acertos. Com comprimir=True, em um .npz comprimido, lido e
+    descomprimido inteiro em um acerto: ocupa menos disco, mas para arrays float
+    (espectros) descomprimir custa mais que recalcular.
+
+    O tamanho total é limitado por tamanho_maximo, removendo as entradas usadas há mais
+    tempo (LRU pelo mtime, que é atualizado a cada acerto). O diretório pode ser
+    compartilhado por vários processos: gravações e remoções são trocas atômicas de nome,
+    e uma entrada removida por outro processo conta como falha.
+    """
+
+    def __init__(self, diretorio, tamanho_maximo=TAMANHO_MAXIMO_PADRAO, comprimir=False):
+        self.diretorio = diretorio
+        self.tamanho_maximo = tamanho_maximo
+        self.comprimir = comprimir
+        self.acertos = 0
+        self.falhas = 0
+        self._trava = threading.Lock()
+        # Total em bytes mantido a cada gravação; o diretório só é percorrido de novo
+        # quando ele passa do limite (gravações de outros processos entram nessa hora)
+        self._total = None
+        os.makedirs(diretorio, exist_ok=True)
+
+    @staticmethod
+    def chave(etapa, dependencias=(), **parametros):
+        """
+        Calcula a chave de uma etapa.
+
+        Args:
+            etapa (str): Nome da etapa (por exemplo "watershed.marcadores").
+            dependencias (iterable): Chaves das etapas anteriores ou hash da entrada.
+            **parametros: Parâmetros da etapa (serializados em JSON, valores não
+                          serializáveis pelo repr).
+
+        Returns:
+            str: Chave hexadecimal.
+        """
+        descricao = json.dumps({"versao": VERSAO_CACHE, "etapa": etapa, "dependencias": list(dependencias),
+                                "parametros": parametros}, sort_keys=True, default=repr)
+        return hashlib.sha256(descricao.encode()).hexdigest()
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, chave + (".npz" if self.comprimir else ""))
+
+    def obter(self, chave):
+        """
+        Retorna os arrays de uma entrada, ou None se ela não existir (conta acerto/falha).
+        """
+        caminho = self._caminho(chave)
+        try:
+            if self.comprimir:
+                with np.load(caminho) as arquivo:
+                    arrays = {nome: arquivo[nome] for nome in arquivo.files}
+                # Somente leitura, como os arrays mapeados do outro modo
+                for array in arrays.values():
+                    array.setflags(write=False)
+            else:
+                # Uma entrada removida por outro processo some por inteiro (é renomeada antes
+                # de apagada), então um arquivo ausente aqui é uma falha, nunca meia entrada
+                arrays = {os.path.splitext(nome)[0]: np.load(os.path.join(caminho, nome), mmap_mode="r")
+                          for nome in os.listdir(caminho)}
+        except (FileNotFoundError, NotADirectoryError):
+            with self._trava:
+                self.falhas += 1
+            contar("cache.falhas")
+            return None
+        try:
+            os.utime(caminho)
+        except FileNotFoundError:
+            # Removida depois da leitura: os arrays já abertos continuam válidos
+            pass
+        with self._trava:
+            self.acertos += 1
+        contar("cache.acertos")
+        return arrays
+
+    def guardar(self, chave, arrays):
+        """
+        Grava uma entrada (dicionário nome -> array) e aplica o limite de tamanho.
+        """
+        caminho = self._caminho(chave)
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if self.comprimir:
+            with open(temporario, "wb") as arquivo:
+                np.savez_compressed(arquivo, **arrays)
+        else:
+            os.makedirs(temporario)
+            for nome, array in arrays.items():
+                np.save(os.path.join(temporario, f"{nome}.npy"), np.asarray(array))
+        tamanho = _tamanho_entrada(temporario)
+        # Troca atômica: leitores concorrentes nunca veem uma entrada incompleta
+        try:
+            os.replace(temporario, caminho)
+        except OSError:
+            # A mesma entrada já foi gravada por outro processo (pasta não vazia)
+            shutil.rmtree(temporario, ignore_errors=True)
+            return
+        with self._trava:
+            if self._total is None:
+                self._total = self.tamanho()
+            else:
+                self._total += tamanho
+            excedeu = self._total > self.tamanho_maximo
+        if excedeu:
+            self._aplicar_limite()
+
+    def obter_ou_calcular(self, chave, calcular):
+        """
+        Retorna a entrada da chave ou a calcula com calcular() (que retorna um dicionário
+        de arrays) e a grava. Em um acerto, os arrays são somente leitura.
+        """
+        arrays = self.obter(chave)
+        if arrays is None:
+            arrays = calcular()
+            self.guardar(chave, arrays)
+        return arrays
+
+    def _entradas(self):
+        entradas = []
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith(".tmp"):
+                continue
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                entradas.append((os.path.getmtime(caminho), _tamanho_entrada(caminho), caminho))
+            except FileNotFoundError:
+                # Removida por outro processo durante a listagem
+                continue
+        return entradas
+
+    def _remover(self, caminho):
+        # Renomeia antes de apagar: a entrada some de uma vez para os leitores, e a pasta
+        # renomeada (.tmp) é ignorada pelas listagens enquanto é apagada
+        removida = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.rename(caminho, removida)
+        except FileNotFoundError:
+            return False
+        if os.path.isdir(removida):
+            shutil.rmtree(removida, ignore_errors=True)
+        else:
+            os.remove(removida)
+        return True
+
+    def _aplicar_limite(self):
+        entradas = sorted(self._entradas())
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        for _, tamanho, caminho in entradas:
+            if total <= self.tamanho_maximo:
+                break
+            # Já removida por outro processo ou por este: em ambos os casos não ocupa mais espaço
+            self._remover(caminho)
+            total -= tamanho
+        with self._trava:
+            self._total = total
+
+    def tamanho(self):
+        """Tamanho total das entradas em bytes."""
+        return sum(tamanho for _, tamanho, _ in self._entradas())
+
+    def estatisticas(self):
+        """Acertos, falhas, número de entradas e tamanho em bytes."""
+        entradas = self._entradas()
+        return {"acertos": self.acertos, "falhas": self.falhas, "entradas": len(entradas),
+                "bytes": sum(tamanho for _, tamanho, _ in entradas)}
+
+    def limpar(self):
+        """Remove todas as entradas e zera os contadores."""
+        for _, _, caminho in self._entradas():
+            self._remover(caminho)
+        with self._trava:
+            self.acertos = self.falhas = 0
+            self._total = 0
+
+
+def _tamanho_entrada(caminho):
+    if os.path.isdir(caminho):
+        return sum(entrada.stat().st_size for entrada in os.scandir(caminho))
+    return os.path.getsize(caminho)
+
+
+def executar_etapa(cache, etapa, dependencias, parametros, calcular):
+    """
+    Executa uma etapa de um pipeline, pelo cache se houver um.
+
+    Args:
+        cache (CacheResultados): Cache a usar; se None, a etapa é só calculada.
+        etapa (str): Nome da etapa.
+        dependencias (iterable): Chaves das etapas anteriores (ou hash da entrada).
+        parametros (dict): Parâmetros da etapa.
+        calcular (callable): Função sem argumentos que retorna um dicionário de arrays.
+
+    Returns:
+        tuple: (chave da etapa ou None sem cache, dicionário de arrays).
+    """
+    if cache is None:
+        return None, calcular()
+    chave = cache.chave(etapa, dependencias, **parametros)
+    return chave, cache.obter_ou_calcular(chave, calcular)
@@ -0,0 +1,30 @@
+import cv2
+import numpy as np
+
+
+def imagem_textura(n, semente=0):
+    """
+    Textura suave n x n em cinza uint8 (ruído de baixa resolução ampliado por interpolação
+    cúbica), com regiões grandes e tortuosas: o pior caso para a busca em largura do
+    crescimento de regiões.
+    """
+    rng = np.random.default_rng(semente)
+    ruido = rng.random((max(n // 32, 2), max(n // 32, 2)), dtype=np.float32)
+    suave = cv2.resize(ruido, (n, n), interpolation=cv2.INTER_CUBIC)
+    return cv2.normalize(suave, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+
+
+def imagem_discos(altura, largura, espacamento=64, semente=0):
+    """
+    Discos escuros (primeiro plano após o limiar invertido) em uma grade com deslocamentos
+    aleatórios, com ruído, em RGB uint8. Raios parecidos garantem marcadores do watershed
+    em todos os discos.
+    """
+    rng = np.random.default_rng(semente)
+    img = np.full((altura, largura), 190, np.uint8)
+    for linha in range(espacamento // 2, altura, espacamento):
+        for coluna in range(espacamento // 2, largura, espacamento):
+            centro = (int(coluna + rng.integers(-8, 9)), int(linha + rng.integers(-8, 9)))
+            cv2.circle(img, centro, int(rng.integers(20, 24)), 60, -1)
+    img = cv2.add(img, rng.integers(0, 25, img.shape, dtype=np.uint8))
+    return np.dstack([img, img, cv2.subtract(img, 10)])
@@ -0,0 +1,352 @@
+import atexit
+import collections
+import contextlib
+import functools
+import glob
+import json
+import logging
+import multiprocessing.util
+import os
+import threading
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+# Variáveis de ambiente que ativam a instrumentação sem alterar o código
+VARIAVEL_SAIDA = "INSTRUMENTACAO"
+VARIAVEL_FORMATO = "INSTRUMENTACAO_FORMATO"
+VARIAVEL_MEMORIA = "INSTRUMENTACAO_MEMORIA"
+# Definida pelo processo que ativou a instrumentação pelo ambiente; os processos filhos a
+# herdam e gravam as próprias etapas em caminho.<pid>
+VARIAVEL_PID_PRINCIPAL = "INSTRUMENTACAO_PID_PRINCIPAL"
+VARIAVEL_NIVEL_LOG = "LOG_NIVEL"
+# Loggers afetados por configurar_log ("__main__" é o módulo executado com python -m)
+PACOTES_PROJETO = ("__main__", "filtros_frequencia_python", "segmentacao_watershed_python", "crescimento_regioes_python",
+                   "utilitarios", "benchmarks")
+
+Etapa = collections.namedtuple("Etapa", ["nome", "categoria", "inicio", "duracao", "pid", "thread", "pico_memoria",
+                                         "atributos"])
+
+# Instrumentação ativa; None desliga tudo (etapa() devolve sempre o mesmo contexto vazio)
+_ativa = None
+_NULO = contextlib.nullcontext()
+
+
+class _Medicao():
+    """Contexto de uma etapa em andamento."""
+
+    __slots__ = ("instrumentacao", "nome", "categoria", "atributos", "inicio", "pico_filhas")
+
+    def __init__(self, instrumentacao, nome, categoria, atributos):
+        self.instrumentacao = instrumentacao
+        self.nome = nome
+        self.categoria = categoria
+        self.atributos = atributos
+        self.pico_filhas = 0
+
+    def __enter__(self):
+        instrumentacao = self.instrumentacao
+        if instrumentacao.medir_memoria:
+            pilha = instrumentacao._pilha()
+            if pilha:
+                # O pico acumulado até aqui pertence à etapa externa
+                pilha[-1].pico_filhas = max(pilha[-1].pico_filhas, tracemalloc.get_traced_memory()[1])
+            pilha.append(self)
+            tracemalloc.reset_peak()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        fim = time.perf_counter()
+        instrumentacao = self.instrumentacao
+        pico = None
+        if instrumentacao.medir_memoria:
+            pico = max(tracemalloc.get_traced_memory()[1], self.pico_filhas)
+            pilha = instrumentacao._pilha()
+            pilha.pop()
+            if pilha:
+                pilha[-1].pico_filhas = max(pilha[-1].pico_filhas, pico)
+        instrumentacao._registrar(Etapa(self.nome, self.categoria, self.inicio - instrumentacao.origem, fim - self.inicio,
+                                        os.getpid(), threading.get_ident(), pico, self.atributos))
+        return False
+
+
+class Instrumentacao():
+    """
+    Coleta etapas cronometradas, contadores e, opcionalmente, o pico de memória de cada
+    etapa (tracemalloc: alocações do Python e do NumPy, não os buffers internos do OpenCV;
+    deixa o código mais lento, só use ao investigar memória).
+
+    Etapas podem ser aninhadas; o pico de uma etapa inclui o das etapas internas. Com
+    várias threads medindo memória ao mesmo tempo, o pico é o do processo no intervalo.
+    """
+
+    def __init__(self, medir_memoria=False):
+        self.medir_memoria = medir_memoria
+        self.origem = time.perf_counter()
+        self.etapas = []
+        self.contadores = collections.Counter()
+        self._eventos_contadores = []
+        self._trava = threading.Lock()
+        self._local = threading.local()
+        self._iniciou_tracemalloc = medir_memoria and not tracemalloc.is_tracing()
+        if self._iniciou_tracemalloc:
+            tracemalloc.start()
+
+    def encerrar(self):
+        """Para o tracemalloc, se foi esta instrumentação que o iniciou."""
+        if self._iniciou_tracemalloc:
+            tracemalloc.stop()
+            self._iniciou_tracemalloc = False
+
+    def _pilha(self):
+        pilha = getattr(self._local, "pilha", None)
+        if pilha is None:
+            pilha = self._local.pilha = []
+        return pilha
+
+    def _registrar(self, etapa):
+        with self._trava:
+            self.etapas.append(etapa)
+
+    def etapa(self, nome, categoria="", **atributos):
+        """Contexto que cronometra uma etapa (use com with)."""
+        return _Medicao(self, nome, categoria, atributos)
+
+    def contar(self, nome, valor=1):
+        """Soma valor ao contador nome."""
+        with self._trava:
+            self.contadores[nome] += valor
+            self._eventos_contadores.append((time.perf_counter() - self.origem, nome, self.contadores[nome],
+                                             os.getpid()))
+
+    def resumo(self):
+        """
+        Returns:
+            dict: Por etapa ("categoria/nome"), chamadas, tempo total e médio em ms, máximo em
+                  ms e maior pico de memória em bytes (se medido); e os contadores.
+        """
+        agrupadas = collections.defaultdict(list)
+        for etapa in self.etapas:
+            agrupadas[f"{etapa.categoria}/{etapa.nome}" if etapa.categoria else etapa.nome].append(etapa)
+        etapas = {}
+        for nome, lista in sorted(agrupadas.items()):
+            duracoes = [etapa.duracao for etapa in lista]
+            picos = [etapa.pico_memoria for etapa in lista if etapa.pico_memoria is not None]
+            etapas[nome] = {"chamadas": len(lista), "total_ms": 1000 * sum(duracoes),
+                            "media_ms": 1000 * sum(duracoes) / len(lista), "max_ms": 1000 * max(duracoes),
+                            "pico_memoria_bytes": max(picos) if picos else None}
+        return {"etapas": etapas, "contadores": dict(self.contadores)}
+
+    def exportar_json(self, caminho):
+        """Grava o resumo e todas as etapas (tempos em segundos) em JSON."""
+        dados = dict(self.resumo(), registros=[etapa._asdict() for etapa in self.etapas])
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(dados, arquivo, indent=2, default=repr)
+
+    def exportar_chrome_trace(self, caminho):
+        """
+        Grava as etapas e os contadores no formato Trace Event, que abre em chrome://tracing
+        e no Perfetto (ui.perfetto.dev).
+        """
+        eventos = []
+        for etapa in self.etapas:
+            argumentos = dict(etapa.atributos)
+            if etapa.pico_memoria is not None:
+                argumentos["pico_memoria_bytes"] = etapa.pico_memoria
+            eventos.append({"name": etapa.nome, "cat": etapa.categoria or "geral", "ph": "X",
+                            "ts": etapa.inicio * 1e6, "dur": etapa.duracao * 1e6, "pid": etapa.pid, "tid": etapa.thread,
+                            "args": argumentos})
+        for instante, nome, valor, pid in self._eventos_contadores:
+            eventos.append({"name": nome, "ph": "C", "ts": instante * 1e6, "pid": pid, "args": {nome: valor}})
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump({"traceEvents": eventos, "displayTimeUnit": "ms"}, arquivo, default=repr)
+
+    def exportar_parcial(self, caminho):
+        """
+        Grava as etapas e os eventos dos contadores em JSON, com a origem dos tempos,
+        para serem incorporados por outro processo (incorporar_parcial).
+        """
+        dados = {"origem": self.origem, "etapas": [list(etapa) for etapa in self.etapas],
+                 "eventos_contadores": self._eventos_contadores}
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(dados, arquivo, default=repr)
+
+    def incorporar_parcial(self, caminho):
+        """
+        Acrescenta as etapas e os contadores gravados por exportar_parcial em outro
+        processo, com os tempos deslocados para a origem desta instrumentação
+        (time.perf_counter é o mesmo relógio monotônico em todos os processos).
+        """
+        with open(caminho, encoding="utf-8") as arquivo:
+            dados = json.load(arquivo)
+        deslocamento = dados["origem"] - self.origem
+        with self._trava:
+            for nome, categoria, inicio, duracao, pid, thread, pico_memoria, atributos in dados["etapas"]:
+                self.etapas.append(Etapa(nome, categoria, inicio + deslocamento, duracao, pid, thread, pico_memoria,
+                                         atributos))
+            ultimos = {}
+            for instante, nome, valor, pid in dados["eventos_contadores"]:
+                self._eventos_contadores.append((instante + deslocamento, nome, valor, pid))
+                ultimos[nome] = valor
+            self.contadores.update(ultimos)
+
+    def exportar(self, caminho, formato="chrome"):
+        """Exporta no formato "chrome" (Trace Event) ou "json"."""
+        if formato == "chrome":
+            self.exportar_chrome_trace(caminho)
+        elif formato == "json":
+            self.exportar_json(caminho)
+        else:
+            raise ValueError(f"Formato desconhecido: {formato}. Use 'chrome' ou 'json'.")
+
+
+def ativar(medir_memoria=False):
+    """Ativa uma nova instrumentação global (encerrando a anterior) e a retorna."""
+    global _ativa
+    desativar()
+    _ativa = Instrumentacao(medir_memoria)
+    return _ativa
+
+
+def desativar():
+    """Desativa a instrumentação global e retorna a que estava ativa (ou None)."""
+    global _ativa
+    anterior, _ativa = _ativa, None
+    if anterior is not None:
+        anterior.encerrar()
+    return anterior
+
+
+def instrumentacao_ativa():
+    """Instrumentação global ativa, ou None."""
+    return _ativa
+
+
+def etapa(nome, categoria="", **atributos):
+    """
+    Contexto que cronometra uma etapa na instrumentação ativa; desativada, retorna um
+    contexto vazio compartilhado, sem medir nada.
+
+    Args:
+        nome (str): Nome da etapa (por exemplo "decodificacao", "cinza", "segmentacao").
+        categoria (str): Módulo ou pipeline da etapa.
+        **atributos: Valores guardados com a etapa (exportados em args no trace).
+    """
+    if _ativa is None:
+        return _NULO
+    return _ativa.etapa(nome, categoria, **atributos)
+
+
+def contar(nome, valor=1):
+    """Soma valor ao contador nome da instrumentação ativa (sem efeito se desativada)."""
+    if _ativa is not None:
+        _ativa.contar(nome, valor)
+
+
+def instrumentar(nome, categoria=""):
+    """Decorador que executa a função dentro de etapa(nome, categoria)."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            if _ativa is None:
+                return funcao(*args, **kwargs)
+            with _ativa.etapa(nome, categoria):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+def configurar_log(nivel=None):
+    """
+    Configura o logging para os scripts. Os loggers do projeto usam o nível de nivel, da
+    variável de ambiente LOG_NIVEL ou INFO (DEBUG exibe as mensagens de depuração dos
+    módulos); os das bibliotecas ficam em INFO.
+    """
+    nivel = nivel or os.environ.get(VARIAVEL_NIVEL_LOG, "INFO")
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    for nome in PACOTES_PROJETO:
+        logging.getLogger(nome).setLevel(nivel.upper() if isinstance(nivel, str) else nivel)
+
+
+class _ExportacaoAmbiente():
+    """
+    Coleta ativada pela variável INSTRUMENTACAO=caminho.
+
+    O processo principal exporta caminho ao terminar (atexit). Os trabalhadores de
+    multiprocessing saem por os._exit, sem atexit: cada processo filho recomeça a coleta
+    sem as etapas herdadas e grava as suas em caminho.<pid> por um finalizador do
+    multiprocessing, executado quando o trabalhador termina normalmente. O principal
+    incorpora esses arquivos ao seu ao final e os remove.
+    """
+
+    def __init__(self, caminho, formato, medir_memoria):
+        self.caminho = caminho
+        self.formato = formato
+        self.medir_memoria = medir_memoria
+        self.instrumentacao = None
+        self.pid_principal = None
+        self.pid_exportado = None
+        self.inicio = time.time()
+
+    def ativar_principal(self):
+        os.environ[VARIAVEL_PID_PRINCIPAL] = str(os.getpid())
+        self.pid_principal = os.getpid()
+        self.instrumentacao = ativar(self.medir_memoria)
+        atexit.register(self.exportar_principal)
+        multiprocessing.util.register_after_fork(self, _ExportacaoAmbiente.ativar_filho)
+
+    def ativar_filho(self):
+        # Chamado na importação em um processo filho (spawn, forkserver, subprocessos) e no
+        # início de cada processo do multiprocessing, depois que ele descarta as etapas e os
+        # finalizadores herdados
+        self.instrumentacao = ativar(self.medir_memoria)
+        multiprocessing.util.Finalize(None, self.exportar_filho, exitpriority=0)
+        if self.pid_principal is None and self.pid_exportado is None:
+            self.pid_exportado = 0
+            atexit.register(self.exportar_filho)
+            multiprocessing.util.register_after_fork(self, _ExportacaoAmbiente.ativar_filho)
+
+    def exportar_filho(self):
+        instrumentacao = self.instrumentacao
+        if self.pid_exportado == os.getpid() or instrumentacao is None:
+            return
+        self.pid_exportado = os.getpid()
+        instrumentacao.encerrar()
+        if instrumentacao.etapas or instrumentacao.contadores:
+            instrumentacao.exportar_parcial(f"{self.caminho}.{os.getpid()}")
+
+    def exportar_principal(self):
+        if os.getpid() != self.pid_principal:
+            return
+        instrumentacao = self.instrumentacao
+        instrumentacao.encerrar()
+        for parcial in sorted(glob.glob(glob.escape(self.caminho) + ".*")):
+            # Só os arquivos dos filhos desta execução
+            if not parcial.rpartition(".")[2].isdigit() or os.path.getmtime(parcial) < self.inicio:
+                continue
+            try:
+                instrumentacao.incorporar_parcial(parcial)
+                os.remove(parcial)
+            except (OSError, ValueError, KeyError) as excecao:
+                logger.warning("Não foi possível incorporar %s: %s", parcial, excecao)
+        instrumentacao.exportar(self.caminho, self.formato)
+        logger.info("Instrumentação exportada em %s", self.caminho)
+
+
+def _ativar_pelo_ambiente():
+    # INSTRUMENTACAO=caminho ativa a coleta na importação e exporta ao final do processo
+    caminho = os.environ.get(VARIAVEL_SAIDA)
+    if not caminho:
+        return
+    exportacao = _ExportacaoAmbiente(caminho, os.environ.get(VARIAVEL_FORMATO, "chrome"),
+                                     os.environ.get(VARIAVEL_MEMORIA, "") == "1")
+    if os.environ.get(VARIAVEL_PID_PRINCIPAL, str(os.getpid())) == str(os.getpid()):
+        exportacao.ativar_principal()
+    else:
+        exportacao.ativar_filho()
+    return exportacao
+
+
+_exportacao_ambiente = _ativar_pelo_ambiente()
@@ -0,0 +1,240 @@
+import collections
+import concurrent.futures
+import os
+import threading
+import cv2
+import numpy as np
+
+# Tamanho padrão de um CacheDecodificacao
+TAMANHO_CACHE_DECODIFICACAO_PADRAO = 256 * 1024 * 1024
+# Tamanho (MiB) do cache de decodificação do processo; sem a variável, ele fica desativado
+VARIAVEL_CACHE_DECODIFICACAO = "IMAGENS_CACHE_DECODIFICACAO_MIB"
+
+
+def _cores_para_rgb(imagem):
+    # O OpenCV decodifica em BGR/BGRA; o resto do projeto usa RGB/RGBA (como o skimage.io)
+    if imagem.ndim == 3 and imagem.shape[2] == 3:
+        return cv2.cvtColor(imagem, cv2.COLOR_BGR2RGB)
+    if imagem.ndim == 3 and imagem.shape[2] == 4:
+        return cv2.cvtColor(imagem, cv2.COLOR_BGRA2RGBA)
+    return imagem
+
+
+def _cores_para_bgr(imagem):
+    if imagem.ndim == 3 and imagem.shape[2] == 3:
+        return cv2.cvtColor(imagem, cv2.COLOR_RGB2BGR)
+    if imagem.ndim == 3 and imagem.shape[2] == 4:
+        return cv2.cvtColor(imagem, cv2.COLOR_RGBA2BGRA)
+    return imagem
+
+
+def ler_imagem(caminho, mmap=True):
+    """
+    Decodifica uma imagem com o backend mais rápido disponível.
+
+    Arquivos .npy são abertos por memory-map (sem ler os dados) se mmap=True. Os demais são
+    lidos de uma vez e decodificados com cv2.imdecode, em RGB/RGBA, com a profundidade
+    original (os mesmos pixels do skimage.io.imread em PNG, BMP e TIFF; em JPEG, o
+    decodificador pode diferir). Formatos que o OpenCV não lê (por exemplo GIF) caem no
+    skimage.io.imread.
+
+    Args:
+        caminho (str): Caminho da imagem.
+        mmap (bool): Abre .npy por memory-map (somente leitura).
+
+    Returns:
+        numpy.ndarray: Imagem (linhas, colunas) ou (linhas, colunas, canais).
+    """
+    if caminho.lower().endswith(".npy"):
+        return np.load(caminho, mmap_mode="r" if mmap else None)
+    imagem = cv2.imdecode(np.fromfile(caminho, np.uint8), cv2.IMREAD_UNCHANGED)
+    if imagem is None:
+        import skimage.io
+        return skimage.io.imread(caminho)
+    return _cores_para_rgb(imagem)
+
+
+def ler_imagem_raw(caminho, shape, dtype=np.uint8, mmap=True):
+    """
+    Abre um arquivo de pixels crus (sem cabeçalho, em ordem C) com a forma e o dtype dados.
+
+    Returns:
+        numpy.ndarray: np.memmap somente leitura se mmap=True, senão o array lido.
+    """
+    if mmap:
+        return np.memmap(caminho, dtype=dtype, mode="r", shape=tuple(shape))
+    return np.fromfile(caminho, dtype=dtype).reshape(shape)
+
+
+class CacheDecodificacao():
+    """
+    Cache LRU em memória de imagens decodificadas, limitado em bytes.
+
+    A chave é o caminho absoluto com o tamanho e o mtime do arquivo, então um arquivo
+    alterado é decodificado de novo. Os arrays são compartilhados entre quem os pede e
+    ficam somente leitura. Com tamanho_maximo=0 o cache fica desativado e cada pedido
+    decodifica o arquivo.
+    """
+
+    def __init__(self, tamanho_maximo=TAMANHO_CACHE_DECODIFICACAO_PADRAO):
+        self.tamanho_maximo = tamanho_maximo
+        self.acertos = 0
+        self.falhas = 0
+        self._imagens = collections.OrderedDict()
+        self._bytes = 0
+        self._trava = threading.Lock()
+
+    def obter(self, caminho):
+        """Retorna a imagem decodificada (do cache ou por ler_imagem)."""
+        if self.tamanho_maximo <= 0:
+            imagem = ler_imagem(caminho)
+            imagem.setflags(write=False)
+            return imagem
+        estado = os.stat(caminho)
+        chave = (os.path.abspath(caminho), estado.st_size, estado.st_mtime_ns)
+        with self._trava:
+            imagem = self._imagens.get(chave)
+            if imagem is not None:
+                self._imagens.move_to_end(chave)
+                self.acertos += 1
+                return imagem
+            self.falhas += 1
+        imagem = ler_imagem(caminho)
+        imagem.setflags(write=False)
+        # Memory-maps não ocupam memória do processo e não entram no cache
+        if isinstance(imagem, np.memmap) or imagem.nbytes > self.tamanho_maximo:
+            return imagem
+        with self._trava:
+            if chave not in self._imagens:
+                self._imagens[chave] = imagem
+                self._bytes += imagem.nbytes
+            while self._bytes > self.tamanho_maximo:
+                _, removida = self._imagens.popitem(last=False)
+                self._bytes -= removida.nbytes
+        return imagem
+
+    def limpar(self):
+        """Remove todas as imagens e zera os contadores."""
+        with self._trava:
+            self._imagens.clear()
+            self._bytes = 0
+            self.acertos = self.falhas = 0
+
+
+# Opcional: útil quando vários algoritmos leem os mesmos arquivos no mesmo processo, mas
+# só ocupa memória em lotes que decodificam cada imagem uma vez
+cache_decodificacao = CacheDecodificacao(int(os.environ.get(VARIAVEL_CACHE_DECODIFICACAO, "0")) * 1024 * 1024)
+
+
+def carregar_imagem(caminho):
+    """
+    Decodifica uma imagem (somente leitura). Com o cache de decodificação do processo
+    ativado (cache_decodificacao.tamanho_maximo > 0 ou a variável de ambiente
+    IMAGENS_CACHE_DECODIFICACAO_MIB), as chamadas seguintes com o mesmo arquivo (por
+    exemplo, de outro algoritmo) recebem o mesmo array.
+    """
+    return cache_decodificacao.obter(caminho)
+
+
+def codificar_png(imagem, nivel_compressao=3):
+    """
+    Codifica uma imagem RGB/RGBA/cinza em PNG com o OpenCV.
+
+    Args:
+        imagem (numpy.ndarray): Imagem uint8 ou uint16.
+        nivel_compressao (int): Nível do zlib, de 0 (sem compressão, o mais rápido) a 9.
+
+    Returns:
+        bytes: Conteúdo do arquivo PNG.
+    """
+    sucesso, dados = cv2.imencode(".png", _cores_para_bgr(np.ascontiguousarray(imagem)),
+                                  [cv2.IMWRITE_PNG_COMPRESSION, int(nivel_compressao)])
+    if not sucesso:
+        raise ValueError(f"Não foi possível codificar a imagem {imagem.shape} {imagem.dtype} em PNG.")
+    return dados.tobytes()
+
+
+def gravar_imagem(caminho, imagem, nivel_compressao=None):
+    """
+    Grava uma imagem. Caminhos .npy são gravados com np.save; com nivel_compressao=None,
+    o arquivo é gravado com skimage.io.imsave (os mesmos bytes das versões anteriores);
+    com um nível, é codificado em PNG pelo OpenCV (codificar_png), bem mais rápido.
+    """
+    if caminho.lower().endswith(".npy"):
+        np.save(caminho, np.asarray(imagem))
+    elif nivel_compressao is None:
+        import skimage.io
+        skimage.io.imsave(caminho, imagem)
+    else:
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(codificar_png(imagem, nivel_compressao))
+
+
+class GravadorImagens():
+    """
+    Grava imagens em threads de fundo (a codificação PNG do OpenCV e a escrita liberam o
+    GIL), para que o cálculo da próxima etapa ou imagem não espere pelo disco.
+
+    Os arrays passados a gravar não podem ser modificados até a gravação terminar. No
+    máximo max_pendentes gravações ficam na fila; gravar bloqueia quando ela está cheia.
+    Erros de gravação são relançados em aguardar (ou ao sair do bloco with).
+    """
+
+    def __init__(self, workers=2, nivel_compressao=None, formato="png", max_pendentes=None):
+        """
+        Args:
+            workers (int): Threads de gravação.
+            nivel_compressao (int): Nível do PNG (ver gravar_imagem); None usa skimage.io.imsave.
+            formato (str): "png" ou "npy" (os arrays crus, com a extensão trocada para .npy).
+            max_pendentes (int): Gravações enfileiradas ao mesmo tempo; se None, 4 * workers.
+        """
+        if formato not in ("png", "npy"):
+            raise ValueError(f"Formato desconhecido: {formato}. Use 'png' ou 'npy'.")
+        self.nivel_compressao = nivel_compressao
+        self.formato = formato
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        self._vagas = threading.BoundedSemaphore(max_pendentes or 4 * workers)
+        self._futuros = []
+        self.gravados = []
+
+    def gravar(self, caminho, imagem):
+        """Enfileira a gravação de uma imagem; retorna o caminho efetivo do arquivo."""
+        if self.formato == "npy":
+            caminho = os.path.splitext(caminho)[0] + ".npy"
+        self._vagas.acquire()
+        try:
+            futuro = self._executor.submit(gravar_imagem, caminho, imagem, self.nivel_compressao)
+        except BaseException:
+            self._vagas.release()
+            raise
+        futuro.add_done_callback(lambda _: self._vagas.release())
+        self._futuros.append(futuro)
+        self.gravados.append(caminho)
+        return caminho
+
+    def aguardar(self):
+        """Espera as gravações enfileiradas e relança o primeiro erro, se houver."""
+        futuros, self._futuros = self._futuros, []
+        for futuro in futuros:
+            futuro.result()
+
+    def fechar(self):
+        try:
+            self.aguardar()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+        return False
+
+
+def gravar(caminho, imagem, gravador=None):
+    """Grava pelo gravador, se houver um, ou na hora com gravar_imagem."""
+    if gravador is None:
+        gravar_imagem(caminho, imagem)
+    else:
+        gravador.gravar(caminho, imagem)